@@ -1,7 +1,9 @@
+import time
+_script_start = time.perf_counter()
+
 import streamlit as st
-import plotly.express as px
-import pandas as pd
-from datetime import datetime
+from utils.instrumentation import instrument
+from utils.page_registry import PageRegistry, record_startup
 
 # Sayfa konfigürasyonu
 st.set_page_config(
@@ -19,15 +21,6 @@ def load_css():
 
 st.markdown(load_css(), unsafe_allow_html=True)
 
-# Demo verileri için cache
-@st.cache_data
-def get_sample_data():
-    return pd.DataFrame({
-        'Tarih': pd.date_range(start='2024-01-01', periods=10, freq='D'),
-        'Hasta_Sayisi': [15, 18, 12, 20, 25, 22, 19, 23, 21, 24],
-        'Basari_Orani': [92, 93, 91, 94, 95, 93, 92, 94, 93, 94]
-    })
-
 def main():
     st.markdown("<h1 class='main-header'>OnkoNixAI</h1>", unsafe_allow_html=True)
     st.markdown("<p class='section-header'>Akciğer Kanseri Teşhis ve Tedavi Platformu</p>", unsafe_allow_html=True)
@@ -37,21 +30,11 @@ def main():
         st.markdown("<h2 class='section-header'>Navigasyon</h2>", unsafe_allow_html=True)
         page = st.radio(
             "",
-            ["Ana Sayfa", "Hasta Bilgileri", "Görüntü Analizi", "Rapor Analizi", "Toplu Analiz", "Doz Hesaplama"]
+            registry.labels()
         )
 
-    if page == "Ana Sayfa":
-        show_dashboard()
-    elif page == "Hasta Bilgileri":
-        show_patient_info()
-    elif page == "Görüntü Analizi":
-        show_image_analysis()
-    elif page == "Rapor Analizi":
-        show_report_analysis()
-    elif page == "Toplu Analiz":
-        analyze_batch_reports()
-    elif page == "Doz Hesaplama":
-        show_dose_calculator()
+    # Sayfa modülü yalnızca ilk açıldığında içe aktarılır
+    registry.render(page)
 
 @st.cache_data
 def create_metric_card(title, value):
@@ -62,116 +45,92 @@ def create_metric_card(title, value):
     </div>
     """
 
+@instrument('page.dashboard')
 def show_dashboard():
+    import pandas as pd
+    import plotly.express as px
+    from utils.charts import line_figure, frame_fingerprint, get_figure_cache
+    from utils.patient_store import get_store
+
+    # Özet tablolarından okunur; ham laboratuvar tabloları taranmaz
+    cohort = get_store().cohort_summary()
+    daily = cohort['daily']
+    total_panels = int(daily['panel_count'].sum())
+    total_scored = int(daily['risk_count'].sum())
+    high_risk_rate = daily['high_risk_count'].sum() / total_scored if total_scored else 0.0
+
     # Metrik kartları
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        st.markdown(create_metric_card("Aktif Hasta", "127"), unsafe_allow_html=True)
+        st.markdown(create_metric_card("Kayıtlı Hasta", f"{cohort['patient_count']:,}"), unsafe_allow_html=True)
     with col2:
-        st.markdown(create_metric_card("Günlük Analiz", "24"), unsafe_allow_html=True)
+        last_day = int(daily['panel_count'].iloc[-1]) if len(daily) else 0
+        st.markdown(create_metric_card("Son Gün Analiz", f"{last_day:,}"), unsafe_allow_html=True)
     with col3:
-        st.markdown(create_metric_card("Başarı Oranı", "94%"), unsafe_allow_html=True)
+        st.markdown(create_metric_card("Yüksek Risk Oranı", f"{high_risk_rate:.1%}"), unsafe_allow_html=True)
 
     st.markdown("<h2 class='section-header'>Analiz Metrikleri</h2>", unsafe_allow_html=True)
 
-    # Cached veri kullanımı
-    df = get_sample_data()
+    if daily.empty:
+        st.info("Henüz laboratuvar verisi yok. Toplu Analiz sayfasından veri yükleyebilirsiniz.")
+        return
+
+    df = daily.assign(Tarih=pd.to_datetime(daily['report_date'], errors='coerce'))
+    figures = get_figure_cache()
 
     # Grafikleri yan yana göster
     col1, col2 = st.columns(2)
 
     with col1:
-        fig1 = px.line(df, x='Tarih', y='Hasta_Sayisi',
-                    title='Günlük Hasta Analizi',
-                    template='plotly_white')
-        fig1.update_traces(line_color='#3498db')
-        fig1.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+        fig1 = figures.get_or_build(frame_fingerprint(df, 'panel_count'), lambda: line_figure(
+            df, x='Tarih', y='panel_count', title='Günlük Panel Analizi', line_color='#3498db',
+            labels={'panel_count': 'Panel Sayısı'}
+        ).update_layout(template='plotly_white', margin=dict(l=20, r=20, t=40, b=20)))
         st.plotly_chart(fig1, use_container_width=True, config={'displayModeBar': False})
 
     with col2:
-        fig2 = px.line(df, x='Tarih', y='Basari_Orani',
-                    title='Teşhis Başarı Oranı Trendi',
-                    template='plotly_white')
-        fig2.update_traces(line_color='#27ae60')
-        fig2.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+        fig2 = figures.get_or_build(frame_fingerprint(df, 'mean_risk'), lambda: line_figure(
+            df, x='Tarih', y='mean_risk', title='Günlük Ortalama Risk Skoru', line_color='#27ae60',
+            labels={'mean_risk': 'Ortalama Risk'}
+        ).update_layout(template='plotly_white', margin=dict(l=20, r=20, t=40, b=20)))
         st.plotly_chart(fig2, use_container_width=True, config={'displayModeBar': False})
 
-    st.markdown("""
+    col1, col2 = st.columns(2)
+
+    with col1:
+        buckets = cohort['risk_buckets']
+        fig3 = px.bar(buckets, x='bucket', y='panel_count', title='Risk Skoru Dağılımı',
+                      labels={'bucket': 'Risk Skoru', 'panel_count': 'Panel Sayısı'})
+        fig3.update_layout(template='plotly_white', margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig3, use_container_width=True, config={'displayModeBar': False})
+
+    with col2:
+        parameters = cohort['parameters']
+        fig4 = px.bar(parameters, x='param', y='abnormal_rate', title='Parametre Bazında Anormallik Oranı',
+                      labels={'param': 'Parametre', 'abnormal_rate': 'Anormal Oranı'})
+        fig4.update_layout(template='plotly_white', margin=dict(l=20, r=20, t=40, b=20), yaxis_tickformat='.0%')
+        st.plotly_chart(fig4, use_container_width=True, config={'displayModeBar': False})
+
+    st.markdown(f"""
     <div class='info-box'>
-        <h4>Sistem Performans Özeti</h4>
-        <p>• Son 30 günde %94 doğruluk oranı</p>
-        <p>• Ortalama analiz süresi: 15 dakika</p>
-        <p>• Aktif hasta takip sayısı: 127</p>
+        <h4>Kohort Özeti</h4>
+        <p>• Toplam analiz edilen panel: {total_panels:,}</p>
+        <p>• Ortalama risk skoru: {daily['risk_sum'].sum() / total_scored if total_scored else 0:.2f}</p>
+        <p>• En az bir anormal parametre içeren panel oranı: {daily['abnormal_panel_count'].sum() / total_panels:.1%}</p>
     </div>
     """, unsafe_allow_html=True)
 
-def show_patient_info():
-    st.markdown("## Hasta Bilgileri")
-    demo_patient = {
-        "Ad": "Ahmet",
-        "Soyad": "Yılmaz",
-        "Yaş": 55,
-        "Cinsiyet": "Erkek",
-        "Tanı Tarihi": "2024-01-15"
-    }
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        for key, value in demo_patient.items():
-            st.text(f"{key}: {value}")
-    
-    with col2:
-        st.markdown("""
-        <div class='info-box'>
-            <h4>Son Kontrol Bilgileri</h4>
-            <p>Tarih: 2024-02-01</p>
-            <p>Durum: Stabil</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-def show_image_analysis():
-    st.markdown("## Bronkoskopi Görüntü Analizi")
-    uploaded_file = st.file_uploader("Bronkoskopi görüntüsü yükleyin", type=['jpg', 'png'])
-    
-    if uploaded_file is not None:
-        st.image(uploaded_file, caption='Yüklenen Görüntü')
-        st.markdown("""
-        <div class='info-box'>
-            <h4>Analiz Sonuçları</h4>
-            <p>Anormallik Tespit Oranı: 15%</p>
-            <p>Güven Skoru: 87%</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-def show_report_analysis():
-    st.markdown("## Hasta Rapor Analizi")
-    # Add your report analysis code here.  This is a placeholder.
-    st.write("Bu bölümde hasta rapor analizleri yer alacaktır.")
-
-
-def analyze_batch_reports():
-    st.markdown("## Toplu Analiz")
-    st.write("Bu bölümde toplu rapor analizi yapılacaktır.")
-
-
-def show_dose_calculator():
-    st.markdown("## Tedavi Doz Hesaplama")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        weight = st.number_input("Hasta Kilosu (kg)", min_value=30, max_value=150)
-        height = st.number_input("Boy (cm)", min_value=100, max_value=220)
-        age = st.number_input("Yaş", min_value=18, max_value=100)
-    
-    with col2:
-        st.markdown("""
-        <div class='info-box'>
-            <h4>Önerilen Doz</h4>
-            <p>Günlük Doz: 250mg</p>
-            <p>Tedavi Süresi: 6 hafta</p>
-        </div>
-        """, unsafe_allow_html=True)
+registry = PageRegistry()
+registry.register("Ana Sayfa", show_dashboard)
+registry.register("Hasta Bilgileri", "pages.patient_info:main")
+registry.register("Görüntü Analizi", "pages.image_analysis:show_image_analysis")
+registry.register("Rapor Analizi", "pages.report_analysis:show_report_analysis")
+registry.register("Toplu Analiz", "pages.batch_analysis:analyze_batch_reports")
+registry.register("Doz Hesaplama", "pages.dose_calculator:calculate_dose")
+registry.register("Sistem Tanılama", "pages.diagnostics:show_diagnostics")
+
+record_startup(time.perf_counter() - _script_start)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
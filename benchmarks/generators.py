@@ -0,0 +1,103 @@
+# Kıyaslama testleri için tohumlu (tekrarlanabilir) sentetik veri üreticileri
+import io
+import cv2
+import numpy as np
+import pandas as pd
+from utils.data_analysis import REFERENCE_RANGES
+
+def make_blood_panel_frame(n_rows, seed=0, missing_rate=0.05):
+    """Toplu analiz CSV biçiminde sentetik kan paneli verisi üretir"""
+    rng = np.random.default_rng(seed)
+
+    data = {
+        'hasta_id': [f'P{i:07d}' for i in rng.integers(0, max(n_rows // 4, 1), n_rows)],
+        'rapor_tarihi': (np.datetime64('2024-01-01') + rng.integers(0, 365, n_rows)).astype(str)
+    }
+
+    for param, (min_val, max_val) in REFERENCE_RANGES.items():
+        # Değerlerin çoğu normal aralıkta, bir kısmı dışında olacak şekilde
+        center = (min_val + max_val) / 2
+        spread = (max_val - min_val) / 2 or 1.0
+        values = rng.normal(center, spread * 0.9, n_rows).clip(0)
+        values[rng.random(n_rows) < missing_rate] = np.nan
+        data[param.lower()] = values.round(2)
+
+    return pd.DataFrame(data)
+
+def make_blood_panel_csv(n_rows, seed=0):
+    """Sentetik kan paneli verisini CSV baytları olarak döndürür"""
+    buffer = io.BytesIO()
+    make_blood_panel_frame(n_rows, seed).to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+_REPORT_LINES = [
+    "Sağ üst lobda {size} mm boyutunda nodül izlenmiştir.",
+    "Sol alt lobda {size} cm çapında kitle lezyonu mevcuttur.",
+    "Histopatolojik tanı: adenokarsinom.",
+    "Skuamöz hücreli karsinom ile uyumlu bulgular.",
+    "Evre {stage} olarak değerlendirilmiştir.",
+    "Mediastinal lenf nodlarında metastaz saptanmamıştır.",
+    "Plevral invazyon izlenmemiştir.",
+    "Tümör grade {grade} olarak raporlanmıştır.",
+    "Karaciğerde yayılım lehine bulgu yoktur.",
+    "Hastanın genel durumu iyidir, takip önerilir.",
+    "Kontrol tomografisi üç ay sonra planlanmıştır."
+]
+
+def make_pathology_report(n_lines, rng):
+    """Belirtilen satır sayısında Türkçe patoloji raporu üretir"""
+    lines = []
+    for template in rng.choice(_REPORT_LINES, n_lines):
+        lines.append(template.format(
+            size=round(float(rng.uniform(2, 80)), 1),
+            stage=rng.choice(['I', 'II', 'III', 'IV']),
+            grade=int(rng.integers(1, 4))
+        ))
+    return '\n'.join(lines)
+
+def make_pathology_reports(n_reports, seed=0, min_lines=5, max_lines=60):
+    """Farklı uzunluklarda sentetik patoloji raporları üretir"""
+    rng = np.random.default_rng(seed)
+    return [make_pathology_report(int(rng.integers(min_lines, max_lines + 1)), rng) for _ in range(n_reports)]
+
+def make_pathology_records(n_records, seed=0):
+    """analyze_pathology_report girdisi biçiminde kayıtlar üretir"""
+    rng = np.random.default_rng(seed)
+    histologies = ['Adenokarsinom', 'Skuamöz hücreli karsinom', 'Büyük hücreli karsinom', 'Küçük hücreli karsinom']
+    return [
+        {
+            'histology': histologies[int(rng.integers(len(histologies)))],
+            'stage': 'Stage ' + ['I', 'II', 'III', 'IV'][int(rng.integers(4))],
+            'differentiation': 'Orta derecede diferansiye'
+        }
+        for _ in range(n_records)
+    ]
+
+def make_bronchoscopy_image(width, height, seed=0):
+    """
+    Bronkoskopi görüntüsüne benzeyen sentetik BGR görüntü üretir:
+    kırmızımsı doku dokusu, ortada karanlık lümen ve birkaç parlak lezyon
+    """
+    rng = np.random.default_rng(seed)
+
+    # Düşük frekanslı doku dokusu
+    texture = rng.random((max(height // 16, 2), max(width // 16, 2), 3)).astype(np.float32)
+    texture = cv2.resize(texture, (width, height), interpolation=cv2.INTER_CUBIC)
+    image = np.empty((height, width, 3), dtype=np.float32)
+    image[..., 0] = 40 + 40 * texture[..., 0]
+    image[..., 1] = 60 + 50 * texture[..., 1]
+    image[..., 2] = 140 + 90 * texture[..., 2]
+
+    # Karanlık lümen
+    yy, xx = np.mgrid[0:height, 0:width]
+    radius = min(width, height) * 0.25
+    distance = np.hypot(xx - width / 2, yy - height / 2)
+    image *= np.clip(distance / radius, 0.15, 1.0)[..., None]
+
+    # Parlak lezyonlar
+    for _ in range(int(rng.integers(3, 12))):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.circle(image, center, int(rng.integers(4, max(min(width, height) // 20, 5))), (200, 210, 255), -1)
+
+    image += rng.normal(0, 6, image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
@@ -0,0 +1,278 @@
+"""
+OnkoNixAI performans kıyaslamaları.
+
+Kullanım (depo kök dizininden):
+
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --time-threshold 0.25
+
+Taban çizgisi verildiğinde süre ya da tepe bellek eşikten fazla artan
+her kıyaslama gerileme sayılır ve komut 1 çıkış koduyla biter.
+
+Depodaki benchmarks/baseline.json geliştirme makinesinde varsayılan
+ayarlarla ölçülmüştür (python ve machine alanlarına bakın). Süreler
+makineye bağlı olduğundan, CI ya da başka bir makinede karşılaştırma
+yapmadan önce taban çizgisi o makinede --save-baseline ile yeniden
+oluşturulmalıdır. Taban çizgisi dosyası yoksa karşılaştırma yapılmadığı
+açıkça yazdırılır; --require-baseline ile bu durum hata sayılır (çıkış
+kodu 2).
+"""
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from benchmarks.generators import (
+    make_blood_panel_csv, make_pathology_reports, make_pathology_records, make_bronchoscopy_image
+)
+from utils.batch_ingest import analyze_blood_csv
+from utils.data_analysis import analyze_blood_values, analyze_pathology_report, calculate_treatment_dose
+from utils.image_index import ImageSimilarityIndex, FEATURE_DIM, extract_features
+from utils.image_processing import preprocess_image, detect_anomalies
+from utils.pathology import classify_pathology
+from utils.report_analyzer import ReportAnalyzer
+
+DEFAULT_BASELINE = Path(__file__).with_name('baseline.json')
+DEFAULT_ROW_COUNTS = [1_000, 100_000, 1_000_000]
+DEFAULT_RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+REPO_ROOT = Path(__file__).resolve().parent.parent
+COLD_IMPORT_MODULES = [
+    'streamlit',
+    'utils.page_registry',
+    'pages.patient_info',
+    'pages.image_analysis',
+    'pages.report_analysis',
+    'pages.batch_analysis',
+    'pages.dose_calculator',
+    'pages.diagnostics'
+]
+
+def measure(fn, repeat=3):
+    """
+    fn'i repeat kez çalıştırır ve en iyi süreyi döndürür. Tepe bellek,
+    zamanlama çalışmalarını etkilememek için ayrı bir tracemalloc
+    çalışmasında ölçülür.
+    """
+    fn()  # Isınma
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+def build_cases(row_counts, resolutions, n_reports, workdir, name_filter=None):
+    """
+    (ad, fonksiyon, öğe sayısı, bayt sayısı) biçiminde kıyaslama listesi
+    oluşturur. name_filter verilirse yalnızca adı bu metni içeren
+    kıyaslamaların verisi üretilir. Diske yazan kıyaslamalar workdir
+    altında çalışır.
+    """
+    cases = []
+
+    def wanted(*names):
+        return name_filter is None or any(name_filter in name for name in names)
+
+    # Kan değerleri: satır başına skaler analiz ve uçtan uca toplu sayfa mantığı
+    for n_rows in row_counts:
+        scalar_name = f'analyze_blood_values[{min(n_rows, 10_000)}]' if n_rows <= 100_000 else None
+        batch_name = f'batch_page[{n_rows}]'
+        if not wanted(batch_name, *filter(None, [scalar_name])):
+            continue
+        csv_bytes = make_blood_panel_csv(n_rows, seed=n_rows)
+
+        if scalar_name and wanted(scalar_name):
+            panels = [
+                {param.upper(): value for param, value in row.items() if value == value}
+                for row in _csv_records(csv_bytes, limit=10_000)
+            ]
+            cases.append((scalar_name,
+                          lambda panels=panels: [analyze_blood_values(p) for p in panels],
+                          len(panels), 0))
+
+        if wanted(batch_name):
+            cases.append((batch_name,
+                          lambda data=csv_bytes: analyze_blood_csv(io.BytesIO(data)),
+                          n_rows, len(csv_bytes)))
+
+    # Patoloji ve doz hesaplama
+    if wanted('analyze_pathology_report[10000]', 'calculate_treatment_dose[10000]'):
+        records = make_pathology_records(10_000)
+        if wanted('analyze_pathology_report[10000]'):
+            cases.append(('analyze_pathology_report[10000]',
+                          lambda: [analyze_pathology_report(r) for r in records],
+                          len(records), 0))
+        if wanted('calculate_treatment_dose[10000]'):
+            cases.append(('calculate_treatment_dose[10000]',
+                          lambda: [calculate_treatment_dose(70, 60, {'WBC': 3.5, 'PLT': 90}, r) for r in records],
+                          len(records), 0))
+    if wanted('classify_pathology[200000]'):
+        registry = pd.DataFrame(make_pathology_records(200_000))
+        cases.append(('classify_pathology[200000]',
+                      lambda: classify_pathology(registry),
+                      len(registry), 0))
+
+    # Rapor metni analizi (kısa ve uzun raporlar)
+    analyzer = ReportAnalyzer()
+    for label, min_lines, max_lines in [('short', 5, 15), ('long', 100, 300)]:
+        name = f'ReportAnalyzer.analyze_report[{label}]'
+        if not wanted(name):
+            continue
+        reports = make_pathology_reports(n_reports, seed=len(label), min_lines=min_lines, max_lines=max_lines)
+        n_bytes = sum(len(r.encode('utf-8')) for r in reports)
+        cases.append((name,
+                      lambda reports=reports: [analyzer.analyze_report(r) for r in reports],
+                      len(reports), n_bytes))
+
+    # Görüntü işleme
+    for width, height in resolutions:
+        names = [f'{step}[{width}x{height}]' for step in ('preprocess_image', 'detect_anomalies', 'extract_features')]
+        if not wanted(*names):
+            continue
+        image = make_bronchoscopy_image(width, height, seed=width)
+        enhanced = preprocess_image(image)
+        steps = [
+            (lambda image=image: preprocess_image(image), image.nbytes),
+            (lambda enhanced=enhanced: detect_anomalies(enhanced), enhanced.nbytes),
+            (lambda enhanced=enhanced: extract_features(enhanced), enhanced.nbytes)
+        ]
+        for name, (fn, n_bytes) in zip(names, steps):
+            if wanted(name):
+                cases.append((name, fn, 1, n_bytes))
+
+    # Benzerlik arşivinde en yakın 5 görüntü (100 bin kayıt, sentetik vektörler)
+    if wanted('ImageSimilarityIndex.query[100000]'):
+        index = _make_image_index(100_000, Path(workdir) / 'image_index')
+        query = extract_features(preprocess_image(make_bronchoscopy_image(640, 480)))[1]
+        cases.append(('ImageSimilarityIndex.query[100000]',
+                      lambda: index.query(query, k=5),
+                      len(index), 0))
+
+    # Soğuk başlangıç: her modül yeni bir yorumlayıcıda içe aktarılır
+    for module in COLD_IMPORT_MODULES:
+        name = f'cold_import[{module}]'
+        if wanted(name):
+            cases.append((name,
+                          lambda module=module: _cold_import(module),
+                          1, 0))
+
+    return cases
+
+def _make_image_index(n_images, root, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((n_images, FEATURE_DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    hashes = rng.integers(0, 2 ** 63, n_images, dtype=np.uint64)
+    index = ImageSimilarityIndex(root)
+    index.add_many({'key': str(i), 'phash': int(hashes[i]), 'vector': vectors[i], 'name': f'{i}.jpg'}
+                   for i in range(n_images))
+    return index
+
+def _cold_import(module):
+    subprocess.run([sys.executable, '-c', f'import {module}'], cwd=REPO_ROOT, check=True)
+
+def _csv_records(csv_bytes, limit):
+    return pd.read_csv(io.BytesIO(csv_bytes), nrows=limit).drop(columns=['hasta_id', 'rapor_tarihi']).to_dict('records')
+
+def run(cases, repeat):
+    results = {}
+    for name, fn, n_items, n_bytes in cases:
+        seconds, peak = measure(fn, repeat)
+        results[name] = {
+            'seconds': seconds,
+            'items_per_sec': n_items / seconds if seconds else None,
+            'mb_per_sec': n_bytes / seconds / 1e6 if seconds and n_bytes else None,
+            'peak_memory_bytes': peak
+        }
+        print(f"{name:45s} {seconds * 1000:10.2f} ms  {peak / 1e6:9.1f} MB", flush=True)
+    return results
+
+def compare(results, baseline, time_threshold, memory_threshold):
+    """Taban çizgisine göre gerileyen kıyaslamaların listesini döndürür"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        time_ratio = current['seconds'] / previous['seconds'] if previous['seconds'] else 1.0
+        if time_ratio > 1 + time_threshold:
+            regressions.append(f"{name}: süre {time_ratio:.2f}x ({previous['seconds']:.4f}s -> {current['seconds']:.4f}s)")
+
+        if previous['peak_memory_bytes']:
+            memory_ratio = current['peak_memory_bytes'] / previous['peak_memory_bytes']
+            if memory_ratio > 1 + memory_threshold:
+                regressions.append(f"{name}: bellek {memory_ratio:.2f}x")
+
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OnkoNixAI performans kıyaslamaları")
+    parser.add_argument('--output', type=Path, help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Karşılaştırılacak taban çizgisi")
+    parser.add_argument('--save-baseline', action='store_true', help="Sonuçları taban çizgisi olarak kaydet")
+    parser.add_argument('--require-baseline', action='store_true',
+                        help="Taban çizgisi dosyası yoksa 2 çıkış koduyla bitir")
+    parser.add_argument('--time-threshold', type=float, default=0.20, help="İzin verilen göreli süre artışı")
+    parser.add_argument('--memory-threshold', type=float, default=0.20, help="İzin verilen göreli bellek artışı")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROW_COUNTS, help="CSV satır sayıları")
+    parser.add_argument('--reports', type=int, default=500, help="Rapor kıyaslaması için rapor sayısı")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--filter', help="Yalnızca adı bu metni içeren kıyaslamaları çalıştır")
+    args = parser.parse_args(argv)
+
+    # Kıyaslama verisinin diske yazılan kısmı iş bitince silinir
+    with tempfile.TemporaryDirectory(prefix='onkonix_bench_') as workdir:
+        cases = build_cases(args.rows, DEFAULT_RESOLUTIONS, args.reports, workdir, name_filter=args.filter)
+        results = run(cases, args.repeat)
+    document = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, indent=2))
+        print(f"Taban çizgisi kaydedildi: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nTaban çizgisi bulunamadı ({args.baseline}); gerileme karşılaştırması yapılmadı.")
+        print("Oluşturmak için: python -m benchmarks.run_benchmarks --save-baseline")
+        return 2 if args.require_baseline else 0
+
+    baseline = json.loads(args.baseline.read_text())['results']
+    missing = sorted(set(results) - set(baseline))
+    if missing:
+        print(f"\nTaban çizgisinde olmayan {len(missing)} kıyaslama karşılaştırılmadı: {', '.join(missing)}")
+
+    regressions = compare(results, baseline, args.time_threshold, args.memory_threshold)
+    if regressions:
+        print("\nGerilemeler:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nTaban çizgisine göre gerileme yok.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,50 @@
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.report_analyzer import ReportAnalyzer
-from io import StringIO
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from utils.instrumentation import instrument
+from utils.batch_ingest import (
+    BatchAggregates, MissingColumnsError, run_blood_csv_job, load_blood_csv_job, load_blood_csv_details,
+    JOB_SOURCE_FILE
+)
+from utils.patient_store import file_fingerprint, get_store
+from utils.sketches import ParameterSketches, RISK_SKETCH_NAME
+from utils.jobs import get_job_manager, FINISHED_STATES, QUEUED, CANCELLED, FAILED, STATUS_LABELS, PROGRESS_INTERVAL
+from utils.longitudinal import LongitudinalEngine
+from utils.charts import line_figure, histogram_figure, frame_fingerprint, get_figure_cache
+from utils.export import EXPORT_FORMATS, available_formats, export_frame, top_n_page, page_count
 
+TREND_PATIENT_LIMIT = 10
+TREND_OPTION_LIMIT = 500
+DETAIL_OPTION_LIMIT = 200
+RESULT_PAGE_SIZES = [25, 50, 100]
+# Kutu grafiği: bıyıklar p1/p99, kutu p25-p75
+BOX_QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+def get_longitudinal_engine():
+    """Oturum boyunca yüklenen partileri biriktiren boylamsal motoru döndürür"""
+    if 'longitudinal_engine' not in st.session_state:
+        st.session_state.longitudinal_engine = LongitudinalEngine()
+        st.session_state.longitudinal_batches = set()
+    return st.session_state.longitudinal_engine
+
+def update_longitudinal_engine(engine, results_df, fingerprint):
+    """
+    Partiyi boylamsal motora ekler. Motorda serisi olmayan hastaların
+    geçmişi önce hasta veritabanından yüklenir; böylece oturum ya da
+    sunucu yeniden başlasa da kaydedilmiş paneller trende dahil olur.
+    Bu partinin kendi kaydedilmiş satırları iki kez sayılmaz.
+    """
+    new_ids = engine.untracked(results_df['hasta_id'].unique())
+    if new_ids:
+        history = get_store().risk_history(new_ids, exclude_fingerprint=fingerprint)
+        if len(history):
+            engine.update(history)
+    engine.update(results_df)
+
+@instrument('page.batch_analysis')
 def analyze_batch_reports():
     st.markdown("<h2 class='section-header'>Toplu Rapor Analizi</h2>", unsafe_allow_html=True)
 
@@ -24,119 +65,336 @@ def analyze_batch_reports():
             <li>nse: NSE değeri</li>
             <li>ldh: LDH değeri</li>
             <li>alp: ALP değeri</li>
+            <li>rapor_metni (isteğe bağlı): Serbest metin patoloji/radyoloji raporu</li>
+            <li>cinsiyet (isteğe bağlı): Erkek/Kadın ya da E/K; referans aralıklarını kişiselleştirir</li>
+            <li>yas (isteğe bağlı): Rapor tarihindeki yaş</li>
         </ul>
     </div>
     """, unsafe_allow_html=True)
 
     uploaded_file = st.file_uploader("CSV Dosyası Yükleyin", type=['csv'])
+    save_to_store = st.checkbox("Sonuçları hasta veritabanına kaydet", value=False)
 
+    manager = get_job_manager()
+
+    # Her yükleme bir kez arka plan işi olarak gönderilir; iş kimliği adres
+    # çubuğunda tutulur, böylece yeniden bağlanınca da iş takip edilebilir
     if uploaded_file is not None:
-        try:
-            # CSV dosyasını oku
-            df = pd.read_csv(StringIO(uploaded_file.getvalue().decode('utf-8')))
-
-            if all(col in df.columns for col in ['hasta_id', 'rapor_tarihi']):
-                st.success("Dosya başarıyla yüklendi!")
-
-                # İlerleme çubuğu
-                progress_bar = st.progress(0)
-
-                # Her hasta için risk skorunu hesapla
-                risk_scores = []
-                analyzed_data = []
-
-                for i, row in df.iterrows():
-                    # Test değerlerini analiz et
-                    test_values = {
-                        'WBC': row.get('wbc', None),
-                        'RBC': row.get('rbc', None),
-                        'HGB': row.get('hgb', None),
-                        'PLT': row.get('plt', None),
-                        'CEA': row.get('cea', None),
-                        'CYFRA': row.get('cyfra', None),
-                        'NSE': row.get('nse', None),
-                        'LDH': row.get('ldh', None),
-                        'ALP': row.get('alp', None)
-                    }
-
-                    # Null olmayan değerleri filtrele
-                    test_values = {k: v for k, v in test_values.items() if v is not None}
-
-                    if test_values:
-                        analyzer = ReportAnalyzer()
-                        analysis = analyzer.analyze_blood_values(test_values)
-
-                        analyzed_data.append({
-                            'hasta_id': row['hasta_id'],
-                            'rapor_tarihi': row['rapor_tarihi'],
-                            'risk_skoru': analysis['risk_score'],
-                            'anormal_parametreler': sum(1 for result in analysis['test_results'].values() if result['status'] != 'Normal')
-                        })
-
-                    # İlerleme çubuğunu güncelle
-                    progress_bar.progress((i + 1) / len(df))
-
-                # Analiz sonuçlarını DataFrame'e çevir
-                results_df = pd.DataFrame(analyzed_data)
-
-                # Özet istatistikler
-                st.markdown("### Analiz Sonuçları")
-
-                col1, col2, col3 = st.columns(3)
-
-                with col1:
-                    st.markdown(f"""
-                    <div class='metric-card'>
-                        <h3>Toplam Hasta</h3>
-                        <h2>{len(results_df)}</h2>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                with col2:
-                    avg_risk = results_df['risk_skoru'].mean()
-                    st.markdown(f"""
-                    <div class='metric-card'>
-                        <h3>Ortalama Risk Skoru</h3>
-                        <h2>{avg_risk:.1f}</h2>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                with col3:
-                    high_risk = len(results_df[results_df['risk_skoru'] > 7])
-                    st.markdown(f"""
-                    <div class='metric-card'>
-                        <h3>Yüksek Riskli Hasta</h3>
-                        <h2>{high_risk}</h2>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                # Grafikler
-                st.markdown("### Trend Analizi")
-
-                # Risk skoru trendi
-                fig1 = px.line(results_df, 
-                             x='rapor_tarihi', 
-                             y='risk_skoru',
-                             title='Risk Skoru Trendi')
-                fig1.update_traces(line_color='#3498db')
-                st.plotly_chart(fig1, use_container_width=True)
-
-                # Anormal parametre dağılımı
-                fig2 = px.histogram(results_df,
-                                  x='anormal_parametreler',
-                                  title='Anormal Parametre Dağılımı',
-                                  labels={'anormal_parametreler': 'Anormal Parametre Sayısı'})
-                st.plotly_chart(fig2, use_container_width=True)
-
-                # Detaylı tablo
-                st.markdown("### Detaylı Rapor Listesi")
-                st.dataframe(results_df.sort_values('risk_skoru', ascending=False), use_container_width=True)
-
-            else:
-                st.error("CSV dosyası gerekli sütunları içermiyor. Lütfen format bilgisini kontrol edin.")
-
-        except Exception as e:
-            st.error(f"Dosya işlenirken bir hata oluştu: {str(e)}")
+        submitted = st.session_state.setdefault('batch_jobs', {})
+        upload_key = (uploaded_file.file_id, save_to_store)
+        if upload_key not in submitted:
+            submitted[upload_key] = submit_batch_job(manager, uploaded_file, save_to_store)
+            st.query_params['job'] = submitted[upload_key]
+
+    job_id = st.query_params.get('job')
+    if not job_id:
+        return
+
+    job = manager.status(job_id)
+    if job is None:
+        st.warning("Analiz işi bulunamadı.")
+        del st.query_params['job']
+        return
+
+    st.markdown("### Analiz Sonuçları")
+    if job['status'] not in FINISHED_STATES:
+        show_job_progress(job_id)
+        return
+
+    if st.button("Yeni Analiz"):
+        del st.query_params['job']
+        st.rerun()
+
+    if job['status'] == CANCELLED:
+        st.info("Analiz iptal edildi.")
+    elif job['status'] == FAILED:
+        if job['error_type'] == MissingColumnsError.__name__:
+            st.error(f"{job['error']}. Lütfen format bilgisini kontrol edin.")
+        else:
+            st.error(f"Dosya işlenirken bir hata oluştu: {job['error']}")
+    else:
+        show_job_results(manager, job)
+
+def submit_batch_job(manager, uploaded_file, save_to_store):
+    """Yüklenen dosyayı iş klasörüne kopyalayıp arka planda analiz edilmek üzere kuyruğa ekler"""
+    uploaded_file.seek(0)
+    return manager.submit(
+        'blood_csv',
+        run_blood_csv_job,
+        files={JOB_SOURCE_FILE: uploaded_file},
+        save_to_store=save_to_store,
+        fingerprint=file_fingerprint(uploaded_file),
+        file_name=uploaded_file.name,
+        name=uploaded_file.name
+    )
+
+@st.fragment(run_every=PROGRESS_INTERVAL)
+def show_job_progress(job_id):
+    """Çalışan işin durumunu yoklar; iş bitince sayfayı yeniden çalıştırır"""
+    manager = get_job_manager()
+    job = manager.status(job_id)
+    if job is None or job['status'] in FINISHED_STATES:
+        st.rerun()
+
+    st.progress(job['progress'], text=f"{STATUS_LABELS[job['status']]} — {job['message'] or job['name']}")
+    if job['status'] == QUEUED:
+        st.caption(f"Aynı anda en fazla {manager.max_workers} analiz çalışır; iş sırası gelince başlayacak.")
+    if job['detail']:
+        render_metric_cards(st.empty(), BatchAggregates.from_dict(job['detail']))
+
+    if st.button("İptal Et"):
+        manager.cancel(job_id)
+
+def show_job_results(manager, job):
+    """Tamamlanmış işin sonuçlarını diskten yükleyip gösterir"""
+    result = job['result']
+    results_df, aggregates = load_blood_csv_job(manager.job_dir(job['id']), result)
+    fingerprint = result['fingerprint']
+
+    render_metric_cards(st.empty(), aggregates)
+    st.success("Dosya başarıyla yüklendi!")
+    if result['already_saved']:
+        st.info("Bu dosya daha önce veritabanına kaydedilmiş.")
+
+    # Boylamsal motor yalnızca bu partideki hastaları yeniden hesaplar
+    engine = get_longitudinal_engine()
+    if fingerprint not in st.session_state.longitudinal_batches:
+        update_longitudinal_engine(engine, results_df, fingerprint)
+        st.session_state.longitudinal_batches.add(fingerprint)
+
+    # Grafikler
+    render_charts(engine, results_df, aggregates, fingerprint)
+    show_distributions(aggregates.sketches, fingerprint)
+
+    # Detaylı tablo
+    show_results_table(results_df)
+    show_export_buttons(manager.job_dir(job['id']), results_df)
+
+    show_row_details(manager.job_dir(job['id']), results_df)
+
+    # Rapor metninden çıkarılan evre ile kan değeri riskinin birlikte özeti
+    if 'evre' in results_df.columns:
+        st.markdown("### Evreye Göre Risk")
+        st.dataframe(
+            results_df.groupby('evre')
+            .agg(rapor_sayisi=('risk_skoru', 'size'),
+                 ortalama_risk=('risk_skoru', 'mean'),
+                 ortalama_boyut_mm=('en_buyuk_olcum_mm', 'mean'))
+            .reset_index(),
+            use_container_width=True,
+            hide_index=True
+        )
+
+def show_results_table(results_df):
+    """
+    Sonuçları risk skoruna göre sayfa sayfa gösterir. Tarayıcıya yalnızca
+    geçerli sayfa gönderilir; tablonun tamamı sıralanmaz.
+    """
+    st.markdown("### Detaylı Rapor Listesi")
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Sayfa başına satır", RESULT_PAGE_SIZES, index=1)
+    total_pages = page_count(len(results_df), page_size)
+    with col2:
+        page = st.number_input(f"Sayfa (toplam {total_pages})", min_value=1, max_value=total_pages, value=1)
+
+    st.dataframe(top_n_page(results_df, 'risk_skoru', page - 1, page_size), use_container_width=True)
+
+def show_export_buttons(job_dir, results_df):
+    """
+    Sonuç tablosu için indirme düğmeleri. Dosya ilk tıklamada iş klasörüne
+    parça parça yazılır, sonraki indirmelerde yeniden kullanılır.
+    """
+    formats = available_formats()
+    columns = st.columns(len(formats))
+    for column, fmt in zip(columns, formats):
+        spec = EXPORT_FORMATS[fmt]
+        path = os.path.join(job_dir, 'export' + spec['extension'])
+
+        def build(fmt=fmt, path=path):
+            if not os.path.exists(path):
+                tmp_path = path + '.tmp'
+                export_frame(results_df, fmt, tmp_path)
+                os.replace(tmp_path, path)
+            with open(path, 'rb') as f:
+                return f.read()
+
+        with column:
+            st.download_button(f"{spec['label']} indir", build, file_name='toplu_analiz' + spec['extension'],
+                               mime=spec['mime'])
+
+def show_row_details(job_dir, results_df):
+    """Seçilen raporun parametre bazlı sonuçlarını kompakt sonuçlardan üretip gösterir"""
+    details = load_blood_csv_details(job_dir)
+    if len(details) != len(results_df):
+        return
+
+    st.markdown("### Rapor Detayı")
+    top = results_df['risk_skoru'].nlargest(DETAIL_OPTION_LIMIT)
+    row = st.selectbox(
+        "En yüksek riskli raporlardan birini seçin",
+        top.index.tolist(),
+        format_func=lambda i: f"{results_df.at[i, 'hasta_id']} — {results_df.at[i, 'rapor_tarihi']} — "
+                              f"risk {results_df.at[i, 'risk_skoru']:.1f}"
+    )
+    if row is None:
+        return
+
+    analysis = details.to_dict(row)
+    st.dataframe(pd.DataFrame([
+        {
+            'parametre': param,
+            'değer': result['value'],
+            'durum': result['status'],
+            'referans_aralığı': result['reference_range'],
+            'risk': result['risk_level']
+        }
+        for param, result in analysis['test_results'].items()
+    ]), use_container_width=True, hide_index=True)
+
+@instrument('batch.charts')
+def render_charts(engine, results_df, aggregates, fingerprint):
+    """
+    Trend ve dağılım grafiklerini çizer. Figürler veri parmak izine göre
+    önbelleğe alınır; büyük seriler inceltilir, histogramlar sunucuda
+    kovalanır.
+    """
+    figures = get_figure_cache()
+    st.markdown("### Trend Analizi")
+
+    # Bu partideki hastaların en son durumları (eğime göre en hızlı kötüleşenler önce)
+    latest = engine.latest(results_df['hasta_id'].unique())
+    latest = latest.sort_values(['egim', 'risk_skoru'], ascending=False, na_position='last')
+
+    default_ids = latest['hasta_id'].head(TREND_PATIENT_LIMIT).tolist()
+    selected_ids = st.multiselect(
+        "Trendi gösterilecek hastalar",
+        latest['hasta_id'].head(TREND_OPTION_LIMIT).tolist(),
+        default=default_ids,
+        max_selections=TREND_PATIENT_LIMIT
+    )
+
+    # Hasta bazında sıralı risk skoru trendi
+    if selected_ids:
+        series = engine.patient_series(selected_ids)[['hasta_id', 'rapor_tarihi', 'risk_skoru']]
+        fig1 = figures.get_or_build(
+            frame_fingerprint(series, 'trend'),
+            lambda: line_figure(series,
+                                x='rapor_tarihi',
+                                y='risk_skoru',
+                                color='hasta_id',
+                                markers=True,
+                                title='Hasta Bazında Risk Skoru Trendi',
+                                labels={'rapor_tarihi': 'Rapor Tarihi', 'risk_skoru': 'Risk Skoru',
+                                        'hasta_id': 'Hasta'})
+        )
+        st.plotly_chart(fig1, use_container_width=True)
+
+    st.dataframe(latest.rename(columns={
+        'delta': 'son_degisim',
+        'egim': 'gunluk_egim',
+        'en_yuksek': 'en_yuksek_risk'
+    }), use_container_width=True)
+
+    # Risk skoru dağılımı (ham değerler yerine kova sayıları gönderilir)
+    fig_risk = figures.get_or_build(
+        (fingerprint, 'risk_histogram'),
+        lambda: histogram_figure(results_df['risk_skoru'],
+                                 bins=20,
+                                 value_range=(0, 10),
+                                 title='Risk Skoru Dağılımı',
+                                 x_label='Risk Skoru',
+                                 y_label='Rapor Sayısı',
+                                 bar_color='#3498db')
+    )
+    st.plotly_chart(fig_risk, use_container_width=True)
+
+    # Anormal parametre dağılımı (artımlı histogramdan)
+    fig2 = px.bar(aggregates.histogram_frame(),
+                  x='anormal_parametreler',
+                  y='hasta_sayisi',
+                  title='Anormal Parametre Dağılımı',
+                  labels={'anormal_parametreler': 'Anormal Parametre Sayısı',
+                          'hasta_sayisi': 'Hasta Sayısı'})
+    st.plotly_chart(fig2, use_container_width=True)
+
+def merged_store_sketches(params):
+    """Veritabanına kaydedilmiş tüm partilerin kantil özetlerini birleştirir"""
+    merged = ParameterSketches(params)
+    for data in get_store().batch_sketches():
+        merged.merge(ParameterSketches.from_dict(data))
+    return merged
+
+def box_figure(sketches):
+    """Her parametre için kantil özetinden kutu grafiği (ayrı y eksenleriyle) çizer"""
+    names = list(sketches.sketches)
+    fig = make_subplots(rows=1, cols=len(names))
+    for i, name in enumerate(names, start=1):
+        low, q1, median, q3, high = sketches[name].quantiles(BOX_QUANTILES)
+        fig.add_trace(go.Box(x=[name], q1=[q1], median=[median], q3=[q3], lowerfence=[low], upperfence=[high],
+                             name=name, marker_color='#3498db', showlegend=False), row=1, col=i)
+    fig.update_layout(title='Parametre Dağılımları (p1 / p25 / medyan / p75 / p99)',
+                      margin=dict(l=20, r=20, t=60, b=20))
+    return fig
+
+@instrument('batch.distributions')
+def show_distributions(sketches, fingerprint):
+    """
+    Parametre ve risk skoru yüzdeliklerini kantil özetlerinden gösterir.
+    Ham değerler sıralanmaz; kayıtlı partilerle birleştirilmiş kohort
+    dağılımı da seçilebilir.
+    """
+    st.markdown("### Dağılım ve Yüzdelikler")
+    scope = st.radio("Kapsam", ["Bu parti", "Tüm kayıtlı partiler"], horizontal=True)
+    if scope == "Tüm kayıtlı partiler":
+        sketches = merged_store_sketches(sketches.params)
+        if sketches[RISK_SKETCH_NAME].n == 0:
+            st.info("Veritabanına kaydedilmiş parti yok.")
+            return
+
+    risk = sketches[RISK_SKETCH_NAME]
+    col1, col2, col3 = st.columns(3)
+    for column, label, q in [(col1, 'Medyan Risk', 0.5), (col2, 'Risk p90', 0.9), (col3, 'Risk p99', 0.99)]:
+        with column:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <h3>{label}</h3>
+                <h2>{risk.quantile(q):.2f}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+    fig = get_figure_cache().get_or_build((fingerprint, scope, risk.n, 'box'), lambda: box_figure(sketches))
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(sketches.percentile_frame(), use_container_width=True, hide_index=True)
+
+def render_metric_cards(container, aggregates):
+    """Özet metrik kartlarını verilen alana çizer"""
+    with container.container():
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <h3>Toplam Hasta</h3>
+                <h2>{aggregates.total_patients}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col2:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <h3>Ortalama Risk Skoru</h3>
+                <h2>{aggregates.mean_risk:.1f}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col3:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <h3>Yüksek Riskli Hasta</h3>
+                <h2>{aggregates.high_risk}</h2>
+            </div>
+            """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     analyze_batch_reports()
\ No newline at end of file
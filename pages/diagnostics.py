@@ -0,0 +1,90 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from utils import instrumentation
+from utils.result_cache import get_image_cache, get_report_cache
+from utils.charts import get_figure_cache
+from utils.page_registry import startup_times
+
+def _apply_metrics_toggle():
+    instrumentation.set_enabled(st.session_state.metrics_enabled)
+
+def show_metrics_toggle():
+    """
+    Ölçüm açma/kapama, süreç genelinde bir yönetici ayarıdır. Kutu her
+    çalışmada sunucudaki güncel durumu gösterir ve ayar yalnızca kutu
+    değiştirildiğinde uygulanır; başka bir oturumun eski değeri ayarı
+    geri almaz.
+    """
+    st.session_state.metrics_enabled = instrumentation.is_enabled()
+    st.checkbox("Ölçüm etkin (sunucu geneli yönetici ayarı)", key='metrics_enabled', on_change=_apply_metrics_toggle)
+    st.caption("Bu ayar tüm kullanıcıların oturumlarını etkiler. Başlangıç değeri ONKONIX_METRICS "
+               "ortam değişkeninden gelir.")
+
+def show_diagnostics():
+    st.markdown("<h2 class='section-header'>Sistem Tanılama</h2>", unsafe_allow_html=True)
+
+    show_metrics_toggle()
+
+    stages = instrumentation.snapshot()
+    if not stages:
+        st.info("Henüz ölçüm kaydı yok. Diğer sayfaları kullandıkça aşama süreleri burada görünecektir.")
+    else:
+        df = pd.DataFrame([
+            {
+                'aşama': name,
+                'çağrı': metrics['count'],
+                'hata': metrics['errors'],
+                'ortalama_ms': metrics['mean_seconds'] * 1000,
+                'p50_ms': metrics['p50_seconds'] * 1000,
+                'p95_ms': metrics['p95_seconds'] * 1000,
+                'en_yüksek_ms': metrics['max_seconds'] * 1000,
+                'toplam_s': metrics['total_seconds'],
+                'işlenen_MB': metrics['bytes'] / 1e6
+            }
+            for name, metrics in stages.items()
+        ]).sort_values('toplam_s', ascending=False)
+
+        # En çok zaman harcanan aşamalar
+        fig = px.bar(df.head(15), x='toplam_s', y='aşama', orientation='h',
+                     title='Toplam Süreye Göre Aşamalar',
+                     labels={'toplam_s': 'Toplam Süre (s)', 'aşama': ''})
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+    st.markdown("### Başlangıç Süreleri")
+    times = startup_times()
+    if 'app' in times['startup']:
+        st.text(f"Uygulama betiği ilk çalışma: {times['startup']['app'] * 1000:.0f} ms")
+    if times['imports']:
+        st.dataframe(pd.DataFrame({
+            'modül': list(times['imports']),
+            'soğuk_içe_aktarma_ms': [seconds * 1000 for seconds in times['imports'].values()]
+        }), use_container_width=True, hide_index=True)
+
+    st.markdown("### Görüntü Önbelleği")
+    st.json(get_image_cache().stats())
+
+    st.markdown("### Rapor Önbelleği")
+    st.json(get_report_cache().stats())
+
+    st.markdown("### Figür Önbelleği")
+    st.json(get_figure_cache().stats())
+
+    st.markdown("### Dışa Aktarma")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("JSON indir", instrumentation.export_json(),
+                           file_name='onkonix_metrics.json', mime='application/json')
+    with col2:
+        st.download_button("Prometheus indir", instrumentation.export_prometheus(),
+                           file_name='onkonix_metrics.prom', mime='text/plain')
+    with col3:
+        if st.button("Ölçümleri sıfırla (sunucu geneli)"):
+            instrumentation.reset()
+            st.rerun()
+
+if __name__ == "__main__":
+    show_diagnostics()
@@ -1,6 +1,10 @@
 import streamlit as st
-from utils.data_analysis import calculate_treatment_dose
+import pandas as pd
+import plotly.graph_objects as go
+from utils.data_analysis import get_dose_grid
+from utils.instrumentation import instrument
 
+@instrument('page.dose_calculator')
 def calculate_dose():
     """
     Tedavi dozunu hesaplar ve gösterir
@@ -15,9 +19,9 @@ def calculate_dose():
     st.markdown("#### Kan Değerleri")
     wbc = st.number_input("WBC", min_value=0.0, max_value=20.0, value=7.0)
     
-    # Doz hesaplama
+    # Doz hesaplama (önceden hesaplanmış tablodan)
     blood_values = {'WBC': wbc}
-    dose = calculate_treatment_dose(weight, age, blood_values)
+    dose = get_dose_grid().lookup(weight, age, blood_values)
     
     st.markdown(f"""
     <div class='info-box'>
@@ -27,6 +31,23 @@ def calculate_dose():
     </div>
     """, unsafe_allow_html=True)
 
+    with st.expander("Doz Yüzeyi"):
+        show_dose_surface(blood_values)
+
+def show_dose_surface(blood_values=None, pathology_results=None):
+    """
+    Kilo ve yaşa göre doz yüzeyini önceden hesaplanmış tablodan çizer
+    """
+    surface = get_dose_grid().surface(blood_values, pathology_results)
+
+    fig = go.Figure(go.Surface(z=surface.to_numpy(), x=surface.columns, y=surface.index, colorscale='Blues'))
+    fig.update_layout(
+        title='Doz Yüzeyi (mg)',
+        scene=dict(xaxis_title='Kilo (kg)', yaxis_title='Yaş', zaxis_title='Doz (mg)'),
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
 def show_dose_history():
     """
     Doz geçmişini gösterir
@@ -1,7 +1,20 @@
+import os
+import tempfile
+import time
 import streamlit as st
 import cv2
 import numpy as np
-from utils.image_processing import preprocess_image, detect_anomalies
+import pandas as pd
+from utils.instrumentation import instrument
+from utils.image_processing import preprocess_image, detect_anomalies, DEFAULT_PARAMS
+from utils.image_index import get_image_index, content_key, extract_features, make_thumbnail, DEFAULT_TOP_K
+from utils.result_cache import get_image_cache
+from utils.video_stream import VideoStreamAnalyzer
+from utils.image_batch import (
+    analyze_image_batch, count_image_sources, decode_image, allowed_image_root, resolve_image_directory,
+    DirectoryNotAllowedError, ArchiveLimitError
+)
+from utils.parallel import default_workers
 
 def analyze_bronchoscopy_image(image):
     """
@@ -19,6 +32,28 @@ def analyze_bronchoscopy_image(image):
         'confidence': 0.87  # Demo değer
     }
 
+def analyze_uploaded_image(data):
+    """
+    Yüklenen görüntü baytlarını çözer ve analiz eder. Sonuçlar bayt
+    içeriği ve işlem parametreleriyle önbelleğe alınır; aynı görüntü
+    tekrar açıldığında çözme ve işleme adımları atlanır.
+    """
+    def compute():
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Görüntü okunamadı")
+        return analyze_bronchoscopy_image(image)
+
+    return get_image_cache().get_or_compute(data, DEFAULT_PARAMS, compute)
+
+def show_cache_stats():
+    """Görüntü önbelleği isabet istatistiklerini gösterir"""
+    stats = get_image_cache().stats()
+    st.caption(
+        f"Önbellek: {stats['hits']} isabet, {stats['misses']} ıska "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} kayıt"
+    )
+
 def show_analysis_results(results):
     """
     Analiz sonuçlarını gösterir
@@ -39,6 +74,62 @@ def show_analysis_results(results):
         </div>
         """, unsafe_allow_html=True)
 
+def archive_uploaded_image(data, name, results, archive=False):
+    """
+    Yüklenen görüntüyü benzerlik arşivinde arar; archive True ise ve
+    görüntü yeniyse arşive de ekler. Aynı dosya daha önce arşivlendiyse
+    saklanan vektör kullanılır, özellikler yeniden hesaplanmaz.
+    (anahtar, vektör, kopya) döndürür; kopya, arşivde aynı ya da çok
+    benzer görüntü varsa (kayıt, bit farkı) çiftidir.
+    """
+    index = get_image_index()
+    key = content_key(data)
+    entry = index.lookup(key)
+    if entry is not None:
+        return key, index.vector(entry), (entry, 0)
+
+    phash, vector = extract_features(results['processed_image'])
+    duplicate = index.find_duplicate(key, phash)
+    if archive:
+        index.add(key, phash, vector, name, results['anomaly_score'], make_thumbnail(decode_image(data)))
+    return key, vector, duplicate
+
+def show_similar_images(key, vector, duplicate):
+    """Arşivdeki en benzer görüntüleri küçük resimleriyle gösterir"""
+    st.markdown("### Benzer Arşiv Görüntüleri")
+
+    if duplicate is not None:
+        match, bits = duplicate
+        if match['anahtar'] == key:
+            st.info(f"Bu görüntü arşivde zaten kayıtlı ({match['eklenme']}); yeniden eklenmedi.")
+        else:
+            st.warning(f"Arşivde neredeyse aynı bir görüntü var: {match['goruntu']} "
+                       f"({match['eklenme']}, {bits} bit fark).")
+
+    index = get_image_index()
+    k = st.slider("Gösterilecek benzer görüntü sayısı", min_value=1, max_value=10, value=DEFAULT_TOP_K)
+    start = time.perf_counter()
+    similar = index.query(vector, k, exclude=key)
+    elapsed = time.perf_counter() - start
+
+    if not similar:
+        st.caption("Arşivde karşılaştırılacak başka görüntü yok.")
+        return
+
+    columns = st.columns(min(len(similar), 5))
+    for i, match in enumerate(similar):
+        with columns[i % len(columns)]:
+            thumbnail = index.thumbnail(match)
+            if thumbnail is not None:
+                st.image(thumbnail)
+            score = match['anormallik_skoru']
+            st.caption(
+                f"{match['goruntu']}  \n"
+                f"Benzerlik: {match['benzerlik']:.1%}  \n"
+                f"Anormallik: {'-' if score is None else f'{score:.2%}'}"
+            )
+    st.caption(f"{len(index):,} arşiv görüntüsü içinde {elapsed * 1000:.0f} ms'de arandı")
+
 def show_historical_analysis():
     """
     Geçmiş analizleri gösterir
@@ -52,3 +143,181 @@ def show_historical_analysis():
     
     st.markdown("### Geçmiş Analizler")
     st.dataframe(history)
+
+def show_video_analysis():
+    """
+    Bronkoskopi videosunu kare kare analiz eder ve canlı anormallik
+    skoru zaman çizelgesi gösterir
+    """
+    uploaded_file = st.file_uploader("Bronkoskopi videosu yükleyin", type=['mp4', 'avi', 'mov', 'mkv'])
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        frame_skip = st.number_input("Atlanacak kare sayısı", min_value=0, max_value=30, value=0)
+    with col2:
+        latency_budget_ms = st.number_input("Gecikme bütçesi (ms)", min_value=10, max_value=2000, value=200)
+    with col3:
+        realtime = st.checkbox("Gerçek zamanlı oynat", value=True)
+
+    if uploaded_file is None or not st.button("Videoyu Analiz Et"):
+        return
+
+    # cv2.VideoCapture bellekten okuyamadığı için video geçici dosyaya yazılır
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp.write(uploaded_file.getbuffer())
+        video_path = tmp.name
+
+    analyzer = VideoStreamAnalyzer(
+        frame_skip=frame_skip,
+        latency_budget_ms=latency_budget_ms,
+        realtime=realtime
+    )
+
+    chart_placeholder = st.empty()
+    status_placeholder = st.empty()
+
+    try:
+        for i, result in enumerate(analyzer.run(video_path), start=1):
+            # Grafiği her karede değil, belirli aralıklarla güncelle
+            if i % 10 == 0:
+                timeline = analyzer.timeline_frame()
+                chart_placeholder.line_chart(timeline, x='time_sec', y='anomaly_score')
+                status_placeholder.text(
+                    f"İşlenen: {analyzer.stats['processed']} — "
+                    f"Atılan: {analyzer.stats['dropped']} — "
+                    f"Son gecikme: {result['latency_ms']:.0f} ms"
+                )
+
+        summary = analyzer.summary()
+        if summary['processed'] == 0:
+            st.warning("Videodan analiz edilebilen kare okunamadı.")
+            return
+
+        # Grafik son kareleri, özet ise videonun tamamını gösterir
+        timeline = analyzer.timeline_frame()
+
+        chart_placeholder.line_chart(timeline, x='time_sec', y='anomaly_score')
+        status_placeholder.text(
+            f"İşlenen: {analyzer.stats['processed']} — Atılan: {analyzer.stats['dropped']}"
+        )
+        st.markdown(f"""
+        <div class='info-box'>
+            <h4>Video Analiz Sonuçları</h4>
+            <p>Ortalama Anormallik Skoru: {summary['mean_score']:.2%}</p>
+            <p>En Yüksek Anormallik Skoru: {summary['max_score']:.2%}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    except Exception as e:
+        st.error(f"Video işlenirken bir hata oluştu: {str(e)}")
+
+    finally:
+        os.remove(video_path)
+
+def show_bulk_analysis():
+    """
+    ZIP arşivindeki ya da sunucudaki bir klasördeki görüntüleri süreç
+    havuzunda toplu olarak analiz eder ve sıralanabilir bir skor tablosu
+    gösterir
+    """
+    uploaded_file = st.file_uploader("Görüntü arşivi yükleyin (ZIP)", type=['zip'])
+    # Sunucu klasörleri yalnızca yapılandırılmış kök klasörün altından seçilebilir
+    image_root = allowed_image_root()
+    directory = ''
+    if image_root is not None:
+        directory = st.text_input(f"veya sunucudaki görüntü klasörü ({image_root} altında)")
+    workers = st.slider("İşçi süreç sayısı", min_value=1, max_value=max(default_workers(), 2), value=default_workers())
+    archive = st.checkbox("Görüntüleri benzerlik arşivine ekle", value=False)
+
+    source = uploaded_file if uploaded_file is not None else directory.strip()
+    if not source or not st.button("Görüntüleri Analiz Et"):
+        return
+
+    if isinstance(source, str):
+        try:
+            source = resolve_image_directory(source, image_root)
+        except DirectoryNotAllowedError as e:
+            st.error(f"{str(e)}.")
+            return
+
+    try:
+        total = count_image_sources(source)
+        if total == 0:
+            st.warning("Görüntü dosyası bulunamadı.")
+            return
+
+        if uploaded_file is not None:
+            uploaded_file.seek(0)
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        rows = []
+        archive_items = []
+        start = time.perf_counter()
+
+        for i, row in enumerate(analyze_image_batch(source, workers=workers, with_features=archive), start=1):
+            item = row.pop('arsiv', None)
+            if item is not None:
+                archive_items.append(item)
+            rows.append(row)
+
+            # Arayüzü her görüntüde değil, belirli aralıklarla güncelle
+            if i % 20 == 0 or i == total:
+                elapsed = time.perf_counter() - start
+                progress_bar.progress(i / total)
+                status_text.text(f"{i}/{total} görüntü işlendi — {i / elapsed:.1f} görüntü/sn")
+
+        results = pd.DataFrame(rows).sort_values('anormallik_skoru', ascending=False, na_position='last')
+        failed = int(results['hata'].notna().sum())
+
+        st.success(f"{total} görüntü {time.perf_counter() - start:.1f} saniyede analiz edildi.")
+        if failed:
+            st.warning(f"{failed} dosya okunamadı.")
+        if archive:
+            added = get_image_index().add_many(archive_items)
+            st.info(f"{added} görüntü arşive eklendi, {len(archive_items) - added} görüntü zaten kayıtlıydı.")
+
+        st.dataframe(results, use_container_width=True, hide_index=True)
+        st.download_button("Sonuçları CSV olarak indir", results.to_csv(index=False).encode('utf-8'),
+                           file_name='goruntu_skorlari.csv', mime='text/csv')
+
+    except ArchiveLimitError as e:
+        st.error(f"{str(e)}.")
+    except Exception as e:
+        st.error(f"Görüntüler işlenirken bir hata oluştu: {str(e)}")
+
+@instrument('page.image_analysis')
+def show_image_analysis():
+    st.markdown("<h2 class='section-header'>Bronkoskopi Görüntü Analizi</h2>", unsafe_allow_html=True)
+
+    mode = st.radio("Analiz Modu", ["Tek Görüntü", "Toplu Görüntü", "Video Akışı"], horizontal=True)
+    if mode == "Video Akışı":
+        show_video_analysis()
+        return
+    if mode == "Toplu Görüntü":
+        show_bulk_analysis()
+        return
+
+    uploaded_file = st.file_uploader("Bronkoskopi görüntüsü yükleyin", type=['jpg', 'png'])
+    archive = st.checkbox("Görüntüyü benzerlik arşivine ekle", value=False)
+    if uploaded_file is not None:
+        try:
+            results = analyze_uploaded_image(uploaded_file.getvalue())
+        except ValueError as e:
+            st.error(f"{str(e)}.")
+            return
+
+        st.image(uploaded_file, caption='Yüklenen Görüntü')
+        show_analysis_results(results)
+        show_cache_stats()
+        # Arşiv hatası (disk, bozuk dizin) analiz sonuçlarının gösterilmesini engellemez
+        try:
+            found = archive_uploaded_image(uploaded_file.getvalue(), uploaded_file.name, results, archive=archive)
+        except Exception as e:
+            st.warning(f"Benzerlik arşivine erişilemedi: {str(e)}")
+        else:
+            show_similar_images(*found)
+
+if __name__ == "__main__":
+    show_image_analysis()
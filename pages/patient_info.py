@@ -2,61 +2,65 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from utils.data_analysis import analyze_blood_values, analyze_pathology_report
+from utils.instrumentation import instrument
+from utils.patient_store import get_store, age_from_birth_date
 
-# Demo veriler için cache
-@st.cache_data
+# Her sekme, hasta kimliği indeksi üzerinden tek sorgu yapar
 def get_patient_data(patient_id):
+    patient = get_store().get_patient(patient_id)
+    if patient is None:
+        return None
     return {
-        'Hasta ID': patient_id,
-        'Ad Soyad': 'Ahmet Yılmaz',
-        'Doğum Tarihi': '1969-05-15',
-        'Tanı': 'Akciğer Kanseri - Evre 2',
-        'Tedavi Başlangıç': '2024-01-15'
+        'Hasta ID': patient['patient_id'],
+        'Ad Soyad': patient['full_name'],
+        'Doğum Tarihi': patient['birth_date'],
+        'Tanı': patient['diagnosis'],
+        'Tedavi Başlangıç': patient['treatment_start']
     }
 
-@st.cache_data
-def get_blood_test_data():
-    return {
-        'WBC': 6.8,    # Beyaz kan hücresi
-        'RBC': 4.9,    # Kırmızı kan hücresi
-        'HGB': 14.8,   # Hemoglobin
-        'PLT': 265,    # Trombosit
-        'CEA': 4.2,    # Tümör belirteci
-        'CYFRA': 2.8,  # CYFRA 21-1
-        'NSE': 15.5,   # Nöron spesifik enolaz
-        'LDH': 250,    # Laktat dehidrogenaz
-        'ALP': 130     # Alkalen fosfataz
-    }
-
-@st.cache_data
-def get_pathology_data():
-    return {
-        'histology': 'Adenokarsinom',
-        'stage': 'Stage II',
-        'differentiation': 'Orta derecede diferansiye'
-    }
-
-@st.cache_data
-def get_treatment_history():
-    return pd.DataFrame({
-        'Tarih': ['2024-01-15', '2024-01-30', '2024-02-15'],
-        'İşlem': ['Kemoterapi', 'Kontrol', 'Kemoterapi'],
-        'Notlar': ['İlk seans', 'Yan etki yok', 'İkinci seans'],
-        'Kan Değerleri': ['Normal', 'WBC düşük', 'Normal'],
-        'Doz Ayarlaması': ['Standart', 'Doz azaltma', 'Standart']
+def get_blood_test_data(patient_id):
+    panel = get_store().latest_lab_panel(patient_id)
+    return panel if panel and panel['values'] else None
+
+def get_pathology_data(patient_id):
+    pathology = get_store().latest_pathology(patient_id)
+    if pathology is None:
+        return None
+    return {key: value for key, value in pathology.items() if key != 'report_date' and value is not None}
+
+def get_treatment_history(patient_id):
+    return get_store().treatment_history(patient_id).rename(columns={
+        'treatment_date': 'Tarih',
+        'procedure': 'İşlem',
+        'notes': 'Notlar',
+        'blood_status': 'Kan Değerleri',
+        'dose_adjustment': 'Doz Ayarlaması'
     })
 
 def show_patient_details(patient_id):
     patient_data = get_patient_data(patient_id)
 
     st.markdown("### Hasta Detayları")
+    if patient_data is None:
+        st.warning("Hasta bulunamadı.")
+        return
+
     for key, value in patient_data.items():
         st.text(f"{key}: {value}")
 
-def show_blood_tests():
+def show_blood_tests(patient_id):
     st.markdown("### Kan Testi Sonuçları")
-    blood_tests = get_blood_test_data()
-    analysis = analyze_blood_values(blood_tests)
+    panel = get_blood_test_data(patient_id)
+    if panel is None:
+        st.info("Bu hasta için kan testi kaydı yok.")
+        return
+
+    # Referans aralıkları hastanın cinsiyeti ve yaşına göre seçilir
+    analysis = analyze_blood_values(
+        panel['values'],
+        sex=panel['sex'],
+        age=age_from_birth_date(panel['birth_date'])
+    )
 
     col1, col2 = st.columns(2)
 
@@ -91,9 +95,13 @@ def show_blood_tests():
         </div>
         """, unsafe_allow_html=True)
 
-def show_pathology_results():
+def show_pathology_results(patient_id):
     st.markdown("### Patoloji Sonuçları")
-    pathology_data = get_pathology_data()
+    pathology_data = get_pathology_data(patient_id)
+    if pathology_data is None:
+        st.info("Bu hasta için patoloji kaydı yok.")
+        return
+
     analysis = analyze_pathology_report(pathology_data)
 
     st.markdown(f"""
@@ -106,14 +114,17 @@ def show_pathology_results():
     </div>
     """, unsafe_allow_html=True)
 
-def show_treatment_history():
+def show_treatment_history(patient_id):
     st.markdown("### Tedavi Geçmişi")
-    treatments = get_treatment_history()
+    treatments = get_treatment_history(patient_id)
     st.dataframe(treatments, use_container_width=True)
 
+@instrument('page.patient_info')
 def main():
     st.markdown("## Hasta Bilgi Sistemi")
 
+    patient_id = st.text_input("Hasta ID", value="P001").strip()
+
     tabs = st.tabs([
         "Hasta Detayları",
         "Kan Testleri",
@@ -122,16 +133,16 @@ def main():
     ])
 
     with tabs[0]:
-        show_patient_details("P001")
+        show_patient_details(patient_id)
 
     with tabs[1]:
-        show_blood_tests()
+        show_blood_tests(patient_id)
 
     with tabs[2]:
-        show_pathology_results()
+        show_pathology_results(patient_id)
 
     with tabs[3]:
-        show_treatment_history()
+        show_treatment_history(patient_id)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,12 +1,35 @@
+import time
 import streamlit as st
 import pandas as pd
-from utils.report_analyzer import ReportAnalyzer
+from utils.report_analyzer import ReportAnalyzer, iter_report_sources, count_report_sources
+from utils.result_cache import get_report_cache
+from utils.parallel import default_workers
+from utils.instrumentation import instrument
 
+@st.cache_resource
+def get_report_analyzer():
+    """Tüm oturumlarca paylaşılan rapor analiz aracı"""
+    return ReportAnalyzer()
+
+def show_report_cache_stats():
+    """Rapor önbelleği isabet istatistiklerini gösterir"""
+    stats = get_report_cache().stats()
+    st.caption(
+        f"Önbellek: {stats['hits']} isabet, {stats['misses']} ıska "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} kayıt"
+    )
+
+@instrument('page.report_analysis')
 def show_report_analysis():
     st.markdown("<h2 class='section-header'>Hasta Rapor Analizi</h2>", unsafe_allow_html=True)
     
-    # Rapor analiz aracını başlat
-    analyzer = ReportAnalyzer()
+    # Rapor analiz aracı oturumlar arasında paylaşılır
+    analyzer = get_report_analyzer()
+
+    mode = st.radio("Analiz Modu", ["Tek Rapor", "Arşiv Yükle (ZIP)"], horizontal=True)
+    if mode == "Arşiv Yükle (ZIP)":
+        show_archive_analysis(analyzer)
+        return
     
     # Rapor girişi
     report_text = st.text_area(
@@ -18,9 +41,9 @@ def show_report_analysis():
     if st.button("Raporu Analiz Et"):
         if report_text:
             with st.spinner("Rapor analiz ediliyor..."):
-                # Raporu analiz et
-                analysis_results = analyzer.analyze_report(report_text)
-                summary = analyzer.generate_summary(analysis_results)
+                # Raporu analiz et (daha önce incelenen raporlar önbellekten gelir)
+                analysis_results = analyzer.analyze_report_cached(report_text)
+                summary = analysis_results['summary']
                 
                 # Sonuçları göster
                 col1, col2 = st.columns(2)
@@ -58,8 +81,59 @@ def show_report_analysis():
                         with st.expander(f"{category.title()} ile İlgili Bulgular"):
                             for finding in findings:
                                 st.markdown(f"- {finding}")
+
+                show_report_cache_stats()
         else:
             st.warning("Lütfen analiz edilecek bir rapor metni girin.")
 
+def show_archive_analysis(analyzer):
+    """ZIP arşivindeki .txt raporlarını toplu olarak analiz eder"""
+    uploaded_file = st.file_uploader("Rapor arşivi yükleyin (.txt dosyaları içeren ZIP)", type=['zip'])
+    workers = st.slider("İşçi süreç sayısı", min_value=1, max_value=max(default_workers(), 2), value=default_workers())
+
+    if uploaded_file is None or not st.button("Arşivi Analiz Et"):
+        return
+
+    try:
+        total = count_report_sources(uploaded_file)
+        if total == 0:
+            st.warning("Arşivde .txt raporu bulunamadı.")
+            return
+
+        # Rapor adları, metinler havuza gönderilirken kaydedilir
+        names = []
+
+        def report_items():
+            uploaded_file.seek(0)
+            for name, item in iter_report_sources(uploaded_file):
+                names.append(name)
+                yield item
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        rows = []
+        start = time.perf_counter()
+
+        results = analyzer.analyze_reports(report_items(), workers=workers)
+        for i, analysis in enumerate(results, start=1):
+            rows.append({
+                'rapor': names[i - 1],
+                'evre': analysis['stage'],
+                'olcum_sayisi': len(analysis['measurements']),
+                **{f'{category}_bulgu': len(findings) for category, findings in analysis['findings'].items()}
+            })
+
+            # Arayüzü her raporda değil, belirli aralıklarla güncelle
+            if i % 100 == 0 or i == total:
+                elapsed = time.perf_counter() - start
+                progress_bar.progress(i / total)
+                status_text.text(f"{i}/{total} rapor işlendi — {i / elapsed:.0f} rapor/sn")
+
+        st.success(f"{total} rapor {time.perf_counter() - start:.1f} saniyede analiz edildi.")
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
+    except Exception as e:
+        st.error(f"Arşiv işlenirken bir hata oluştu: {str(e)}")
+
 if __name__ == "__main__":
     show_report_analysis()
@@ -0,0 +1,53 @@
+import math
+import pandas as pd
+import pytest
+from benchmarks.generators import make_pathology_reports
+from utils.data_analysis import roman_to_int
+from utils.report_analyzer import ReportAnalyzer, UNIT_TO_MM
+
+EDGE_CASES = [
+    '',
+    'Evre IIIA adenokarsinom, 2.5 cm nodül',
+    'EVRE IV\nSağ üst lobda 12 mm nodül\nEvre II',
+    'devre ii ifadesi evre değildir',
+    'Evre\nIII satır sonunda bölünmüş',
+    'Sol alt lob 3 m ve 4mm, 1.2cm',
+    'Metastaz yok. Grade 2.'
+]
+
+@pytest.fixture
+def analyzer():
+    return ReportAnalyzer()
+
+def test_analyze_report_frame_matches_analyze_report(analyzer):
+    texts = make_pathology_reports(200, seed=7, min_lines=1, max_lines=20) + EDGE_CASES
+    df = pd.DataFrame({'text': texts})
+
+    frame = analyzer.analyze_report_frame(df['text'])
+    expected = [analyzer.analyze_report(text) for text in df['text']]
+
+    assert len(frame) == len(expected)
+    for (_, row), report in zip(frame.iterrows(), expected):
+        sizes = [m['value'] * UNIT_TO_MM[m['unit']] for m in report['measurements']]
+        assert row['olcum_sayisi'] == len(sizes)
+        if sizes:
+            assert math.isclose(row['en_buyuk_olcum_mm'], max(sizes))
+        else:
+            assert pd.isna(row['en_buyuk_olcum_mm'])
+
+        if report['stage'] is None:
+            assert pd.isna(row['evre']) and pd.isna(row['evre_no'])
+        else:
+            assert row['evre'] == report['stage']
+            assert row['evre_no'] == roman_to_int(report['stage'].upper())
+
+        for category, lines in report['findings'].items():
+            assert row[f'{category}_var'] == bool(lines)
+
+def test_analyze_report_frame_treats_missing_text_as_empty(analyzer):
+    frame = analyzer.analyze_report_frame(pd.Series([None, 'Evre II'], index=[10, 20]))
+
+    assert list(frame.index) == [10, 20]
+    assert frame.loc[10, 'olcum_sayisi'] == 0
+    assert pd.isna(frame.loc[10, 'evre'])
+    assert frame.loc[20, 'evre'] == analyzer.analyze_report('Evre II')['stage']
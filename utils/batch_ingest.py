@@ -0,0 +1,273 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.data_analysis import (
+    score_blood_matrix, abnormal_masks, BloodResults, REFERENCE_RANGES, HIGH_RISK_THRESHOLD
+)
+from utils.instrumentation import instrument, stage
+from utils.sketches import ParameterSketches
+from utils.report_analyzer import ReportAnalyzer
+from utils.patient_store import get_store
+
+REQUIRED_COLUMNS = ['hasta_id', 'rapor_tarihi']
+DEFAULT_CHUNKSIZE = 50_000
+# İsteğe bağlı serbest metin rapor sütunu ve sonuçlara taşınan metin türevli sütunlar
+REPORT_TEXT_COLUMN = 'rapor_metni'
+REPORT_RESULT_COLUMNS = ['evre', 'en_buyuk_olcum_mm', 'metastaz_var']
+# Arka plan işinin klasörüne kopyalanan girdi, sonuç tablosu ve parametre bazlı kompakt sonuçlar
+JOB_SOURCE_FILE = 'source.csv'
+JOB_RESULTS_FILE = 'results.pkl'
+JOB_DETAILS_FILE = 'details.npy'
+# Sonuç sayfası her yeniden çalıştığında tablo diskten okunmasın diye son
+# yüklenen bu kadar iş sonucu bellekte tutulur
+LOADED_RESULTS_LIMIT = 4
+
+_report_analyzer = ReportAnalyzer()
+_loaded_results = OrderedDict()
+_loaded_results_lock = threading.Lock()
+
+class MissingColumnsError(ValueError):
+    """CSV dosyasında zorunlu sütunlar eksik olduğunda fırlatılır"""
+
+class BatchAggregates:
+    """
+    Parça parça gelen analiz sonuçlarından özet metrikleri artımlı olarak tutar.
+    Bellek kullanımı dosya boyutundan bağımsızdır.
+    """
+
+    def __init__(self):
+        self.total_patients = 0
+        self.risk_sum = 0.0
+        self.high_risk = 0
+        # 0..9 anormal parametre sayısı için histogram
+        self.abnormal_histogram = np.zeros(len(REFERENCE_RANGES) + 1, dtype=np.int64)
+        # Parametre ve risk skoru dağılımları için kantil özetleri
+        self.sketches = ParameterSketches(REFERENCE_RANGES)
+
+    def update(self, results_chunk, values=None):
+        """
+        Bir sonuç parçasını özet metriklere ekler. values, aynı satırların
+        (satır × parametre) kan değeri matrisidir; verilirse parametre
+        özetleri de güncellenir.
+        """
+        risk = results_chunk['risk_skoru'].to_numpy(dtype=float)
+        abnormal = results_chunk['anormal_parametreler'].to_numpy(dtype=np.int64)
+
+        self.total_patients += len(results_chunk)
+        self.risk_sum += float(risk.sum())
+        self.high_risk += int((risk > HIGH_RISK_THRESHOLD).sum())
+        self.abnormal_histogram += np.bincount(abnormal, minlength=len(self.abnormal_histogram))
+        if values is not None:
+            self.sketches.update(values, risk)
+
+    @property
+    def mean_risk(self):
+        if self.total_patients == 0:
+            return float('nan')
+        return self.risk_sum / self.total_patients
+
+    def to_dict(self):
+        """JSON olarak saklanabilecek sözlük biçimini döndürür"""
+        return {
+            'total_patients': self.total_patients,
+            'risk_sum': self.risk_sum,
+            'high_risk': self.high_risk,
+            'abnormal_histogram': self.abnormal_histogram.tolist(),
+            'sketches': self.sketches.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls()
+        aggregates.total_patients = data['total_patients']
+        aggregates.risk_sum = data['risk_sum']
+        aggregates.high_risk = data['high_risk']
+        aggregates.abnormal_histogram = np.asarray(data['abnormal_histogram'], dtype=np.int64)
+        if 'sketches' in data:
+            aggregates.sketches = ParameterSketches.from_dict(data['sketches'])
+        return aggregates
+
+    def histogram_frame(self):
+        """Anormal parametre dağılımını DataFrame olarak döndürür"""
+        return pd.DataFrame({
+            'anormal_parametreler': np.arange(len(self.abnormal_histogram)),
+            'hasta_sayisi': self.abnormal_histogram
+        })
+
+def summarize_blood_chunk(df, details=None):
+    """
+    Ham kan değeri parçasını toplu analiz sonuç satırlarına çevirir.
+    details bir liste ise, aynı satırların parametre bazlı kompakt
+    sonuçları (BloodResults) listeye eklenir.
+    """
+    return score_blood_chunk(df, details)[0]
+
+@instrument('batch.score_chunk')
+def score_blood_chunk(df, details=None):
+    """
+    summarize_blood_chunk ile aynıdır; ayrıca sonuç satırlarıyla aynı
+    sıradaki anormal parametre bit maskelerini (abnormal_masks) ve kan
+    değeri matrisini döndürür.
+    """
+    values, status, risk, risk_score, measured_count, abnormal_count, profiles = score_blood_matrix(df)
+    measured = measured_count > 0
+
+    results = pd.DataFrame({
+        'hasta_id': df['hasta_id'],
+        'rapor_tarihi': df['rapor_tarihi'],
+        'risk_skoru': risk_score,
+        'anormal_parametreler': abnormal_count
+    }, index=df.index)
+
+    if details is not None:
+        details.append(BloodResults.from_scores(values[measured], status[measured], risk[measured],
+                                                risk_score[measured], profiles[measured]))
+
+    # Rapor metni varsa evre ve boyut bilgisi sütun bazında çıkarılıp eklenir
+    if REPORT_TEXT_COLUMN in df.columns:
+        text_features = _report_analyzer.analyze_report_frame(df[REPORT_TEXT_COLUMN])
+        results = results.join(text_features[REPORT_RESULT_COLUMNS])
+
+    return results[measured], abnormal_masks(status[measured]), values[measured]
+
+def iter_csv_chunks(source, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    CSV kaynağını sabit boyutlu ham parçalar halinde okur ve zorunlu
+    sütunları doğrular. Kaynak dosya yolu ya da dosya benzeri bir nesne
+    olabilir (ör. Streamlit UploadedFile).
+    """
+    reader = pd.read_csv(source, chunksize=chunksize, encoding='utf-8')
+    with reader:
+        chunks = iter(reader)
+        while True:
+            with stage('batch.csv_parse'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+
+            missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise MissingColumnsError(
+                    "CSV dosyası gerekli sütunları içermiyor: " + ', '.join(missing)
+                )
+            yield chunk
+
+def iter_blood_chunks(source, chunksize=DEFAULT_CHUNKSIZE):
+    """CSV kaynağını parça parça okur ve her parça için analiz sonuçlarını üretir"""
+    for chunk in iter_csv_chunks(source, chunksize):
+        yield summarize_blood_chunk(chunk)
+
+def analyze_blood_csv(source, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None, store=None, batch_id=None,
+                      details=None):
+    """
+    CSV dosyasını parça parça analiz eder. Her parçadan sonra
+    on_chunk(results_chunk, aggregates) çağrılır; böylece arayüz ayrıştırma
+    sürerken ara sonuçları gösterebilir. store verilirse ham değerler ve
+    risk sonuçları parça parça hasta deposuna yazılır. details bir liste
+    ise sonuç satırlarıyla aynı sırada kompakt parametre sonuçları toplanır.
+    """
+    aggregates = BatchAggregates()
+    parts = []
+
+    for chunk in iter_csv_chunks(source, chunksize):
+        results_chunk, masks, values = score_blood_chunk(chunk, details)
+        if store is not None:
+            store.insert_lab_panels(chunk, results_chunk, batch_id, abnormal_mask=masks)
+
+        aggregates.update(results_chunk, values)
+        parts.append(results_chunk)
+        if on_chunk is not None:
+            on_chunk(results_chunk, aggregates)
+
+    if parts:
+        results_df = pd.concat(parts, ignore_index=True)
+    else:
+        results_df = pd.DataFrame(columns=['hasta_id', 'rapor_tarihi', 'risk_skoru', 'anormal_parametreler'])
+
+    return results_df, aggregates
+
+def run_blood_csv_job(context, save_to_store=False, fingerprint=None, file_name=None,
+                      chunksize=DEFAULT_CHUNKSIZE):
+    """
+    İş klasörüne kopyalanmış CSV'yi (JOB_SOURCE_FILE) arka plan işi olarak
+    analiz eder. Dosya diskten parça parça okunur; bellek kullanımı dosya
+    boyutuna değil parça boyutuna bağlıdır. Her parçadan sonra iptal
+    kontrol edilir ve ilerleme bildirilir; sonuç tablosu iş klasörüne
+    yazılır, özet metrikler iş sonucu olarak döndürülür. Girdi dosyası iş
+    bitince silinir.
+    """
+    source_path = context.job_dir / JOB_SOURCE_FILE
+    total_bytes = source_path.stat().st_size
+
+    store, batch_id = None, None
+    if save_to_store:
+        store = get_store()
+        batch_id = store.begin_batch(fingerprint, file_name)
+        if batch_id is None:
+            store = None
+
+    try:
+        with open(source_path, 'rb') as f:
+            def on_chunk(results_chunk, aggregates):
+                context.check_cancelled()
+                context.report(
+                    f.tell() / total_bytes if total_bytes else 1.0,
+                    message=f"{aggregates.total_patients} kayıt işlendi",
+                    detail=aggregates.to_dict()
+                )
+
+            details = []
+            results_df, aggregates = analyze_blood_csv(
+                f, chunksize=chunksize, on_chunk=on_chunk, store=store, batch_id=batch_id, details=details
+            )
+    except BaseException:
+        # İptal ya da hata durumunda yarım parti veritabanında bırakılmaz
+        if store is not None:
+            store.discard_batch(batch_id)
+        raise
+    finally:
+        source_path.unlink(missing_ok=True)
+
+    if store is not None:
+        store.save_batch_sketches(batch_id, aggregates.sketches.to_dict())
+
+    results_df.to_pickle(context.job_dir / JOB_RESULTS_FILE)
+    BloodResults.concat(details).save(context.job_dir / JOB_DETAILS_FILE)
+
+    return {
+        'aggregates': aggregates.to_dict(),
+        'fingerprint': fingerprint,
+        'saved_to_store': store is not None,
+        'already_saved': save_to_store and store is None
+    }
+
+def load_blood_csv_job(job_dir, result):
+    """
+    Tamamlanmış bir toplu analiz işinin sonuç tablosunu ve özetini yükler.
+    Tablo (dosya yolu, değişiklik zamanı) anahtarıyla bellekte tutulur;
+    oturumlar arasında paylaşıldığından değiştirilmemelidir.
+    """
+    path = os.path.abspath(os.path.join(job_dir, JOB_RESULTS_FILE))
+    key = (path, os.stat(path).st_mtime_ns)
+    with _loaded_results_lock:
+        results_df = _loaded_results.get(key)
+        if results_df is not None:
+            _loaded_results.move_to_end(key)
+
+    if results_df is None:
+        results_df = pd.read_pickle(path)
+        with _loaded_results_lock:
+            _loaded_results[key] = results_df
+            while len(_loaded_results) > LOADED_RESULTS_LIMIT:
+                _loaded_results.popitem(last=False)
+
+    return results_df, BatchAggregates.from_dict(result['aggregates'])
+
+def load_blood_csv_details(job_dir):
+    """
+    İşin parametre bazlı kompakt sonuçlarını belleğe eşleyerek yükler;
+    i. satır sonuç tablosunun i. satırına karşılık gelir
+    """
+    return BloodResults.load(os.path.join(job_dir, JOB_DETAILS_FILE))
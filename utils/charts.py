@@ -0,0 +1,174 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from utils.instrumentation import instrument
+
+# Tüm seriler için tarayıcıya gönderilecek toplam nokta bütçesi
+DEFAULT_MAX_POINTS = 4000
+# Bir serinin inceltmeden sonra en az tutacağı nokta sayısı
+MIN_SERIES_POINTS = 50
+# Bu sayının üzerindeki ham noktalarda WebGL izleri (Scattergl) kullanılır
+WEBGL_THRESHOLD = 1000
+DEFAULT_BINS = 30
+
+def _as_float(values):
+    """Tarih dahil eksen değerlerini hesaplama için float dizisine çevirir"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets ile çizginin şeklini koruyan n_out
+    noktanın indekslerini döndürür. x sıralı olmalıdır; ilk ve son nokta
+    her zaman korunur.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+
+    # İlk ve son nokta dışındaki aralık n_out - 2 kovaya bölünür
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # Kova ortalamaları kümülatif toplamlarla tek seferde hesaplanır
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.maximum(edges[1:] - edges[:-1], 1)
+    mean_x = np.append((cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts, x[-1])
+    mean_y = np.append((cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_x, next_y = mean_x[i + 1], mean_y[i + 1]
+        ax, ay = x[anchor], y[anchor]
+
+        # Önceki seçilen nokta, kova noktası ve sonraki kova ortalamasının oluşturduğu üçgen alanı
+        areas = np.abs((ax - next_x) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y - ay))
+        anchor = start + int(np.argmax(areas))
+        selected[i + 1] = anchor
+
+    return selected
+
+def downsample_frame(df, x, y, n_out):
+    """Sıralı bir serinin LTTB ile inceltilmiş satırlarını döndürür"""
+    if len(df) <= n_out:
+        return df
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), n_out)]
+
+def binned_counts(values, bins=DEFAULT_BINS, value_range=None):
+    """
+    Histogramı sunucuda hesaplar; ham değerler yerine kova merkezleri,
+    genişlikleri ve sayıları döndürülür. NaN değerler sayılmaz.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return pd.DataFrame({
+        'merkez': (edges[:-1] + edges[1:]) / 2,
+        'genislik': np.diff(edges),
+        'sayi': counts
+    })
+
+def frame_fingerprint(df, *extra):
+    """DataFrame içeriği ve ek parametrelerden figür önbelleği anahtarı üretir"""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(repr((list(df.columns), extra)).encode('utf-8'))
+    return digest.hexdigest()
+
+@instrument('charts.line_figure')
+def line_figure(df, x, y, color=None, title=None, labels=None, max_points=DEFAULT_MAX_POINTS,
+                markers=False, line_color=None):
+    """
+    Çizgi grafiği oluşturur. Her seri x'e göre sıralanıp toplam nokta
+    bütçesine göre LTTB ile inceltilir; ham nokta sayısı eşiği aşarsa
+    WebGL izleri kullanılır.
+    """
+    labels = labels or {}
+    if color is None:
+        series = [(None, df)]
+    else:
+        series = list(df.groupby(color, sort=False))
+
+    per_series = max(max_points // max(len(series), 1), MIN_SERIES_POINTS)
+    trace_type = go.Scattergl if len(df) > WEBGL_THRESHOLD else go.Scatter
+    mode = 'lines+markers' if markers else 'lines'
+
+    fig = go.Figure()
+    for name, part in series:
+        part = downsample_frame(part.sort_values(x, kind='stable'), x, y, per_series)
+        trace = trace_type(x=part[x].to_numpy(), y=part[y].to_numpy(), mode=mode,
+                           name=str(name) if name is not None else y, showlegend=name is not None)
+        if line_color is not None:
+            trace.line.color = line_color
+        fig.add_trace(trace)
+
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y),
+                      legend_title_text=labels.get(color, color) if color else None)
+    return fig
+
+@instrument('charts.histogram_figure')
+def histogram_figure(values, bins=DEFAULT_BINS, value_range=None, title=None, x_label=None,
+                     y_label='Sayı', bar_color=None):
+    """Sunucuda kovalanmış histogramı çubuk grafik olarak oluşturur"""
+    counts = binned_counts(values, bins, value_range)
+    fig = go.Figure(go.Bar(x=counts['merkez'], y=counts['sayi'], width=counts['genislik'],
+                           marker_color=bar_color))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, bargap=0.05)
+    return fig
+
+class FigureCache:
+    """Veri parmak izine göre oluşturulmuş figürleri tutan küçük bir LRU önbellek"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get_or_build(self, key, build):
+        """Anahtar için figür varsa döndürür, yoksa build() ile oluşturup saklar"""
+        with self._lock:
+            fig = self._entries.get(key)
+            if fig is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return fig
+            self._stats['misses'] += 1
+
+        fig = build()
+        with self._lock:
+            self._entries[key] = fig
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fig
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_figure_cache = None
+_figure_cache_lock = threading.Lock()
+
+def get_figure_cache():
+    """Süreç genelinde paylaşılan figür önbelleğini döndürür"""
+    global _figure_cache
+    with _figure_cache_lock:
+        if _figure_cache is None:
+            _figure_cache = FigureCache()
+        return _figure_cache
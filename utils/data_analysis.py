@@ -1,31 +1,97 @@
+import os
+import threading
 import pandas as pd
 import numpy as np
+from utils.instrumentation import instrument
+from utils.reference_ranges import ReferenceRangeRegistry
+from utils.pathology import get_pathology_classifier, parse_stage, stage_risk
 
-def analyze_blood_values(blood_data):
+REFERENCE_RANGES = {
+    # Tam Kan Sayımı
+    'WBC': (4.5, 11.0),  # Beyaz kan hücresi (×10^9/L)
+    'RBC': (4.5, 5.5),   # Kırmızı kan hücresi (×10^12/L)
+    'HGB': (13.5, 17.5), # Hemoglobin (g/dL)
+    'PLT': (150, 450),   # Trombosit (×10^9/L)
+
+    # Tümör Belirteçleri
+    'CEA': (0, 5.0),     # Karsinoembriyonik antijen (ng/mL)
+    'CYFRA': (0, 3.3),   # CYFRA 21-1 (ng/mL)
+    'NSE': (0, 16.3),    # Nöron spesifik enolaz (ng/mL)
+
+    # Biyokimya
+    'LDH': (140, 280),   # Laktat dehidrogenaz (U/L)
+    'ALP': (44, 147)     # Alkalen fosfataz (U/L)
+}
+
+# Yüksek değerde risk puanı 2 olan tümör belirteçleri
+TUMOR_MARKERS = ('CEA', 'CYFRA', 'NSE')
+# Bu skorun üzerindeki paneller yüksek riskli sayılır
+HIGH_RISK_THRESHOLD = 7
+
+# Toplu analizde kullanılan durum kodları
+STATUS_MISSING = -1
+STATUS_NORMAL = 0
+STATUS_LOW = 1
+STATUS_HIGH = 2
+STATUS_LABELS = {
+    STATUS_NORMAL: 'Normal',
+    STATUS_LOW: 'Düşük',
+    STATUS_HIGH: 'Yüksek'
+}
+
+# Parametre sırası ve varsayılan (demografiden bağımsız) aralıklar tek tabloda
+REFERENCE_TABLE = np.array(
+    [(param, low, high, 2 if param in TUMOR_MARKERS else 1) for param, (low, high) in REFERENCE_RANGES.items()],
+    dtype=[('param', 'U8'), ('low', 'f8'), ('high', 'f8'), ('high_risk', 'i1')]
+)
+
+# Kişiselleştirilmiş aralıklar için isteğe bağlı CSV sütunları
+SEX_COLUMN = 'cinsiyet'
+AGE_COLUMN = 'yas'
+DEFAULT_REFERENCE_TABLE_PATH = os.path.join('assets', 'reference_ranges.csv')
+
+# Satır başına kompakt sonuç: float32 değerler, int8 durum/risk kodları ve
+# paylaşılan referans tablosundaki demografik profilin indeksi
+BLOOD_RESULT_DTYPE = np.dtype([
+    ('values', 'f4', (len(REFERENCE_RANGES),)),
+    ('status', 'i1', (len(REFERENCE_RANGES),)),
+    ('risk', 'i1', (len(REFERENCE_RANGES),)),
+    ('risk_score', 'f4'),
+    ('profile', 'i2')
+])
+
+_reference_registry = None
+_reference_registry_lock = threading.Lock()
+
+def get_reference_registry():
     """
-    Kan değerlerini analiz eder ve anormallikleri tespit eder
+    Cinsiyet ve yaşa göre referans aralığı kayıt defterini döndürür. Tablo
+    yolu ONKONIX_REFERENCE_RANGES ortam değişkeniyle değiştirilebilir;
+    tablo yoksa tüm hastalar için REFERENCE_RANGES kullanılır.
     """
-    reference_ranges = {
-        # Tam Kan Sayımı
-        'WBC': (4.5, 11.0),  # Beyaz kan hücresi (×10^9/L)
-        'RBC': (4.5, 5.5),   # Kırmızı kan hücresi (×10^12/L)
-        'HGB': (13.5, 17.5), # Hemoglobin (g/dL)
-        'PLT': (150, 450),   # Trombosit (×10^9/L)
+    global _reference_registry
+    with _reference_registry_lock:
+        if _reference_registry is None:
+            path = os.environ.get('ONKONIX_REFERENCE_RANGES', DEFAULT_REFERENCE_TABLE_PATH)
+            if os.path.exists(path):
+                _reference_registry = ReferenceRangeRegistry.from_csv(path, REFERENCE_RANGES, REFERENCE_RANGES)
+            else:
+                empty = pd.DataFrame(columns=['parametre', 'cinsiyet', 'yas_min', 'yas_max', 'alt', 'ust'])
+                _reference_registry = ReferenceRangeRegistry(empty, REFERENCE_RANGES, REFERENCE_RANGES)
+        return _reference_registry
 
-        # Tümör Belirteçleri
-        'CEA': (0, 5.0),     # Karsinoembriyonik antijen (ng/mL)
-        'CYFRA': (0, 3.3),   # CYFRA 21-1 (ng/mL)
-        'NSE': (0, 16.3),    # Nöron spesifik enolaz (ng/mL)
-
-        # Biyokimya
-        'LDH': (140, 280),   # Laktat dehidrogenaz (U/L)
-        'ALP': (44, 147)     # Alkalen fosfataz (U/L)
-    }
+@instrument()
+def analyze_blood_values(blood_data, sex=None, age=None):
+    """
+    Kan değerlerini analiz eder ve anormallikleri tespit eder. Cinsiyet ve
+    yaş verilirse hastaya özgü referans aralıkları kullanılır.
+    """
+    reference_ranges = get_reference_registry().ranges_for(sex, age)
 
     results = {}
     risk_score = 0
 
-    for param, (min_val, max_val) in reference_ranges.items():
+    for param, (min_val, max_val, range_label) in reference_ranges.items():
         if param in blood_data:
             value = blood_data[param]
             status = 'Normal'
@@ -36,12 +102,12 @@ def analyze_blood_values(blood_data):
                 risk = 1
             elif value > max_val:
                 status = 'Yüksek'
-                risk = 2 if param in ['CEA', 'CYFRA', 'NSE'] else 1
+                risk = 2 if param in TUMOR_MARKERS else 1
 
             results[param] = {
                 'value': value,
                 'status': status,
-                'reference_range': f'{min_val}-{max_val}',
+                'reference_range': range_label,
                 'risk_level': risk
             }
             risk_score += risk
@@ -51,15 +117,192 @@ def analyze_blood_values(blood_data):
         'risk_score': min(risk_score / len(blood_data) * 5, 10)  # 0-10 arası risk skoru
     }
 
-def analyze_pathology_report(report_data):
+def _frame_column(df, param):
+    """Parametre sütununu büyük/küçük harf duyarsız olarak bulur"""
+    if param in df.columns:
+        return param
+    if param.lower() in df.columns:
+        return param.lower()
+    return None
+
+def blood_profiles(df):
+    """Satırların demografik profil indekslerini cinsiyet/yaş sütunlarından hesaplar"""
+    registry = get_reference_registry()
+    sex = df[SEX_COLUMN] if SEX_COLUMN in df.columns else None
+    age = df[AGE_COLUMN] if AGE_COLUMN in df.columns else None
+    if sex is None and age is None:
+        return np.full(len(df), registry.default_profile(), dtype=np.int16)
+    return registry.profile_ids(sex, age, n_rows=len(df))
+
+def score_blood_matrix(df, profiles=None):
     """
-    Patoloji raporunu analiz eder
+    Kan değeri sütunlarını (satır × parametre) matrise çevirir ve durum,
+    risk, ölçüm sayısı ve risk skorunu sütun bazında hesaplar. Her satır
+    kendi demografik profilinin referans aralıklarıyla karşılaştırılır;
+    profiles verilmezse cinsiyet/yaş sütunlarından hesaplanır.
     """
-    cancer_types = {
-        'NSCLC': ['Adenokarsinom', 'Skuamöz hücreli karsinom', 'Büyük hücreli karsinom'],
-        'SCLC': ['Küçük hücreli karsinom']
+    params = REFERENCE_TABLE['param']
+    values = np.full((len(df), len(params)), np.nan)
+    for j, param in enumerate(params):
+        column = _frame_column(df, param)
+        if column is not None:
+            values[:, j] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    if profiles is None:
+        profiles = blood_profiles(df)
+    low, high = get_reference_registry().lookup(profiles)
+
+    # Karşılaştırmalar float64 üzerinde yapılır; saklama hassasiyeti sonucu değiştirmez
+    measured = ~np.isnan(values)
+    is_low = values < low
+    is_high = values > high
+
+    status = np.where(is_low, STATUS_LOW, np.where(is_high, STATUS_HIGH, STATUS_NORMAL)).astype(np.int8)
+    status[~measured] = STATUS_MISSING
+
+    risk = np.where(is_low, 1, np.where(is_high, REFERENCE_TABLE['high_risk'], 0)).astype(np.int8)
+
+    measured_count = measured.sum(axis=1)
+    abnormal_count = (is_low | is_high).sum(axis=1)
+
+    # 0-10 arası risk skoru; hiç ölçüm olmayan satırlar NaN kalır
+    with np.errstate(divide='ignore', invalid='ignore'):
+        risk_score = np.minimum(risk.sum(axis=1) / measured_count * 5, 10)
+    risk_score[measured_count == 0] = np.nan
+
+    return values, status, risk, risk_score, measured_count, abnormal_count, profiles
+
+def abnormal_masks(status):
+    """
+    Durum matrisini satır başına bit maskesine çevirir: j. bit,
+    REFERENCE_TABLE'daki j. parametrenin referans dışı olduğunu gösterir
+    """
+    abnormal = (status == STATUS_LOW) | (status == STATUS_HIGH)
+    return abnormal.astype(np.int64) @ (np.int64(1) << np.arange(status.shape[1], dtype=np.int64))
+
+@instrument(nbytes=lambda df: int(df.memory_usage(index=False).sum()))
+def analyze_blood_frame(df):
+    """
+    Kan değerlerini tüm kohort için tek geçişte (sütun bazlı) analiz eder.
+
+    Her satır analyze_blood_values ile aynı kurallarla puanlanır; boş (NaN)
+    değerler ölçülmemiş kabul edilir. Sütun adları 'WBC' ya da 'wbc'
+    biçiminde olabilir.
+    """
+    params = list(REFERENCE_RANGES)
+    _, status, risk, risk_score, measured_count, abnormal_count, _ = score_blood_matrix(df)
+
+    return {
+        'status_codes': pd.DataFrame(status, columns=params, index=df.index),
+        'risk_levels': pd.DataFrame(risk, columns=params, index=df.index),
+        'risk_score': pd.Series(risk_score, index=df.index, name='risk_score'),
+        'abnormal_count': pd.Series(abnormal_count, index=df.index, name='abnormal_count'),
+        'measured_count': pd.Series(measured_count, index=df.index, name='measured_count')
     }
 
+class BloodResults:
+    """
+    Toplu kan analizi sonuçlarının kompakt gösterimi.
+
+    Satırlar BLOOD_RESULT_DTYPE yapılı dizisinde tutulur (satır başına
+    60 bayt); referans aralığı etiketleri her satırın profil indeksiyle
+    paylaşılan referans kayıt defterinden okunur. Arayüzün beklediği sözlük
+    biçimi yalnızca istenen satır için, to_dict ile üretilir.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_frame(cls, df):
+        """Kan değeri DataFrame'ini analiz eder (analyze_blood_frame ile aynı kurallar)"""
+        values, status, risk, risk_score, _, _, profiles = score_blood_matrix(df)
+        return cls.from_scores(values, status, risk, risk_score, profiles)
+
+    @classmethod
+    def from_scores(cls, values, status, risk, risk_score, profiles):
+        """score_blood_matrix çıktısından kompakt sonuç oluşturur"""
+        data = np.empty(len(values), dtype=BLOOD_RESULT_DTYPE)
+        data['values'] = values
+        data['status'] = status
+        data['risk'] = risk
+        data['risk_score'] = risk_score
+        data['profile'] = profiles
+        return cls(data)
+
+    @classmethod
+    def concat(cls, parts):
+        if not parts:
+            return cls(np.empty(0, dtype=BLOOD_RESULT_DTYPE))
+        return cls(np.concatenate([part.data for part in parts]))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Kaydedilmiş sonuçları (varsayılan olarak belleğe eşleyerek) yükler"""
+        return cls(np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False))
+
+    def save(self, path):
+        np.save(path, self.data, allow_pickle=False)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        """Dilim ya da maske ile alt küme döndürür"""
+        return BloodResults(self.data[key])
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    @property
+    def risk_score(self):
+        return self.data['risk_score']
+
+    @property
+    def status_codes(self):
+        return self.data['status']
+
+    @property
+    def abnormal_count(self):
+        return (self.data['status'] > STATUS_NORMAL).sum(axis=1)
+
+    @property
+    def measured_count(self):
+        return (self.data['status'] != STATUS_MISSING).sum(axis=1)
+
+    def to_dict(self, i):
+        """i. satırı analyze_blood_values ile aynı biçimde sözlüğe çevirir"""
+        row = self.data[i]
+        labels = get_reference_registry().labels[row['profile']]
+        results = {}
+        for j, param in enumerate(REFERENCE_TABLE['param']):
+            status = int(row['status'][j])
+            if status == STATUS_MISSING:
+                continue
+            results[str(param)] = {
+                # float32 değerin en kısa gösterimi (ör. 16.3) korunur
+                'value': float(str(row['values'][j])),
+                'status': STATUS_LABELS[status],
+                'reference_range': labels[j],
+                'risk_level': int(row['risk'][j])
+            }
+
+        return {
+            'test_results': results,
+            'risk_score': float(row['risk_score'])
+        }
+
+@instrument()
+def analyze_pathology_report(report_data):
+    """
+    Patoloji raporunu analiz eder. Evre 'Stage II', 'Evre IIIA' ya da
+    'T2N1M0' biçiminde olabilir; tanınmayan evrelerde risk 0 kalır.
+    """
+    classifier = get_pathology_classifier()
+
     results = {
         'cancer_type': None,
         'histology': None,
@@ -70,15 +313,13 @@ def analyze_pathology_report(report_data):
 
     if 'histology' in report_data:
         results['histology'] = report_data['histology']
-        for type_group, subtypes in cancer_types.items():
-            if report_data['histology'] in subtypes:
-                results['cancer_type'] = type_group
+        results['cancer_type'] = classifier.cancer_type(report_data['histology'])
 
     if 'stage' in report_data:
         results['stage'] = report_data['stage']
         # Risk seviyesi hesaplama (Stage I: 2, II: 4, III: 6, IV: 8)
-        stage_num = roman_to_int(report_data['stage'].split()[1])
-        results['risk_level'] = stage_num * 2
+        stage_num, _ = parse_stage(report_data['stage'])
+        results['risk_level'] = stage_risk(stage_num)
 
     if 'differentiation' in report_data:
         results['differentiation'] = report_data['differentiation']
@@ -92,6 +333,28 @@ def roman_to_int(roman):
     roman_values = {'I': 1, 'II': 2, 'III': 3, 'IV': 4}
     return roman_values.get(roman, 0)
 
+# Evreye göre doz çarpanları
+STAGE_MULTIPLIERS = {
+    'I': 1.0,
+    'II': 1.1,
+    'III': 1.2,
+    'IV': 1.3
+}
+
+def _stage_word(stage):
+    """'Stage II' biçimindeki metnin ikinci sözcüğü; yoksa None"""
+    words = stage.split() if isinstance(stage, str) else []
+    return words[1] if len(words) > 1 else None
+
+def stage_multiplier(stage):
+    """
+    'Stage II' biçimindeki evre metnini doz çarpanına çevirir. İkinci
+    sözcük tablodaki evrelerden biri değilse (ör. 'IIIA', 'T2N1M0') ya da
+    hiç yoksa çarpan 1.0'dır.
+    """
+    return STAGE_MULTIPLIERS.get(_stage_word(stage), 1.0)
+
+@instrument()
 def calculate_treatment_dose(weight, age, blood_values=None, pathology_results=None):
     """
     Tedavi dozunu hesaplar
@@ -111,13 +374,125 @@ def calculate_treatment_dose(weight, age, blood_values=None, pathology_results=N
 
     # Patoloji sonuçlarına göre düzeltme
     if pathology_results and 'stage' in pathology_results:
-        stage_multiplier = {
-            'I': 1.0,
-            'II': 1.1,
-            'III': 1.2,
-            'IV': 1.3
-        }
-        stage = pathology_results['stage'].split()[1]
-        base_dose *= stage_multiplier.get(stage, 1.0)
+        base_dose *= stage_multiplier(pathology_results['stage'])
+
+    return round(base_dose, 2)
+
+def _round2(values):
+    """Python'un round(x, 2) sonucuyla birebir aynı vektörel yuvarlama"""
+    rounded = np.round(values, 2)
+    # np.round yarıya çok yakın değerlerde farklı yuvarlayabilir; bunlar tek tek düzeltilir
+    scaled = values * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
+
+def _stage_multipliers(stage):
+    """Evre metinlerini doz çarpanlarına çevirir; her tekil metin bir kez işlenir"""
+    codes, uniques = pd.factorize(np.asarray(stage, dtype=object))
+    return np.array([stage_multiplier(value) for value in uniques] + [1.0], dtype=float)[codes]
+
+@instrument(nbytes=lambda weight, *args, **kwargs: np.asarray(weight).nbytes)
+def calculate_treatment_doses(weight, age, wbc=None, plt=None, stage=None):
+    """
+    Tüm kohort için tedavi dozlarını tek geçişte hesaplar.
+
+    Girdiler aynı uzunlukta diziler ya da Series olmalıdır; her satır
+    calculate_treatment_dose ile aynı sonucu verir. Boş (NaN) WBC/PLT
+    değerleri ve evre bilgisi olmayan satırlar düzeltmeye girmez.
+    """
+    weight = np.asarray(weight, dtype=float)
+    age = np.asarray(age, dtype=float)
+
+    base_dose = weight * 2
+    base_dose = np.where(age > 65, base_dose * 0.8, base_dose)
+
+    if wbc is not None:
+        base_dose = np.where(np.asarray(wbc, dtype=float) < 4.0, base_dose * 0.9, base_dose)
+    if plt is not None:
+        base_dose = np.where(np.asarray(plt, dtype=float) < 100, base_dose * 0.85, base_dose)
+    if stage is not None:
+        base_dose = base_dose * _stage_multipliers(stage)
+
+    return _round2(base_dose)
+
+class DoseGrid:
+    """
+    Doz sayfasının izin verdiği girdi aralıkları için önceden hesaplanmış
+    doz tablosu. Kilo ve yaş tam sayı adımlarla, WBC/PLT yalnızca eşik
+    altı/üstü olarak, evre ise I-IV ve evresiz olarak tutulur. Aralık
+    içindeki her sorgu tek bir dizi erişimidir.
+    """
+
+    STAGES = (None, 'I', 'II', 'III', 'IV')
+
+    def __init__(self, weight_range=(30, 150), age_range=(18, 100)):
+        self.weights = np.arange(weight_range[0], weight_range[1] + 1)
+        self.ages = np.arange(age_range[0], age_range[1] + 1)
+
+        w, a, wbc_low, plt_low, stage = np.meshgrid(
+            self.weights, self.ages, [False, True], [False, True], np.arange(len(self.STAGES)),
+            indexing='ij'
+        )
+        stage_text = np.array([None] + [f'Stage {s}' for s in self.STAGES[1:]], dtype=object)[stage.ravel()]
+
+        doses = calculate_treatment_doses(
+            w.ravel(), a.ravel(),
+            wbc=np.where(wbc_low.ravel(), 0.0, np.nan),
+            plt=np.where(plt_low.ravel(), 0.0, np.nan),
+            stage=stage_text
+        )
+        self.doses = doses.reshape(w.shape)
+
+    def _index(self, weight, age):
+        i = weight - self.weights[0]
+        j = age - self.ages[0]
+        if float(weight).is_integer() and float(age).is_integer() \
+                and 0 <= i < len(self.weights) and 0 <= j < len(self.ages):
+            return int(i), int(j)
+        return None
+
+    @staticmethod
+    def _stage_index(pathology_results):
+        if not pathology_results or 'stage' not in pathology_results:
+            return 0
+        stage = _stage_word(pathology_results['stage'])
+        if stage in STAGE_MULTIPLIERS:
+            return DoseGrid.STAGES.index(stage)
+        return 0
+
+    def lookup(self, weight, age, blood_values=None, pathology_results=None):
+        """
+        calculate_treatment_dose ile aynı imza ve sonuç. Tablo dışında kalan
+        girdiler için skaler hesaplamaya düşer.
+        """
+        index = self._index(weight, age)
+        if index is None:
+            return calculate_treatment_dose(weight, age, blood_values, pathology_results)
+
+        wbc_low = plt_low = 0
+        if blood_values:
+            wbc_low = int(blood_values.get('WBC', 100) < 4.0)
+            plt_low = int(blood_values.get('PLT', 400) < 100)
+
+        return float(self.doses[index[0], index[1], wbc_low, plt_low, self._stage_index(pathology_results)])
+
+    def surface(self, blood_values=None, pathology_results=None):
+        """Kilo × yaş doz yüzeyini (satırlar yaş, sütunlar kilo) DataFrame olarak döndürür"""
+        wbc_low = plt_low = 0
+        if blood_values:
+            wbc_low = int(blood_values.get('WBC', 100) < 4.0)
+            plt_low = int(blood_values.get('PLT', 400) < 100)
+
+        surface = self.doses[:, :, wbc_low, plt_low, self._stage_index(pathology_results)]
+        return pd.DataFrame(surface.T, index=self.ages, columns=self.weights)
+
+_dose_grid = None
 
-    return round(base_dose, 2)
\ No newline at end of file
+def get_dose_grid():
+    """Süreç genelinde paylaşılan doz tablosunu döndürür (ilk çağrıda oluşturulur)"""
+    global _dose_grid
+    if _dose_grid is None:
+        _dose_grid = DoseGrid()
+    return _dose_grid
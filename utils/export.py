@@ -0,0 +1,255 @@
+import argparse
+import importlib.util
+import io
+import os
+import sys
+import numpy as np
+from utils.instrumentation import instrument
+
+# Parquet için pyarrow, XLSX için xlsxwriter gerekir (isteğe bağlı bağımlılıklar)
+DEFAULT_EXPORT_CHUNK_ROWS = 50_000
+# Excel sayfa sınırı (başlık satırı dahil); aşan satırlar yeni sayfaya yazılır
+XLSX_MAX_ROWS = 1_048_576
+XLSX_SHEET_NAME = 'Sonuclar'
+# CSV parçalarında tamsayı ya da metin olarak çıkarılabilen kimlik ve tarih sütunları hep metin yazılır
+STRING_COLUMNS = ('hasta_id', 'rapor_tarihi')
+
+EXPORT_FORMATS = {
+    'csv': {'label': 'CSV', 'extension': '.csv', 'mime': 'text/csv', 'module': None},
+    'parquet': {'label': 'Parquet', 'extension': '.parquet', 'mime': 'application/vnd.apache.parquet',
+                'module': 'pyarrow'},
+    'xlsx': {'label': 'Excel (XLSX)', 'extension': '.xlsx',
+             'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+             'module': 'xlsxwriter'}
+}
+
+class MissingDependencyError(ImportError):
+    """Dışa aktarım biçimi için gereken isteğe bağlı paket kurulu olmadığında fırlatılır"""
+
+def _require(fmt):
+    module = EXPORT_FORMATS[fmt]['module']
+    if module is not None and importlib.util.find_spec(module) is None:
+        raise MissingDependencyError(
+            f"{EXPORT_FORMATS[fmt]['label']} dışa aktarımı için '{module}' paketi kurulmalı"
+        )
+
+def available_formats():
+    """Gerekli paketleri kurulu olan dışa aktarım biçimlerini döndürür"""
+    return [
+        fmt for fmt, spec in EXPORT_FORMATS.items()
+        if spec['module'] is None or importlib.util.find_spec(spec['module']) is not None
+    ]
+
+def iter_frame_chunks(df, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    """DataFrame'i kopyalamadan ardışık satır dilimleri olarak döndürür (boş tabloda başlık için bir dilim)"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+class CsvChunkWriter:
+    """Parçaları UTF-8 CSV olarak yazar; başlık yalnızca ilk parçada yazılır"""
+
+    def __init__(self, target):
+        self._owns_file = isinstance(target, (str, os.PathLike))
+        self._file = open(target, 'wb') if self._owns_file else target
+        self._header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self._file, header=self._header, index=False, encoding='utf-8')
+        self._header = False
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+def _column_dtype(column, series):
+    """Sütunun Parquet'e yazılacağı kararlı pandas veri tipi"""
+    kind = series.dtype.kind
+    if column in STRING_COLUMNS or kind not in 'biufM':
+        return 'string'
+    if kind == 'b':
+        return 'boolean'
+    if kind == 'M':
+        return 'datetime64[ns]'
+    # Eksik değer içeren parçada tamsayılar float olarak okunur; sayılar hep float64 yazılır
+    return 'float64'
+
+class ParquetChunkWriter:
+    """
+    Parçaları tek bir Parquet dosyasına satır grupları olarak yazar.
+    pandas veri tiplerini her parçada ayrıca çıkardığı için sütun tipleri
+    ilk parçada sabitlenir (kimlik/tarih ve metin sütunları string,
+    sayılar float64, mantıksal değerler boolean) ve sonraki parçalar
+    yazılmadan önce bu tiplere dönüştürülür.
+    """
+
+    def __init__(self, target):
+        _require('parquet')
+        import pyarrow.parquet as pq
+        self._pq = pq
+        self._target = target
+        self._writer = None
+        self._schema = None
+        self._dtypes = None
+
+    def _normalize(self, chunk):
+        if self._dtypes is None:
+            self._dtypes = {column: _column_dtype(column, chunk[column]) for column in chunk.columns}
+        try:
+            return chunk.astype(self._dtypes)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Parquet dışa aktarımında sütun tipi parçalar arasında uyuşmuyor: {e}") from e
+
+    def write(self, chunk):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(self._normalize(chunk), schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._pq.ParquetWriter(self._target, self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+class XlsxChunkWriter:
+    """
+    Parçaları xlsxwriter'ın sabit bellek kipinde satır satır yazar. Bir
+    sayfa dolduğunda başlıkla birlikte yeni sayfaya geçilir.
+    """
+
+    def __init__(self, target):
+        _require('xlsx')
+        import xlsxwriter
+        self._workbook = xlsxwriter.Workbook(target, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd'
+        })
+        self._sheet = None
+        self._sheet_count = 0
+        self._row = 0
+        self._columns = None
+
+    def _new_sheet(self):
+        self._sheet_count += 1
+        name = XLSX_SHEET_NAME if self._sheet_count == 1 else f'{XLSX_SHEET_NAME}_{self._sheet_count}'
+        self._sheet = self._workbook.add_worksheet(name)
+        self._sheet.write_row(0, 0, self._columns)
+        self._row = 1
+
+    def write(self, chunk):
+        if self._columns is None:
+            self._columns = [str(column) for column in chunk.columns]
+            self._new_sheet()
+
+        # Eksik değerler boş hücre olarak yazılır (xlsxwriter NaN kabul etmez)
+        values = chunk.astype(object).where(chunk.notna(), None).to_numpy()
+        for row in values:
+            if self._row >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self._sheet.write_row(self._row, 0, row)
+            self._row += 1
+
+    def close(self):
+        if self._columns is None:
+            self._workbook.add_worksheet(XLSX_SHEET_NAME)
+        self._workbook.close()
+
+_WRITERS = {'csv': CsvChunkWriter, 'parquet': ParquetChunkWriter, 'xlsx': XlsxChunkWriter}
+
+def open_writer(fmt, target):
+    """Biçime uygun parça yazıcısını açar; target dosya yolu ya da ikili dosya nesnesi olabilir"""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Desteklenmeyen dışa aktarım biçimi: {fmt}")
+    return _WRITERS[fmt](target)
+
+@instrument()
+def write_chunks(chunks, fmt, target):
+    """Parça akışını hazır oldukça hedefe yazar ve yazılan satır sayısını döndürür"""
+    writer = open_writer(fmt, target)
+    rows = 0
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+def export_frame(df, fmt, target=None, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    """
+    DataFrame'i parça parça dışa aktarır. target verilmezse dosya içeriği
+    bayt olarak döndürülür (indirme düğmesi için).
+    """
+    if target is not None:
+        return write_chunks(iter_frame_chunks(df, chunk_rows), fmt, target)
+
+    buffer = io.BytesIO()
+    write_chunks(iter_frame_chunks(df, chunk_rows), fmt, buffer)
+    return buffer.getvalue()
+
+def top_n_positions(values, n, ascending=False):
+    """
+    En büyük (ascending=True ise en küçük) n değerin konumlarını sıralı
+    döndürür. Tüm dizi sıralanmaz: np.argpartition ile n aday seçilip
+    yalnızca onlar sıralanır. Eşit değerler konum sırasıyla gelir, eksik
+    değerler en sona kalır; böylece sayfalar kararlıdır.
+    """
+    keys = np.asarray(values, dtype=float)
+    keys = keys if ascending else -keys
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    n = min(max(int(n), 0), len(keys))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if n < len(keys):
+        # Sınırdaki eşit değerlerden konumu küçük olanlar seçilir
+        kth = keys[np.argpartition(keys, n - 1)[:n]].max()
+        below = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)[:n - len(below)]
+        candidates = np.concatenate([below, ties])
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.lexsort((candidates, keys[candidates]))]
+
+def page_count(total, page_size):
+    return max((total + page_size - 1) // page_size, 1)
+
+def top_n_page(df, column, page, page_size, ascending=False):
+    """
+    column'a göre sıralanmış tablonun yalnızca istenen sayfasını (0'dan
+    başlayarak) döndürür; tüm tablonun sıralı kopyası oluşturulmaz.
+    """
+    positions = top_n_positions(df[column].to_numpy(dtype=float, na_value=np.nan),
+                                (page + 1) * page_size, ascending=ascending)
+    return df.iloc[positions[page * page_size:]]
+
+# Gece dışa aktarımı (depo kök dizininden):
+#     python -m utils.export kan_degerleri.csv sonuclar.parquet
+def main(argv=None):
+    from utils.batch_ingest import DEFAULT_CHUNKSIZE, iter_blood_chunks
+
+    parser = argparse.ArgumentParser(description="Kan değeri CSV'sini analiz edip sonuçları dışa aktarır")
+    parser.add_argument('source', help="Kan değerleri CSV dosyası")
+    parser.add_argument('target', help="Çıktı dosyası (.csv, .parquet ya da .xlsx)")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help="Çıktı biçimi (varsayılan: dosya uzantısından)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Parça başına satır sayısı")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or next(
+        (fmt for fmt, spec in EXPORT_FORMATS.items() if args.target.lower().endswith(spec['extension'])), None
+    )
+    if fmt is None:
+        parser.error("Çıktı biçimi dosya uzantısından anlaşılamadı; --format kullanın")
+
+    try:
+        rows = write_chunks(iter_blood_chunks(args.source, args.chunksize), fmt, args.target)
+    except (MissingDependencyError, ValueError) as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{rows} satır {args.target} dosyasına yazıldı")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+import cv2
+import numpy as np
+from utils.image_index import content_key, extract_features, make_thumbnail
+from utils.image_processing import ImagePipeline, DEFAULT_PARAMS
+from utils.parallel import ordered_pool_map
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+# Küçük parçalar: aynı anda en fazla 2 × işçi × parça boyutu kadar görüntü bellekte tutulur
+DEFAULT_IMAGE_CHUNKSIZE = 4
+# ZIP bombalarına karşı sınırlar: görüntü sayısı, tek görüntünün ve tüm görüntülerin açılmış boyutu
+MAX_ZIP_IMAGES = 20_000
+MAX_ZIP_IMAGE_BYTES = 64 * 1024 * 1024
+MAX_ZIP_TOTAL_BYTES = 4 * 1024 * 1024 * 1024
+EXTRACT_BLOCK_SIZE = 1024 * 1024
+
+class DirectoryNotAllowedError(ValueError):
+    """İstenen klasör izin verilen görüntü kök klasörünün dışında olduğunda fırlatılır"""
+
+class ArchiveLimitError(ValueError):
+    """ZIP arşivi görüntü sayısı ya da açılmış boyut sınırlarını aştığında fırlatılır"""
+
+def _is_image_name(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS) and not name.endswith('/')
+
+def allowed_image_root():
+    """
+    Sunucudaki klasörlerden toplu analiz için izin verilen kök klasör
+    (ONKONIX_IMAGE_ROOT). Tanımlı değilse None döner ve klasör analizi
+    kapalıdır.
+    """
+    root = os.environ.get('ONKONIX_IMAGE_ROOT')
+    return Path(root).resolve() if root else None
+
+def resolve_image_directory(path, root):
+    """
+    Kullanıcının girdiği klasörü root'a göre çözümler ('..' ve sembolik
+    bağlantılar açılır). Sonuç root'un dışındaysa ya da klasör değilse
+    DirectoryNotAllowedError fırlatır.
+    """
+    root = Path(root).resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise DirectoryNotAllowedError(f"Yalnızca {root} altındaki klasörler analiz edilebilir")
+    if not resolved.is_dir():
+        raise DirectoryNotAllowedError("Klasör bulunamadı")
+    return resolved
+
+def _iter_directory_images(root):
+    # Sembolik bağlantıyla klasör dışına çıkan dosyalar atlanır
+    root = Path(root).resolve()
+    for path in sorted(root.rglob('*')):
+        if path.is_file() and _is_image_name(path.name) and path.resolve().is_relative_to(root):
+            yield path
+
+def _is_directory(source):
+    return isinstance(source, (str, Path)) and Path(source).is_dir()
+
+def _zip_image_members(archive):
+    """
+    Arşivdeki görüntü kayıtlarını ad sırasıyla döndürür. Kayıt sayısı ya da
+    başlıkta bildirilen açılmış boyutlar sınırları aşarsa ArchiveLimitError
+    fırlatır; gerçek boyut açarken ayrıca denetlenir.
+    """
+    members = sorted((info for info in archive.infolist() if _is_image_name(info.filename)),
+                     key=lambda info: info.filename)
+    if len(members) > MAX_ZIP_IMAGES:
+        raise ArchiveLimitError(f"Arşivde en fazla {MAX_ZIP_IMAGES:,} görüntü olabilir ({len(members):,} bulundu)")
+    if any(info.file_size > MAX_ZIP_IMAGE_BYTES for info in members):
+        raise ArchiveLimitError(f"Arşivdeki bir görüntü {MAX_ZIP_IMAGE_BYTES // 2 ** 20} MB sınırını aşıyor")
+    if sum(info.file_size for info in members) > MAX_ZIP_TOTAL_BYTES:
+        raise ArchiveLimitError(f"Arşivin açılmış boyutu {MAX_ZIP_TOTAL_BYTES // 2 ** 30} GB sınırını aşıyor")
+    return members
+
+def _extract_member(archive, info, target, budget):
+    """
+    Kaydı blok blok target dosyasına açar ve yazılan bayt sayısını
+    döndürür. Açılan veri görüntü sınırını ya da kalan toplam bütçeyi
+    aşarsa ArchiveLimitError fırlatır.
+    """
+    limit = min(MAX_ZIP_IMAGE_BYTES, budget)
+    written = 0
+    with archive.open(info) as member, open(target, 'wb') as f:
+        for block in iter(lambda: member.read(EXTRACT_BLOCK_SIZE), b''):
+            written += len(block)
+            if written > limit:
+                raise ArchiveLimitError("Arşivin açılmış boyutu izin verilen sınırı aşıyor")
+            f.write(block)
+    return written
+
+def decode_image(data):
+    """
+    Görüntü baytlarını BGR diziye çözer. bytes/memoryview için
+    np.frombuffer ile kopyasız bir görünüm, dosya yolu için np.fromfile
+    ile doğrudan okunan dizi cv2.imdecode'a verilir; geçici dosya
+    kullanılmaz. Çözülemezse None döndürür.
+    """
+    if isinstance(data, Path):
+        buffer = np.fromfile(data, dtype=np.uint8)
+    else:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+def iter_image_sources(source, extract_dir=None):
+    """
+    Bir klasördeki ya da ZIP arşivindeki görüntüleri (ad, dosya yolu)
+    çiftleri olarak sırayla döndürür; dosyalar işçi süreçte okunur. ZIP
+    kayıtları sınırlar denetlenerek extract_dir altına sırayla açılır
+    (kayıt adları yol olarak kullanılmaz). source bir yol ya da dosya
+    benzeri ZIP nesnesi olabilir.
+    """
+    if _is_directory(source):
+        root = Path(source).resolve()
+        for path in _iter_directory_images(root):
+            yield str(path.relative_to(root)), path
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        budget = MAX_ZIP_TOTAL_BYTES
+        for i, info in enumerate(_zip_image_members(archive)):
+            target = Path(extract_dir) / f'{i:06d}{Path(info.filename).suffix.lower()}'
+            budget -= _extract_member(archive, info, target, budget)
+            yield info.filename, target
+
+def count_image_sources(source):
+    """
+    Klasör ya da ZIP içindeki görüntü sayısını döndürür. ZIP sınırları
+    aşıyorsa analiz başlamadan ArchiveLimitError fırlatır.
+    """
+    if _is_directory(source):
+        return sum(1 for _ in _iter_directory_images(source))
+
+    with zipfile.ZipFile(source) as archive:
+        return len(_zip_image_members(archive))
+
+# İşçi süreç başına tek işlem hattı; tamponlar aynı çözünürlükteki görüntülerde yeniden kullanılır
+_worker_pipeline = None
+_worker_features = False
+
+def _init_image_worker(params, with_features=False):
+    global _worker_pipeline, _worker_features
+    _worker_pipeline = ImagePipeline(**params)
+    _worker_features = with_features
+
+def _analyze_image_item(item):
+    name, data = item
+    if _worker_features and isinstance(data, Path):
+        # Arşiv anahtarı dosya baytlarından hesaplandığı için dosya bir kez okunur
+        data = data.read_bytes()
+    image = decode_image(data)
+    if image is None:
+        return {'goruntu': name, 'anormallik_skoru': None, 'genislik': None, 'yukseklik': None,
+                'hata': "Görüntü okunamadı"}
+
+    enhanced, score = _worker_pipeline.process(image)
+    height, width = image.shape[:2]
+    row = {'goruntu': name, 'anormallik_skoru': score, 'genislik': width, 'yukseklik': height,
+           'hata': None}
+    if _worker_features:
+        # İşlenmiş görüntü bir sonraki çağrıda üzerine yazılacağı için özellikler hemen çıkarılır
+        phash, vector = extract_features(enhanced)
+        row['arsiv'] = {'key': content_key(data), 'phash': phash, 'vector': vector, 'name': name,
+                        'anomaly_score': score, 'thumbnail': make_thumbnail(image)}
+    return row
+
+def _analyze_extracted_item(item):
+    # ZIP'ten açılan geçici dosya okunduktan sonra silinir; disk kullanımı bekleyen parçalarla sınırlı kalır
+    name, path = item
+    data = path.read_bytes()
+    path.unlink(missing_ok=True)
+    return _analyze_image_item((name, data))
+
+def analyze_image_batch(source, workers=None, chunksize=DEFAULT_IMAGE_CHUNKSIZE, params=None, with_features=False):
+    """
+    Klasör ya da ZIP içindeki görüntüleri süreç havuzunda analiz eder ve
+    her görüntü için bir sonuç satırını giriş sırasıyla, hazır oldukça
+    döndürür. İşçilere görüntü baytları değil dosya yolları gönderilir;
+    ZIP kayıtları geçici bir klasöre açılır ve iş bitince silinir.
+    İşlenmiş görüntüler ana sürece taşınmaz; okunamayan dosyalar
+    çalışmayı durdurmaz, 'hata' sütununda raporlanır. with_features
+    verilirse satırlar benzerlik arşivine eklenecek öğeyi 'arsiv'
+    alanında taşır.
+    """
+    options = dict(workers=workers, chunksize=chunksize, initializer=_init_image_worker,
+                   initargs=(dict(params or DEFAULT_PARAMS), with_features))
+    if _is_directory(source):
+        yield from ordered_pool_map(_analyze_image_item, iter_image_sources(source), **options)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='onkonix_images_') as extract_dir:
+        yield from ordered_pool_map(_analyze_extracted_item, iter_image_sources(source, extract_dir), **options)
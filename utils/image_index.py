@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from utils.instrumentation import instrument
+
+DEFAULT_INDEX_DIR = os.path.join('data', 'image_index')
+# Özellikler çözünürlükten bağımsız olsun diye sabit boyutta hesaplanır
+FEATURE_SIZE = (128, 128)
+INTENSITY_BINS = 32
+ORIENTATION_BINS = 16
+MAGNITUDE_BINS = 16
+FEATURE_DIM = INTENSITY_BINS + ORIENTATION_BINS + MAGNITUDE_BINS
+# 3×3 Sobel gradyan büyüklüğü en fazla ~1443'tür; log1p ölçeğinde ~7.3
+MAGNITUDE_LOG_RANGE = (0.0, 7.5)
+# pHash'ler arasında bu kadar ya da daha az farklı bit varsa görüntüler aynı kabul edilir
+DUPLICATE_HAMMING_DISTANCE = 6
+# Model dışında kalan bu kadar yeni kayıt birikince NearestNeighbors yeniden kurulur
+REFIT_PENDING = 1024
+THUMBNAIL_SIZE = 160
+DEFAULT_TOP_K = 5
+# np.bitwise_count NumPy 2.0 ile geldi; eski sürümlerde bayt başına bit sayısı tablosu kullanılır
+_POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1, dtype=np.uint8)
+
+def hamming_distances(hashes, phash):
+    """uint64 pHash dizisi ile tek bir pHash arasındaki farklı bit sayıları"""
+    diff = hashes ^ np.uint64(phash)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(diff)
+    return _POPCOUNT_TABLE[diff.view(np.uint8)].reshape(len(diff), 8).sum(axis=1, dtype=np.uint8)
+
+def content_key(data):
+    """Yüklenen baytların SHA-256 özeti (birebir aynı dosyaları tanımak için)"""
+    return hashlib.sha256(data).hexdigest()
+
+def perceptual_hash(small):
+    """
+    32×32'lik gri görüntünün DCT'sinden 64 bitlik algısal özet (pHash)
+    üretir: en düşük 8×8 frekans katsayısı, DC hariç medyanla
+    karşılaştırılır. Yeniden sıkıştırma ve boyutlandırma özeti pek değiştirmez.
+    """
+    dct = cv2.dct(cv2.resize(small, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32))
+    low = dct[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def _normalized_histogram(values, bins, value_range, weights=None):
+    hist, _ = np.histogram(values, bins=bins, range=value_range, weights=weights)
+    total = hist.sum()
+    # Karekök (Hellinger) dönüşümü: öklid uzaklığı histogram benzerliğini ölçer
+    return np.sqrt(hist / total) if total > 0 else np.zeros(bins)
+
+@instrument(nbytes=lambda enhanced: enhanced.nbytes)
+def extract_features(enhanced):
+    """
+    preprocess_image çıktısından (pHash, özellik vektörü) döndürür.
+    Vektör; yoğunluk histogramı ile doku için gradyan yönü ve büyüklüğü
+    histogramlarından oluşur, birim uzunlukta float32 dizidir.
+    """
+    small = cv2.resize(enhanced, FEATURE_SIZE, interpolation=cv2.INTER_AREA)
+    gx = cv2.Sobel(small, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(small, cv2.CV_32F, 0, 1, ksize=3)
+    magnitude, angle = cv2.cartToPolar(gx, gy, angleInDegrees=True)
+
+    vector = np.concatenate([
+        _normalized_histogram(small, INTENSITY_BINS, (0, 256)),
+        _normalized_histogram(angle, ORIENTATION_BINS, (0, 360), weights=magnitude),
+        _normalized_histogram(np.log1p(magnitude), MAGNITUDE_BINS, MAGNITUDE_LOG_RANGE)
+    ]).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return perceptual_hash(small), vector
+
+def make_thumbnail(image, size=THUMBNAIL_SIZE):
+    """Arşivde gösterilmek üzere uzun kenarı size olan JPEG küçük resim baytları"""
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    if scale < 1:
+        image = cv2.resize(image, (max(int(width * scale), 1), max(int(height * scale), 1)),
+                           interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return encoded.tobytes() if ok else None
+
+class _GrowingArray:
+    """Sona ekleme için kapasitesi ikiye katlanarak büyüyen dizi"""
+
+    def __init__(self, data):
+        self._data = data
+        self.size = len(data)
+
+    def extend(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data), 1024),) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = rows
+        self.size = needed
+
+    @property
+    def values(self):
+        return self._data[:self.size]
+
+class ImageSimilarityIndex:
+    """
+    Arşivlenmiş bronkoskopi görüntüleri için diskte saklanan benzerlik dizini.
+
+    Vektörler (vectors.f32), pHash'ler (hashes.u64) ve kayıt bilgileri
+    (entries.jsonl) yalnızca sona eklenen dosyalarda tutulur; ekleme tüm
+    dizini yeniden yazmaz. Sorgular scikit-learn NearestNeighbors (kaba
+    kuvvet, öklid) ile yapılır. Son eklenen kayıtlar model yeniden
+    kurulana kadar ayrıca taranır ve sonuçlar birleştirilir. Birebir aynı
+    dosyalar SHA-256, yeniden kaydedilmiş kopyalar pHash ile tanınır.
+    """
+
+    def __init__(self, root=DEFAULT_INDEX_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / 'thumbs').mkdir(exist_ok=True)
+        self._vectors_path = self.root / 'vectors.f32'
+        self._hashes_path = self.root / 'hashes.u64'
+        self._entries_path = self.root / 'entries.jsonl'
+        self._lock = threading.Lock()
+        self._model = None
+        self._fitted = 0
+        self._load()
+
+    def _load(self):
+        entries = []
+        broken = False
+        if self._entries_path.exists():
+            with open(self._entries_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Yarım yazılmış son satır
+                        broken = True
+                        break
+
+        vectors = np.fromfile(self._vectors_path, dtype=np.float32) if self._vectors_path.exists() else np.empty(0, np.float32)
+        hashes = np.fromfile(self._hashes_path, dtype=np.uint64) if self._hashes_path.exists() else np.empty(0, np.uint64)
+        count = min(len(entries), len(vectors) // FEATURE_DIM, len(hashes))
+
+        # Yarıda kalmış bir eklemenin artıkları atılır; dosyalar tutarlı uzunluğa kesilir
+        self._entries = entries[:count]
+        if broken or count < len(entries):
+            with open(self._entries_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in self._entries)
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(count * FEATURE_DIM * 4)
+        with open(self._hashes_path, 'ab') as f:
+            f.truncate(count * 8)
+
+        self._vectors = _GrowingArray(vectors[:count * FEATURE_DIM].reshape(count, FEATURE_DIM))
+        self._hashes = _GrowingArray(hashes[:count].copy())
+        self._by_key = {entry['anahtar']: entry for entry in self._entries}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """SHA-256 anahtarıyla arşivdeki kaydı döndürür; yoksa None"""
+        return self._by_key.get(key)
+
+    def vector(self, entry):
+        return self._vectors.values[entry['id']]
+
+    def find_duplicate(self, key, phash, max_distance=DUPLICATE_HAMMING_DISTANCE):
+        """
+        Aynı dosya ya da pHash'i en fazla max_distance bit farklı görüntü
+        arşivde varsa (kayıt, bit farkı) döndürür, yoksa None.
+        """
+        entry = self._by_key.get(key)
+        if entry is not None:
+            return entry, 0
+        with self._lock:
+            hashes = self._hashes.values
+            if len(hashes) == 0:
+                return None
+            distances = hamming_distances(hashes, phash)
+            best = int(np.argmin(distances))
+            if distances[best] > max_distance:
+                return None
+            return self._entries[best], int(distances[best])
+
+    def add(self, key, phash, vector, name, anomaly_score=None, thumbnail=None):
+        """Görüntüyü arşive ekler; aynı dosya zaten varsa eklemez. (kayıt, eklendi_mi) döndürür"""
+        added = self.add_many([{
+            'key': key, 'phash': phash, 'vector': vector, 'name': name,
+            'anomaly_score': anomaly_score, 'thumbnail': thumbnail
+        }])
+        return self._by_key[key], added == 1
+
+    def add_many(self, items):
+        """
+        Öğeleri ('key', 'phash', 'vector', 'name', isteğe bağlı
+        'anomaly_score' ve 'thumbnail') tek seferde ekler ve eklenen kayıt
+        sayısını döndürür. Arşivde ya da listede tekrar eden dosyalar atlanır.
+        """
+        with self._lock:
+            new = []
+            seen = set()
+            for item in items:
+                if item['key'] in self._by_key or item['key'] in seen:
+                    continue
+                seen.add(item['key'])
+                new.append(item)
+            if not new:
+                return 0
+
+            added_at = time.strftime('%Y-%m-%d %H:%M:%S')
+            entries = []
+            for offset, item in enumerate(new):
+                entry = {
+                    'id': len(self._entries) + offset,
+                    'anahtar': item['key'],
+                    'goruntu': item['name'],
+                    'anormallik_skoru': item.get('anomaly_score'),
+                    'eklenme': added_at,
+                    'kucuk_resim': False
+                }
+                if item.get('thumbnail'):
+                    (self.root / 'thumbs' / f"{entry['id']}.jpg").write_bytes(item['thumbnail'])
+                    entry['kucuk_resim'] = True
+                entries.append(entry)
+
+            vectors = np.stack([np.asarray(item['vector'], dtype=np.float32) for item in new])
+            hashes = np.array([item['phash'] for item in new], dtype=np.uint64)
+
+            # Kayıt satırları en son yazılır; yarıda kalan ekleme yüklemede kesilip atılır
+            with open(self._vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._hashes_path, 'ab') as f:
+                f.write(hashes.tobytes())
+            with open(self._entries_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+
+            self._vectors.extend(vectors)
+            self._hashes.extend(hashes)
+            self._entries.extend(entries)
+            self._by_key.update((entry['anahtar'], entry) for entry in entries)
+            return len(entries)
+
+    def _fit(self):
+        from sklearn.neighbors import NearestNeighbors
+        vectors = self._vectors.values
+        self._model = NearestNeighbors(algorithm='brute', metric='euclidean').fit(vectors) if len(vectors) else None
+        self._fitted = len(vectors)
+
+    @instrument()
+    def query(self, vector, k=DEFAULT_TOP_K, exclude=None):
+        """
+        vector'e en yakın k arşiv kaydını yakınlık sırasıyla döndürür. Her
+        kayda 'mesafe' ve kosinüs benzerliği ('benzerlik') eklenir; exclude
+        ile verilen anahtar (ör. sorgulanan görüntünün kendisi) atlanır.
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            total = len(self._entries)
+            if total - self._fitted > REFIT_PENDING or (self._model is None and total > REFIT_PENDING):
+                self._fit()
+            wanted = k + (exclude is not None)
+
+            ids, distances = [], []
+            if self._model is not None and self._fitted:
+                found_distances, found_ids = self._model.kneighbors(vector, min(wanted, self._fitted))
+                ids.append(found_ids[0])
+                distances.append(found_distances[0])
+            pending = self._vectors.values[self._fitted:total]
+            if len(pending):
+                pending_distances = np.linalg.norm(pending - vector, axis=1)
+                ids.append(np.arange(self._fitted, total))
+                distances.append(pending_distances)
+            if not ids:
+                return []
+
+            ids = np.concatenate(ids)
+            distances = np.concatenate(distances)
+            order = np.argsort(distances, kind='stable')
+            results = []
+            for position in order:
+                entry = self._entries[ids[position]]
+                if entry['anahtar'] == exclude:
+                    continue
+                distance = float(distances[position])
+                results.append({**entry, 'mesafe': distance, 'benzerlik': 1 - distance ** 2 / 2})
+                if len(results) == k:
+                    break
+            return results
+
+    def thumbnail(self, entry):
+        """Kaydın küçük resim baytlarını döndürür; yoksa None"""
+        if not entry.get('kucuk_resim'):
+            return None
+        path = self.root / 'thumbs' / f"{entry['id']}.jpg"
+        return path.read_bytes() if path.exists() else None
+
+_image_index = None
+_image_index_lock = threading.Lock()
+
+def get_image_index():
+    """
+    Süreç genelinde paylaşılan görüntü benzerlik dizinini döndürür. Dizin
+    klasörü ONKONIX_IMAGE_INDEX_DIR ortam değişkeniyle değiştirilebilir.
+    """
+    global _image_index
+    with _image_index_lock:
+        if _image_index is None:
+            _image_index = ImageSimilarityIndex(os.environ.get('ONKONIX_IMAGE_INDEX_DIR', DEFAULT_INDEX_DIR))
+        return _image_index
@@ -1,6 +1,17 @@
 import cv2
 import numpy as np
+from utils.instrumentation import instrument
 
+# preprocess_image ve detect_anomalies'in kullandığı parametreler
+DEFAULT_PARAMS = {
+    'clip_limit': 2.0,
+    'tile_grid_size': (8, 8),
+    'blur_ksize': (5, 5),
+    'threshold': 127,
+    'downscale': None
+}
+
+@instrument(nbytes=lambda image: image.nbytes)
 def preprocess_image(image):
     """
     Bronkoskopi görüntülerini ön işlemden geçirir
@@ -17,6 +28,7 @@ def preprocess_image(image):
     
     return enhanced
 
+@instrument(nbytes=lambda image: image.nbytes)
 def detect_anomalies(image):
     """
     Görüntüdeki anormallikleri tespit eder
@@ -31,3 +43,72 @@ def detect_anomalies(image):
     anomaly_score = len(contours) / 100.0
     
     return min(anomaly_score, 1.0)
+
+class ImagePipeline:
+    """
+    Bronkoskopi görüntüleri için yeniden kullanılabilir işlem hattı.
+
+    CLAHE nesnesini ve ara tamponları saklar; çözünürlük değişmedikçe yeni
+    dizi ayırmaz. Döndürülen görüntü bir sonraki çağrıda üzerine yazılır,
+    saklanacaksa kopyalanmalıdır. Nesne iş parçacığı güvenli değildir.
+    """
+
+    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8), blur_ksize=(5, 5), threshold=127, downscale=None):
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        self.blur_ksize = blur_ksize
+        self.threshold = threshold
+        # Eşiklemeden önce isteğe bağlı küçültme oranı (ör. 0.5); None ise küçültme yapılmaz
+        self.downscale = downscale
+        self._buffers = {}
+
+    def params(self):
+        """Sonucu etkileyen parametreleri döndürür"""
+        return {
+            'clip_limit': self.clahe.getClipLimit(),
+            'tile_grid_size': tuple(self.clahe.getTilesGridSize()),
+            'blur_ksize': tuple(self.blur_ksize),
+            'threshold': self.threshold,
+            'downscale': self.downscale
+        }
+
+    def _buffer(self, name, shape, dtype=np.uint8):
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer
+
+    def preprocess(self, image):
+        """preprocess_image ile aynı adımları önceden ayrılmış tamponlara uygular"""
+        shape = image.shape[:2]
+        gray = self._buffer('gray', shape)
+        blurred = self._buffer('blurred', shape)
+        enhanced = self._buffer('enhanced', shape)
+
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+        cv2.GaussianBlur(gray, self.blur_ksize, 0, dst=blurred)
+        self.clahe.apply(blurred, dst=enhanced)
+
+        return enhanced
+
+    def detect(self, image):
+        """detect_anomalies ile aynı skoru eşik tamponunu yeniden kullanarak hesaplar"""
+        if self.downscale:
+            height, width = image.shape[:2]
+            size = (max(int(width * self.downscale), 1), max(int(height * self.downscale), 1))
+            small = self._buffer('small', (size[1], size[0]))
+            cv2.resize(image, size, dst=small, interpolation=cv2.INTER_AREA)
+            image = small
+
+        thresh = self._buffer('thresh', image.shape[:2])
+        cv2.threshold(image, self.threshold, 255, cv2.THRESH_BINARY, dst=thresh)
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        anomaly_score = len(contours) / 100.0
+
+        return min(anomaly_score, 1.0)
+
+    @instrument(nbytes=lambda self, image: image.nbytes)
+    def process(self, image):
+        """Ön işleme ve anormallik tespitini birlikte çalıştırır"""
+        enhanced = self.preprocess(image)
+        return enhanced, self.detect(enhanced)
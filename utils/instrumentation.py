@@ -0,0 +1,200 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+# Gecikme histogramı kova üst sınırları (saniye)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+_enabled = os.environ.get('ONKONIX_METRICS', '1') != '0'
+_lock = threading.Lock()
+_registry = {}
+
+class StageMetrics:
+    """Bir aşamanın çağrı sayısı, gecikme histogramı ve işlenen bayt sayısı"""
+
+    __slots__ = ('count', 'errors', 'total_seconds', 'max_seconds', 'bytes', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, seconds, nbytes, failed):
+        self.count += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += nbytes
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if seconds <= upper:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q):
+        """Histogramdan kova içi doğrusal enterpolasyonla yaklaşık yüzdelik"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(LATENCY_BUCKETS, self.buckets):
+            if count and seen + count >= rank:
+                if math.isinf(upper):
+                    return self.max_seconds
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.max_seconds
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_seconds': self.total_seconds,
+            'mean_seconds': self.total_seconds / self.count if self.count else None,
+            'max_seconds': self.max_seconds,
+            'p50_seconds': self.quantile(0.5),
+            'p95_seconds': self.quantile(0.95),
+            'bytes': self.bytes,
+            'buckets': dict(zip(map(str, LATENCY_BUCKETS), self.buckets))
+        }
+
+def is_enabled():
+    return _enabled
+
+def set_enabled(enabled):
+    """Ölçümü açar ya da kapatır (kapalıyken sarmalayıcılar doğrudan çağırır)"""
+    global _enabled
+    _enabled = bool(enabled)
+
+def record(name, seconds, nbytes=0, failed=False):
+    """Bir aşama ölçümünü kaydeder"""
+    with _lock:
+        metrics = _registry.get(name)
+        if metrics is None:
+            metrics = _registry[name] = StageMetrics()
+        metrics.observe(seconds, nbytes, failed)
+
+class _Stage:
+    __slots__ = ('name', 'nbytes', 'start')
+
+    def __init__(self, name, nbytes):
+        self.name = name
+        self.nbytes = nbytes
+
+    def add_bytes(self, nbytes):
+        self.nbytes += nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start, self.nbytes, exc_type is not None)
+        return False
+
+class _NullStage:
+    __slots__ = ()
+
+    def add_bytes(self, nbytes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name, nbytes=0):
+    """
+    Bir kod bloğunun süresini ölçen bağlam yöneticisi. Blok içinde
+    add_bytes() ile işlenen bayt sayısı eklenebilir.
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, nbytes)
+
+def instrument(name=None, nbytes=None):
+    """
+    Fonksiyon çağrılarını ölçen dekoratör. nbytes verilirse çağrı
+    argümanlarıyla çağrılır ve işlenen bayt sayısını döndürmelidir.
+    """
+    def decorator(fn):
+        stage_name = name or f'{fn.__module__}.{fn.__qualname__}'
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                size = 0
+                if nbytes is not None:
+                    try:
+                        size = nbytes(*args, **kwargs)
+                    except Exception:
+                        size = 0
+                record(stage_name, time.perf_counter() - start, size, failed)
+
+        return wrapper
+    return decorator
+
+def snapshot():
+    """Tüm aşama ölçümlerini sözlük olarak döndürür"""
+    with _lock:
+        return {name: metrics.as_dict() for name, metrics in sorted(_registry.items())}
+
+def reset():
+    """Kayıtlı tüm ölçümleri siler"""
+    with _lock:
+        _registry.clear()
+
+def export_json():
+    return json.dumps({'enabled': _enabled, 'stages': snapshot()}, indent=2)
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+def export_prometheus():
+    """Ölçümleri Prometheus metin biçiminde döndürür"""
+    lines = [
+        '# HELP onkonix_stage_latency_seconds Aşama gecikmesi',
+        '# TYPE onkonix_stage_latency_seconds histogram'
+    ]
+    with _lock:
+        items = sorted(_registry.items())
+        for name, metrics in items:
+            label = _label(name)
+            cumulative = 0
+            for upper, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                cumulative += count
+                le = '+Inf' if math.isinf(upper) else repr(upper)
+                lines.append(f'onkonix_stage_latency_seconds_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'onkonix_stage_latency_seconds_sum{{stage="{label}"}} {metrics.total_seconds}')
+            lines.append(f'onkonix_stage_latency_seconds_count{{stage="{label}"}} {metrics.count}')
+
+        lines.append('# HELP onkonix_stage_bytes_total Aşamada işlenen bayt')
+        lines.append('# TYPE onkonix_stage_bytes_total counter')
+        for name, metrics in items:
+            lines.append(f'onkonix_stage_bytes_total{{stage="{_label(name)}"}} {metrics.bytes}')
+
+        lines.append('# HELP onkonix_stage_errors_total Hata ile biten çağrılar')
+        lines.append('# TYPE onkonix_stage_errors_total counter')
+        for name, metrics in items:
+            lines.append(f'onkonix_stage_errors_total{{stage="{_label(name)}"}} {metrics.errors}')
+
+    return '\n'.join(lines) + '\n'
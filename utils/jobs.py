@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils.instrumentation import stage
+
+DEFAULT_JOB_DIR = os.path.join('data', 'jobs')
+DEFAULT_JOB_WORKERS = 2
+# İlerleme diske en fazla bu aralıkla yazılır; arayüz de bu sıklıkta yoklar
+PROGRESS_INTERVAL = 1.0
+# Girdi dosyaları iş klasörüne bu boyutta bloklarla kopyalanır
+COPY_BLOCK_SIZE = 1024 * 1024
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+STATUS_LABELS = {
+    QUEUED: 'Sırada',
+    RUNNING: 'Çalışıyor',
+    DONE: 'Tamamlandı',
+    FAILED: 'Hata',
+    CANCELLED: 'İptal edildi'
+}
+
+_JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+class JobCancelled(Exception):
+    """İş, kullanıcı tarafından iptal edildiğinde iş fonksiyonu içinde fırlatılır"""
+
+class JobContext:
+    """
+    İş fonksiyonuna verilen bağlam. İlerleme bildirimi, iptal kontrolü ve
+    işe ait sonuç klasörünü sağlar.
+    """
+
+    def __init__(self, manager, job_id):
+        self._manager = manager
+        self.job_id = job_id
+        self.job_dir = manager.job_dir(job_id)
+        self._cancel_event = threading.Event()
+        self._last_flush = 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """İş iptal edildiyse JobCancelled fırlatır"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, progress, message=None, detail=None):
+        """
+        İlerlemeyi (0..1) bellekte günceller. Durum dosyası her çağrıda
+        değil, en fazla PROGRESS_INTERVAL saniyede bir yazılır.
+        """
+        now = time.monotonic()
+        flush = now - self._last_flush >= PROGRESS_INTERVAL
+        if flush:
+            self._last_flush = now
+        self._manager._update(self.job_id, flush, progress=min(max(float(progress), 0.0), 1.0),
+                              message=message, detail=detail)
+
+class JobManager:
+    """
+    Uzun süren analizler için yerel arka plan iş kuyruğu.
+
+    İşler bir iş parçacığı havuzunda Streamlit betiğinden bağımsız çalışır;
+    sayfa yeniden çalışsa ya da tarayıcı bağlantısı kopsa da devam eder.
+    Her işin durumu ve sonuçları root altındaki kendi klasöründe saklanır,
+    böylece iş kimliğini bilen herhangi bir oturum sonuca ulaşabilir.
+
+    Sınırlama: iş parçacıkları Streamlit süreci içinde çalışır. CSV
+    puanlama gibi işlemci yoğun işler arayüzle aynı GIL'i paylaşır ve
+    sayfaları yavaşlatabilir. Aynı anda en fazla max_workers iş çalışır,
+    fazlası sırada ('queued') bekler. Çok çekirdekli sunucularda
+    ONKONIX_JOB_WORKERS ile artırılabilir; görüntü toplu işleri zaten
+    kendi süreç havuzunu (utils.parallel) kullanır.
+    """
+
+    def __init__(self, root=DEFAULT_JOB_DIR, max_workers=DEFAULT_JOB_WORKERS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max(int(max_workers), 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='onkonix-job')
+        self._jobs = {}
+        self._contexts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_valid_id(job_id):
+        return bool(job_id) and _JOB_ID_PATTERN.fullmatch(job_id) is not None
+
+    def job_dir(self, job_id):
+        return self.root / job_id
+
+    def _write_status(self, job):
+        path = self.job_dir(job['id']) / 'job.json'
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(job, ensure_ascii=False, default=str), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def _update(self, job_id, flush=True, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update({key: value for key, value in fields.items() if value is not None})
+            snapshot = dict(job)
+        if flush:
+            self._write_status(snapshot)
+
+    def submit(self, kind, fn, *args, name=None, files=None, **kwargs):
+        """
+        fn(context, *args, **kwargs) çağrısını kuyruğa ekler ve iş kimliğini
+        döndürür. fn'in döndürdüğü JSON uyumlu değer işin 'result' alanına
+        yazılır; büyük sonuçlar context.job_dir altına kaydedilmelidir.
+        files ({dosya adı: ikili dosya nesnesi}) iş klasörüne bloklar halinde
+        kopyalanır; büyük girdiler iş süresince bellekte tutulmaz.
+        """
+        job_id = uuid.uuid4().hex
+        self.job_dir(job_id).mkdir(parents=True)
+        for file_name, source in (files or {}).items():
+            with open(self.job_dir(job_id) / file_name, 'wb') as target:
+                shutil.copyfileobj(source, target, COPY_BLOCK_SIZE)
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'name': name or kind,
+            'status': QUEUED,
+            'progress': 0.0,
+            'message': None,
+            'detail': None,
+            'result': None,
+            'error': None,
+            'error_type': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        context = JobContext(self, job_id)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._contexts[job_id] = context
+        self._write_status(job)
+
+        self._executor.submit(self._run, context, kind, fn, args, kwargs)
+        return job_id
+
+    def _run(self, context, kind, fn, args, kwargs):
+        if context.cancelled:
+            self._update(context.job_id, status=CANCELLED, finished_at=time.time())
+            return
+
+        self._update(context.job_id, status=RUNNING, started_at=time.time())
+        try:
+            with stage(f'job.{kind}'):
+                result = fn(context, *args, **kwargs)
+        except JobCancelled:
+            self._update(context.job_id, status=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            self._update(context.job_id, status=FAILED, error=str(e), error_type=type(e).__name__,
+                         finished_at=time.time())
+        else:
+            self._update(context.job_id, status=DONE, progress=1.0, result=result, finished_at=time.time())
+        finally:
+            with self._lock:
+                self._contexts.pop(context.job_id, None)
+
+    def status(self, job_id):
+        """
+        İşin güncel durumunu döndürür. Bu süreçte bilinmeyen işler diskten
+        okunur; süreç yeniden başladığı için yarım kalmış işler 'failed'
+        olarak bildirilir. İş yoksa None döndürür.
+        """
+        if not self.is_valid_id(job_id):
+            return None
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+
+        path = self.job_dir(job_id) / 'job.json'
+        try:
+            job = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+        if job['status'] not in FINISHED_STATES:
+            job['status'] = FAILED
+            job['error'] = "Sunucu yeniden başladığı için iş yarıda kaldı"
+        return job
+
+    def cancel(self, job_id):
+        """Çalışan ya da sıradaki işi iptal eder; iş bir sonraki kontrol noktasında durur"""
+        with self._lock:
+            context = self._contexts.get(job_id)
+        if context is None:
+            return False
+        context._cancel_event.set()
+
+        # Henüz başlamamış iş hemen iptal edilmiş görünür
+        with self._lock:
+            queued = self._jobs[job_id]['status'] == QUEUED
+        if queued:
+            self._update(job_id, status=CANCELLED, finished_at=time.time())
+        return True
+
+    def list_jobs(self, kind=None):
+        """Diskteki tüm işleri en yeniden eskiye doğru döndürür"""
+        jobs = []
+        for path in self.root.iterdir():
+            if self.is_valid_id(path.name):
+                job = self.status(path.name)
+                if job is not None and (kind is None or job['kind'] == kind):
+                    jobs.append(job)
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+
+    def delete(self, job_id):
+        """Bitmiş bir işin klasörünü siler"""
+        job = self.status(job_id)
+        if job is None or job['status'] not in FINISHED_STATES:
+            return False
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return True
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """
+    Süreç genelinde (tüm oturumlarca) paylaşılan iş yöneticisini döndürür.
+    Klasör ONKONIX_JOB_DIR, eşzamanlı iş sayısı ONKONIX_JOB_WORKERS
+    (varsayılan 2) ile değiştirilebilir.
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(
+                os.environ.get('ONKONIX_JOB_DIR', DEFAULT_JOB_DIR),
+                int(os.environ.get('ONKONIX_JOB_WORKERS', DEFAULT_JOB_WORKERS))
+            )
+        return _job_manager
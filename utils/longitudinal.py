@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+from utils.instrumentation import instrument
+
+STAT_COLUMNS = ['hasta_id', 'rapor_tarihi', 'risk_skoru', 'delta', 'egim', 'kayan_ortalama', 'en_yuksek']
+
+def _window_sums(values, group_ids, positions, window):
+    """Grup içi kayan pencere toplamlarını kümülatif toplam farkıyla hesaplar"""
+    cumulative = pd.Series(values).groupby(group_ids).cumsum().to_numpy()
+    shifted = np.zeros_like(cumulative)
+    has_previous = positions >= window
+    shifted[has_previous] = cumulative[np.nonzero(has_previous)[0] - window]
+    return cumulative - shifted
+
+def _patient_keys(patient_ids):
+    """Hasta kimliklerini motorun kullandığı tekil metin anahtarlara çevirir"""
+    return pd.unique(pd.Series(patient_ids, dtype=object).astype(str).astype(object))
+
+class LongitudinalEngine:
+    """
+    Hasta bazında (hasta_id) sıralı risk zaman serileri tutar ve kayan
+    pencere istatistiklerini hesaplar: önceki sonuca göre fark, günlük
+    eğim (en küçük kareler), kayan ortalama ve o güne kadarki en yüksek
+    risk. Yeni bir parti geldiğinde yalnızca partide bulunan hastaların
+    serileri yeniden hesaplanır.
+
+    İstatistikler her güncellemenin sonucu olan bloklarda tutulur; her
+    hastanın güncel serisinin yeri (blok, başlangıç, bitiş) bir sözlükte
+    saklanır. Güncelleme, etkilenen hastaların eski satırlarını yalnızca
+    geçersiz işaretler ve yeni bloğu ekler; tüm kohort tablosu
+    kopyalanmaz. Geçersiz satırlar toplamın yarısını aşınca bloklar
+    birleştirilir (amortize sabit maliyet).
+
+    Hasta kimlikleri metne çevrilerek tutulur; sayı ve metin karışık
+    kimlikler aynı hastayı gösterir ve sıralamada hata vermez.
+    """
+
+    def __init__(self, window=3):
+        self.window = window
+        self._blocks = []
+        self._alive = []
+        self._location = {}
+        self._rows = 0
+        self._dead = 0
+
+    @staticmethod
+    def _empty():
+        return pd.DataFrame({
+            'hasta_id': pd.Series(dtype=object),
+            'rapor_tarihi': pd.Series(dtype='datetime64[ns]'),
+            **{col: pd.Series(dtype=float) for col in STAT_COLUMNS[2:]}
+        })
+
+    @property
+    def stats(self):
+        """Tüm hastaların güncel serileri (okuma için birleştirilir, O(kohort))"""
+        parts = [block[alive] for block, alive in zip(self._blocks, self._alive) if alive.any()]
+        if not parts:
+            return self._empty()
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].reset_index(drop=True)
+
+    @property
+    def patient_count(self):
+        return len(self._location)
+
+    def untracked(self, patient_ids):
+        """Verilen hastalardan henüz serisi tutulmayanları döndürür"""
+        return [patient_id for patient_id in _patient_keys(patient_ids) if patient_id not in self._location]
+
+    def _compute(self, df):
+        """Hasta ve tarihe göre sıralı satırlar için istatistikleri hesaplar"""
+        df = df.reset_index(drop=True)
+        ids = df['hasta_id'].to_numpy()
+        risk = df['risk_skoru'].to_numpy(dtype=float)
+        groups = df.groupby('hasta_id', sort=False)
+
+        positions = groups.cumcount().to_numpy()
+        is_first = positions == 0
+
+        delta = np.diff(risk, prepend=np.nan)
+        delta[is_first] = np.nan
+
+        # Sayısal kararlılık için gün ekseni her hastanın ilk tarihinden başlar
+        days = (df['rapor_tarihi'] - groups['rapor_tarihi'].transform('first')).dt.total_seconds().to_numpy() / 86400
+
+        n = np.minimum(positions + 1, self.window).astype(float)
+        sum_x = _window_sums(days, ids, positions, self.window)
+        sum_y = _window_sums(risk, ids, positions, self.window)
+        sum_xy = _window_sums(days * risk, ids, positions, self.window)
+        sum_xx = _window_sums(days * days, ids, positions, self.window)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denominator = n * sum_xx - sum_x ** 2
+            slope = np.where(np.abs(denominator) > 1e-12, (n * sum_xy - sum_x * sum_y) / denominator, np.nan)
+
+        return pd.DataFrame({
+            'hasta_id': ids,
+            'rapor_tarihi': df['rapor_tarihi'].to_numpy(),
+            'risk_skoru': risk,
+            'delta': delta,
+            'egim': slope,
+            'kayan_ortalama': sum_y / n,
+            'en_yuksek': groups['risk_skoru'].cummax().to_numpy()
+        })
+
+    def _add_block(self, frame):
+        """Hasta ve tarihe göre sıralı bloğu ekler ve hastaların konumlarını günceller"""
+        block_no = len(self._blocks)
+        self._blocks.append(frame)
+        self._alive.append(np.ones(len(frame), dtype=bool))
+        self._rows += len(frame)
+
+        ids = frame['hasta_id'].to_numpy()
+        starts = np.concatenate([[0], np.flatnonzero(ids[1:] != ids[:-1]) + 1])
+        stops = np.append(starts[1:], len(ids))
+        for patient_id, start, stop in zip(ids[starts], starts.tolist(), stops.tolist()):
+            self._location[patient_id] = (block_no, start, stop)
+
+    def _gather(self, patient_ids, last_only=False):
+        """Hastaların güncel satırlarını konum sözlüğünden (blok bazında) toplar"""
+        rows = {}
+        for patient_id in patient_ids:
+            location = self._location.get(patient_id)
+            if location is not None:
+                block_no, start, stop = location
+                rows.setdefault(block_no, []).append(
+                    np.arange(stop - 1, stop) if last_only else np.arange(start, stop)
+                )
+        return [self._blocks[block_no].iloc[np.concatenate(positions)] for block_no, positions in rows.items()]
+
+    def _compact(self):
+        stats = self.stats
+        self._blocks, self._alive, self._location = [], [], {}
+        self._rows = self._dead = 0
+        if len(stats):
+            self._add_block(stats)
+
+    @instrument(nbytes=lambda self, batch_df: int(batch_df.memory_usage(index=False).sum()))
+    def update(self, batch_df):
+        """
+        Yeni parti sonuçlarını ekler ve yalnızca etkilenen hastaların
+        istatistiklerini yeniden hesaplar. Etkilenen hastaların güncel
+        serilerini döndürür.
+        """
+        batch = batch_df[['hasta_id', 'rapor_tarihi', 'risk_skoru']].copy()
+        batch['hasta_id'] = batch['hasta_id'].astype(str).astype(object)
+        batch['rapor_tarihi'] = pd.to_datetime(batch['rapor_tarihi'], errors='coerce')
+        batch = batch.dropna(subset=['rapor_tarihi', 'risk_skoru'])
+        if batch.empty:
+            return self._empty()
+
+        affected = batch['hasta_id'].unique()
+        previous = [part[['hasta_id', 'rapor_tarihi', 'risk_skoru']] for part in self._gather(affected)]
+
+        # Etkilenen hastaların eski satırları geçersiz sayılır
+        for patient_id in affected:
+            location = self._location.get(patient_id)
+            if location is not None:
+                block_no, start, stop = location
+                self._alive[block_no][start:stop] = False
+                self._dead += stop - start
+
+        touched = pd.concat(previous + [batch], ignore_index=True) if previous else batch
+        touched = touched.sort_values(['hasta_id', 'rapor_tarihi'], kind='stable')
+
+        recomputed = self._compute(touched)
+        self._add_block(recomputed)
+        if self._dead * 2 > self._rows:
+            self._compact()
+
+        return recomputed
+
+    def patient_series(self, patient_ids):
+        """Verilen hastaların sıralı serilerini döndürür"""
+        parts = self._gather(_patient_keys(patient_ids))
+        return pd.concat(parts, ignore_index=True) if parts else self._empty()
+
+    def latest(self, patient_ids=None):
+        """
+        Her hastanın en son kaydını döndürür. patient_ids verilirse yalnızca
+        bu hastalar toplanır (kohort boyutundan bağımsız).
+        """
+        if patient_ids is None:
+            stats = self.stats
+            if stats.empty:
+                return stats
+            return stats.groupby('hasta_id', sort=False).tail(1).reset_index(drop=True)
+
+        parts = self._gather(_patient_keys(patient_ids), last_only=True)
+        return pd.concat(parts, ignore_index=True) if parts else self._empty()
@@ -0,0 +1,67 @@
+import importlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from utils.instrumentation import record
+
+# Modül adı -> ilk (soğuk) içe aktarma süresi (saniye)
+_import_times = OrderedDict()
+_startup = {}
+_lock = threading.Lock()
+
+def record_startup(seconds):
+    """Uygulama betiğinin süreçteki ilk çalışma süresini bir kez kaydeder"""
+    with _lock:
+        if 'app' in _startup:
+            return
+        _startup['app'] = seconds
+    record('startup.app', seconds)
+
+def startup_times():
+    """Başlangıç ve sayfa modülü soğuk içe aktarma sürelerini döndürür"""
+    with _lock:
+        return {'startup': dict(_startup), 'imports': dict(_import_times)}
+
+def _import_page_module(module_name):
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    seconds = time.perf_counter() - start
+
+    with _lock:
+        _import_times.setdefault(module_name, seconds)
+    record(f'import.{module_name}', seconds)
+    return module
+
+class PageRegistry:
+    """
+    Navigasyon etiketlerini sayfa giriş noktalarına eşler. Hedef ya bir
+    fonksiyon ya da 'paket.modul:fonksiyon' biçiminde bir yoldur; yol
+    verilen sayfaların modülleri (cv2, plotly vb. ile birlikte) yalnızca
+    sayfa ilk açıldığında içe aktarılır.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+
+    def register(self, label, target):
+        self._entries[label] = target
+        return target
+
+    def labels(self):
+        return list(self._entries)
+
+    def resolve(self, label):
+        """Etikete ait giriş fonksiyonunu (gerekirse modülünü yükleyerek) döndürür"""
+        target = self._entries[label]
+        if callable(target):
+            return target
+
+        module_name, function_name = target.split(':')
+        return getattr(_import_page_module(module_name), function_name)
+
+    def render(self, label):
+        self.resolve(label)()
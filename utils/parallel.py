@@ -0,0 +1,53 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+def default_workers():
+    """Varsayılan işçi süreç sayısı"""
+    return max(os.cpu_count() or 1, 1)
+
+def _chunks(items, chunksize):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+def _run_chunk(fn, chunk):
+    return [fn(item) for item in chunk]
+
+def ordered_pool_map(fn, items, workers=None, chunksize=32, initializer=None, initargs=()):
+    """
+    fn fonksiyonunu öğelere bir süreç havuzunda parça parça uygular ve
+    sonuçları giriş sırasıyla akış halinde döndürür.
+
+    Aynı anda en fazla 2 × workers parça bekletilir; böylece girdi bir
+    üreteç olduğunda bellek kullanımı sınırlı kalır. workers=1 ise havuz
+    kurulmadan aynı süreçte çalışılır.
+    """
+    workers = workers or default_workers()
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield fn(item)
+        return
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        try:
+            for chunk in _chunks(items, chunksize):
+                pending.append(executor.submit(_run_chunk, fn, chunk))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Tüketici erken durursa bekleyen parçaları iptal et
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,175 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.instrumentation import instrument
+
+CANCER_TYPES = {
+    'NSCLC': ['Adenokarsinom', 'Skuamöz hücreli karsinom', 'Büyük hücreli karsinom'],
+    'SCLC': ['Küçük hücreli karsinom']
+}
+
+# Evre başına risk puanı (Evre I: 2, II: 4, III: 6, IV: 8)
+RISK_PER_STAGE = 2
+
+ROMAN_STAGES = {'0': 0, 'I': 1, 'II': 2, 'III': 3, 'IV': 4}
+STAGE_NAMES = {0: '0', 1: 'I', 2: 'II', 3: 'III', 4: 'IV'}
+
+# "Stage II", "Evre IIIA", "evre 3b", "IVA" gibi açık evre ifadeleri
+STAGE_PATTERN = re.compile(
+    r'(?:\b(?:stage|evre)\s*:?\s*|^\s*)(iv|i{1,3}|[0-4])\s*([abc])?(?![a-z0-9])',
+    re.IGNORECASE
+)
+# "T2N1M0", "pT2a N1 M0", "cT4 N3 M1b" gibi TNM ifadeleri
+TNM_PATTERN = re.compile(
+    r'\b[cpyr]{0,2}t(is|[0-4x])(mi|[abc])?\s*n([0-3x])\s*m([01x])([abc])?',
+    re.IGNORECASE
+)
+
+# AJCC 8. baskı akciğer evrelemesi: M0 için (T grubu, N) -> evre
+# AJCC 8: M1a ve M1b evre IVA, M1c evre IVB; alt grup yoksa IV
+_M1_STAGES = {None: 'IV', 'a': 'IVA', 'b': 'IVA', 'c': 'IVB'}
+_T_GROUPS = {'1': 'T1', '2a': 'T2a', '2b': 'T2b', '3': 'T3', '4': 'T4'}
+_TNM_STAGES = {
+    'T1': ('IA', 'IIB', 'IIIA', 'IIIB'),
+    'T2a': ('IB', 'IIB', 'IIIA', 'IIIB'),
+    'T2b': ('IIA', 'IIB', 'IIIA', 'IIIB'),
+    'T3': ('IIB', 'IIIA', 'IIIB', 'IIIC'),
+    'T4': ('IIIA', 'IIIA', 'IIIB', 'IIIC')
+}
+
+def turkish_casefold(text):
+    """Türkçe büyük/küçük harf kurallarıyla (I→ı, İ→i) küçültür ve boşlukları sadeleştirir"""
+    return ' '.join(text.replace('I', 'ı').replace('İ', 'i').lower().split())
+
+def histology_key(text):
+    """
+    Histoloji eşleme anahtarı. Türkçe klavye dışında girilen kayıtlarda
+    'HÜCRELI' gibi yazımlar sık olduğundan ı ve i aynı kabul edilir.
+    """
+    return turkish_casefold(text).replace('ı', 'i')
+
+def _tnm_stage(t, t_suffix, n, m, m_suffix):
+    """TNM bileşenlerinden (evre numarası, evre) döndürür; hesaplanamazsa None"""
+    if m == '1':
+        return 4, _M1_STAGES[m_suffix]
+    if t == 'is' and n == '0' and m == '0':
+        return 0, '0'
+    if 'x' in (t, n, m) or t == 'is' or t == '0':
+        return None
+
+    if t == '2':
+        # T2 alt grubu belirtilmemişse T2a kabul edilir
+        t_group = _T_GROUPS['2b' if t_suffix == 'b' else '2a']
+    else:
+        t_group = _T_GROUPS[t]
+    stage = _TNM_STAGES[t_group][int(n)]
+    return ROMAN_STAGES[stage.rstrip('ABC')], stage
+
+@lru_cache(maxsize=4096)
+def parse_stage(text):
+    """
+    Evre metnini (evre numarası, evre) çiftine çevirir: 'Evre IIIA' ->
+    (3, 'IIIA'). Açık evre yoksa TNM ifadesinden evre hesaplanır.
+    Tanınmayan metinler hata fırlatmaz, (None, None) döndürür.
+    """
+    if not isinstance(text, str):
+        return None, None
+
+    # Roma rakamları Türkçe büyük/küçük harf dönüşümünden etkilenmesin
+    text = text.replace('İ', 'I').replace('ı', 'i')
+
+    match = STAGE_PATTERN.search(text)
+    if match:
+        numeral, substage = match.groups()
+        number = int(numeral) if numeral.isdigit() else ROMAN_STAGES[numeral.upper()]
+        return number, STAGE_NAMES[number] + (substage.upper() if substage and number else '')
+
+    match = TNM_PATTERN.search(text)
+    if match:
+        t, t_suffix, n, m, m_suffix = (group.lower() if group else None for group in match.groups())
+        staged = _tnm_stage(t, t_suffix, n, m, m_suffix)
+        if staged:
+            return staged
+
+    return None, None
+
+def stage_risk(stage_number):
+    """Evre numarasından risk seviyesini hesaplar; evre bilinmiyorsa 0"""
+    return (stage_number or 0) * RISK_PER_STAGE
+
+class PathologyClassifier:
+    """
+    Patoloji kayıtlarını toplu olarak sınıflandırır.
+
+    Histoloji → kanser tipi eşlemesi, Türkçe küçük harfe çevrilmiş
+    anahtarlarla bir kez sözlüğe dönüştürülür. Kayıtlardaki histoloji ve
+    evre metinleri önce tekil değerlere indirgenir (factorize); eşleme ve
+    evre ayrıştırma yalnızca tekil değerler üzerinde yapılıp sonuçlar
+    kodlarla tüm satırlara dağıtılır. Tanınmayan değerler boş kalır,
+    işlem yarıda kesilmez.
+    """
+
+    def __init__(self, cancer_types=None):
+        self.cancer_types = cancer_types or CANCER_TYPES
+        self.type_names = list(self.cancer_types)
+        self.histology_index = {
+            histology_key(subtype): type_name
+            for type_name, subtypes in self.cancer_types.items()
+            for subtype in subtypes
+        }
+
+    def cancer_type(self, histology):
+        """Tek bir histoloji metninin kanser tipini döndürür; bilinmiyorsa None"""
+        if not isinstance(histology, str):
+            return None
+        return self.histology_index.get(histology_key(histology))
+
+    @instrument()
+    def classify(self, records):
+        """
+        DataFrame ya da kayıt listesini ('histology', 'stage' alanları)
+        sınıflandırır ve giriş sırasıyla kanser_tipi (category), evre
+        (string), evre_no (Int8) ve risk_seviyesi (int8) sütunlarını döndürür.
+        """
+        frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(records)
+        index = frame.index
+        empty = pd.Series([None] * len(frame), index=index, dtype=object)
+        histology = frame['histology'] if 'histology' in frame.columns else empty
+        stage = frame['stage'] if 'stage' in frame.columns else empty
+
+        # Kanser tipi: tekil histolojiler sözlükten bulunur, kodlar kategoriye çevrilir
+        codes, uniques = pd.factorize(histology.to_numpy(dtype=object))
+        type_codes = np.array(
+            [self._type_code(value) for value in uniques] + [-1], dtype=np.int8
+        )[codes]
+        cancer_type = pd.Categorical.from_codes(type_codes, categories=self.type_names)
+
+        # Evre: tekil evre metinleri bir kez ayrıştırılır
+        codes, uniques = pd.factorize(stage.to_numpy(dtype=object))
+        parsed = [parse_stage(value) for value in uniques] + [(None, None)]
+        numbers = np.array([-1 if number is None else number for number, _ in parsed], dtype=np.int8)[codes]
+        names = np.array([name for _, name in parsed], dtype=object)[codes]
+        known = numbers >= 0
+
+        return pd.DataFrame({
+            'kanser_tipi': cancer_type,
+            'evre': pd.array(names, dtype='string'),
+            'evre_no': pd.arrays.IntegerArray(np.where(known, numbers, 0).astype(np.int8), ~known),
+            'risk_seviyesi': (np.where(known, numbers, 0) * RISK_PER_STAGE).astype(np.int8)
+        }, index=index)
+
+    def _type_code(self, histology):
+        type_name = self.cancer_type(histology)
+        return -1 if type_name is None else self.type_names.index(type_name)
+
+_classifier = PathologyClassifier()
+
+def get_pathology_classifier():
+    """Varsayılan CANCER_TYPES eşlemesiyle kurulmuş paylaşılan sınıflandırıcıyı döndürür"""
+    return _classifier
+
+def classify_pathology(records, cancer_types=None):
+    """Varsayılan ya da verilen eşlemeyle patoloji kayıtlarını toplu sınıflandırır"""
+    classifier = _classifier if cancer_types is None else PathologyClassifier(cancer_types)
+    return classifier.classify(records)
@@ -0,0 +1,516 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.data_analysis import REFERENCE_RANGES, HIGH_RISK_THRESHOLD
+from utils.instrumentation import instrument
+
+DEFAULT_DB_PATH = 'data/onkonix.db'
+LAB_COLUMNS = [param.lower() for param in REFERENCE_RANGES]
+INSERT_BATCH_SIZE = 10_000
+# Geçmiş sorgularında tek IN listesine konan hasta sayısı (SQLite parametre sınırı)
+HISTORY_QUERY_SIZE = 500
+# Kohort risk dağılımı için tam sayı kovalar (0-1, 1-2, ..., 9-10)
+RISK_BUCKETS = 10
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    full_name TEXT,
+    birth_date TEXT,
+    sex TEXT,
+    diagnosis TEXT,
+    treatment_start TEXT
+);
+
+CREATE TABLE IF NOT EXISTS ingest_batches (
+    batch_id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    source_name TEXT,
+    ingested_at TEXT NOT NULL DEFAULT (datetime('now')),
+    row_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS lab_panels (
+    panel_id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    {', '.join(f'{column} REAL' for column in LAB_COLUMNS)},
+    risk_score REAL,
+    abnormal_count INTEGER,
+    abnormal_mask INTEGER,
+    batch_id INTEGER REFERENCES ingest_batches(batch_id)
+);
+CREATE INDEX IF NOT EXISTS idx_lab_panels_patient_date ON lab_panels(patient_id, report_date);
+CREATE INDEX IF NOT EXISTS idx_lab_panels_date ON lab_panels(report_date);
+
+CREATE TABLE IF NOT EXISTS pathology (
+    pathology_id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    histology TEXT,
+    stage TEXT,
+    differentiation TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pathology_patient_date ON pathology(patient_id, report_date);
+
+CREATE TABLE IF NOT EXISTS treatments (
+    treatment_id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    treatment_date TEXT NOT NULL,
+    procedure TEXT,
+    notes TEXT,
+    blood_status TEXT,
+    dose_adjustment TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_treatments_patient_date ON treatments(patient_id, treatment_date);
+"""
+
+# Kohort özetleri: panel eklenip silindikçe artımlı güncellenir, ana sayfa
+# ham tabloları taramadan yalnızca bunları okur
+COHORT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cohort_daily (
+    report_date TEXT PRIMARY KEY,
+    panel_count INTEGER NOT NULL DEFAULT 0,
+    risk_count INTEGER NOT NULL DEFAULT 0,
+    risk_sum REAL NOT NULL DEFAULT 0,
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    abnormal_panel_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS cohort_risk_buckets (
+    bucket INTEGER PRIMARY KEY,
+    panel_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS cohort_parameters (
+    param TEXT PRIMARY KEY,
+    measured_count INTEGER NOT NULL DEFAULT 0,
+    abnormal_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Parti başına parametre kantil özetleri (utils.sketches, JSON)
+CREATE TABLE IF NOT EXISTS cohort_batch_sketches (
+    batch_id INTEGER PRIMARY KEY REFERENCES ingest_batches(batch_id),
+    sketches TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cohort_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_patients_insert AFTER INSERT ON patients BEGIN
+    UPDATE cohort_counters SET value = value + 1 WHERE name = 'patients';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_patients_delete AFTER DELETE ON patients BEGIN
+    UPDATE cohort_counters SET value = value - 1 WHERE name = 'patients';
+END;
+"""
+
+# Seçilen lab_panels satırlarının katkısını (sign=-1 ise tersini) özetlere ekler
+COHORT_DAILY_SQL = """
+INSERT INTO cohort_daily (report_date, panel_count, risk_count, risk_sum, high_risk_count, abnormal_panel_count)
+SELECT report_date, {sign} * COUNT(*), {sign} * COUNT(risk_score), {sign} * TOTAL(risk_score),
+       {sign} * TOTAL(risk_score > {high_risk}), {sign} * TOTAL(abnormal_count > 0)
+FROM lab_panels WHERE {where} GROUP BY report_date
+ON CONFLICT(report_date) DO UPDATE SET
+    panel_count = panel_count + excluded.panel_count,
+    risk_count = risk_count + excluded.risk_count,
+    risk_sum = risk_sum + excluded.risk_sum,
+    high_risk_count = high_risk_count + excluded.high_risk_count,
+    abnormal_panel_count = abnormal_panel_count + excluded.abnormal_panel_count
+"""
+COHORT_BUCKETS_SQL = """
+INSERT INTO cohort_risk_buckets (bucket, panel_count)
+SELECT MIN(CAST(risk_score AS INTEGER), {last_bucket}) AS bucket, {sign} * COUNT(*)
+FROM lab_panels WHERE {where} AND risk_score IS NOT NULL GROUP BY bucket
+ON CONFLICT(bucket) DO UPDATE SET panel_count = panel_count + excluded.panel_count
+"""
+COHORT_PARAMETERS_SQL = """
+SELECT {columns} FROM lab_panels WHERE {where} AND abnormal_mask IS NOT NULL
+"""
+
+def file_fingerprint(fileobj, block_size=1024 * 1024):
+    """Dosya benzeri nesnenin içerik özetini blok blok hesaplar ve konumu başa alır"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b''):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+class PatientStore:
+    """
+    Hasta, laboratuvar paneli, patoloji ve tedavi kayıtları için SQLite
+    deposu. Süreç başına tek bir bağlantı açılır ve iş parçacıkları onu
+    bir kilit altında sırayla kullanır (':memory:' veritabanı da böylece
+    tüm iş parçacıklarınca paylaşılır); sorgular hasta kimliği ve tarih
+    indeksleri üzerinden yapılır.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+
+    @contextmanager
+    def connection(self):
+        """
+        Paylaşılan bağlantıyı kilit tutulurken verir; çatallanan süreçte
+        bağlantı yeniden açılır. Sorgu sonuçları blok içinde okunmalıdır.
+        """
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                self._ensure_schema(conn)
+                self._conn = conn
+                self._pid = os.getpid()
+            yield self._conn
+
+    def _ensure_schema(self, conn):
+        conn.executescript(SCHEMA)
+        # Eski veritabanlarında bit maskesi sütunu yoktur
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(lab_panels)')}
+        if 'abnormal_mask' not in columns:
+            conn.execute('ALTER TABLE lab_panels ADD COLUMN abnormal_mask INTEGER')
+        conn.executescript(COHORT_SCHEMA)
+        if conn.execute("SELECT 1 FROM cohort_counters WHERE name = 'patients'").fetchone() is None:
+            self._rebuild_cohort(conn)
+
+    def _rebuild_cohort(self, conn):
+        """
+        Kohort özetlerini ham tablolardan bir kez yeniden oluşturur (özet
+        tabloları olmayan mevcut veritabanları için). Bit maskesi olmayan
+        eski paneller parametre oranlarına katılmaz.
+        """
+        with conn:
+            for table in ('cohort_daily', 'cohort_risk_buckets', 'cohort_parameters', 'cohort_counters'):
+                conn.execute(f'DELETE FROM {table}')
+            conn.execute(
+                "INSERT INTO cohort_counters (name, value) SELECT 'patients', COUNT(*) FROM patients"
+            )
+            self._apply_cohort(conn, '1', ())
+
+    def _apply_cohort(self, conn, where, params, sign=1):
+        """where ile seçilen panellerin katkısını kohort özetlerine ekler (sign=-1: çıkarır)"""
+        conn.execute(COHORT_DAILY_SQL.format(sign=sign, where=where, high_risk=HIGH_RISK_THRESHOLD), params)
+        conn.execute(COHORT_BUCKETS_SQL.format(sign=sign, where=where, last_bucket=RISK_BUCKETS - 1), params)
+
+        columns = []
+        for j, column in enumerate(LAB_COLUMNS):
+            columns += [f'COUNT({column})', f'TOTAL((abnormal_mask >> {j}) & 1)']
+        totals = conn.execute(COHORT_PARAMETERS_SQL.format(columns=', '.join(columns), where=where), params).fetchone()
+        conn.executemany(
+            'INSERT INTO cohort_parameters (param, measured_count, abnormal_count) VALUES (?, ?, ?) '
+            'ON CONFLICT(param) DO UPDATE SET measured_count = measured_count + excluded.measured_count, '
+            'abnormal_count = abnormal_count + excluded.abnormal_count',
+            [
+                (param, sign * totals[2 * j], sign * int(totals[2 * j + 1]))
+                for j, param in enumerate(REFERENCE_RANGES)
+            ]
+        )
+
+    # Okuma -------------------------------------------------------------
+
+    @instrument()
+    def get_patient(self, patient_id):
+        with self.connection() as conn:
+            row = conn.execute('SELECT * FROM patients WHERE patient_id = ?', (patient_id,)).fetchone()
+        return dict(row) if row else None
+
+    @instrument()
+    def latest_lab_panel(self, patient_id):
+        """
+        Hastanın en son laboratuvar panelini {'WBC': ..} biçiminde, referans
+        aralıkları için gereken cinsiyet ve doğum tarihiyle birlikte tek
+        sorguda döndürür
+        """
+        with self.connection() as conn:
+            row = conn.execute(
+                f'SELECT l.report_date, l.risk_score, {", ".join("l." + column for column in LAB_COLUMNS)}, '
+                'p.sex, p.birth_date FROM lab_panels l LEFT JOIN patients p ON p.patient_id = l.patient_id '
+                'WHERE l.patient_id = ? ORDER BY l.report_date DESC LIMIT 1',
+                (patient_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        values = {column.upper(): row[column] for column in LAB_COLUMNS if row[column] is not None}
+        return {
+            'report_date': row['report_date'],
+            'risk_score': row['risk_score'],
+            'values': values,
+            'sex': row['sex'],
+            'birth_date': row['birth_date']
+        }
+
+    @instrument()
+    def lab_history(self, patient_id, limit=500):
+        """Hastanın laboratuvar geçmişini tarih sırasıyla döndürür"""
+        with self.connection() as conn:
+            history = pd.read_sql_query(
+                f'SELECT report_date, {", ".join(LAB_COLUMNS)}, risk_score, abnormal_count FROM lab_panels '
+                'WHERE patient_id = ? ORDER BY report_date DESC LIMIT ?',
+                conn,
+                params=(patient_id, limit)
+            )
+        return history.iloc[::-1].reset_index(drop=True)
+
+    @instrument()
+    def risk_history(self, patient_ids, exclude_fingerprint=None):
+        """
+        Hastaların kayıtlı risk skoru geçmişini boylamsal motorun biçiminde
+        (hasta_id, rapor_tarihi, risk_skoru) döndürür. exclude_fingerprint
+        verilirse o içerikle yüklenmiş partinin satırları dahil edilmez.
+        """
+        patient_ids = [str(patient_id) for patient_id in patient_ids]
+        parts = []
+        with self.connection() as conn:
+            for start in range(0, len(patient_ids), HISTORY_QUERY_SIZE):
+                chunk = patient_ids[start:start + HISTORY_QUERY_SIZE]
+                parts.append(pd.read_sql_query(
+                    'SELECT patient_id AS hasta_id, report_date AS rapor_tarihi, risk_score AS risk_skoru '
+                    f'FROM lab_panels WHERE patient_id IN ({", ".join("?" * len(chunk))}) '
+                    'AND risk_score IS NOT NULL '
+                    'AND NOT EXISTS (SELECT 1 FROM ingest_batches b '
+                    'WHERE b.batch_id = lab_panels.batch_id AND b.fingerprint = ?)',
+                    conn,
+                    params=(*chunk, exclude_fingerprint)
+                ))
+        if not parts:
+            return pd.DataFrame(columns=['hasta_id', 'rapor_tarihi', 'risk_skoru'])
+        return pd.concat(parts, ignore_index=True)
+
+    @instrument()
+    def latest_pathology(self, patient_id):
+        with self.connection() as conn:
+            row = conn.execute(
+                'SELECT histology, stage, differentiation, report_date FROM pathology '
+                'WHERE patient_id = ? ORDER BY report_date DESC LIMIT 1',
+                (patient_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    @instrument()
+    def treatment_history(self, patient_id):
+        with self.connection() as conn:
+            return pd.read_sql_query(
+                'SELECT treatment_date, procedure, notes, blood_status, dose_adjustment FROM treatments '
+                'WHERE patient_id = ? ORDER BY treatment_date',
+                conn,
+                params=(patient_id,)
+            )
+
+    @instrument()
+    def cohort_summary(self):
+        """
+        Kohort özetlerini döndürür: günlük sayılar, risk kovaları ve
+        parametre bazlı anormallik oranları. Yalnızca özet tabloları okunur;
+        süre ham panel sayısından bağımsızdır.
+        """
+        with self.connection() as conn:
+            daily = pd.read_sql_query(
+                'SELECT report_date, panel_count, risk_count, risk_sum, high_risk_count, abnormal_panel_count '
+                'FROM cohort_daily WHERE panel_count > 0 ORDER BY report_date',
+                conn
+            )
+            buckets = pd.read_sql_query('SELECT bucket, panel_count FROM cohort_risk_buckets ORDER BY bucket', conn)
+            parameters = pd.read_sql_query('SELECT param, measured_count, abnormal_count FROM cohort_parameters', conn)
+            row = conn.execute("SELECT value FROM cohort_counters WHERE name = 'patients'").fetchone()
+
+        daily['mean_risk'] = daily['risk_sum'] / daily['risk_count'].where(daily['risk_count'] > 0)
+        buckets = buckets.set_index('bucket').reindex(range(RISK_BUCKETS), fill_value=0).reset_index()
+        parameters = parameters.set_index('param').reindex(list(REFERENCE_RANGES), fill_value=0).reset_index()
+        parameters['abnormal_rate'] = (
+            parameters['abnormal_count'] / parameters['measured_count'].where(parameters['measured_count'] > 0)
+        )
+
+        return {
+            'patient_count': row[0] if row else 0,
+            'daily': daily,
+            'risk_buckets': buckets,
+            'parameters': parameters
+        }
+
+    def batch_sketches(self):
+        """Kayıtlı tüm partilerin kantil özetlerini (sözlük biçiminde) döndürür"""
+        with self.connection() as conn:
+            rows = conn.execute('SELECT sketches FROM cohort_batch_sketches ORDER BY batch_id').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def rebuild_cohort(self):
+        """Kohort özetlerini ham tablolardan yeniden hesaplar"""
+        with self.connection() as conn:
+            self._rebuild_cohort(conn)
+
+    def patient_ids(self, limit=1000):
+        with self.connection() as conn:
+            rows = conn.execute('SELECT patient_id FROM patients ORDER BY patient_id LIMIT ?', (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+    # Yazma -------------------------------------------------------------
+
+    def upsert_patient(self, patient_id, **fields):
+        columns = ['patient_id'] + list(fields)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in fields) or 'patient_id = patient_id'
+        with self.connection() as conn, conn:
+            conn.execute(
+                f'INSERT INTO patients ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))}) '
+                f'ON CONFLICT(patient_id) DO UPDATE SET {updates}',
+                [patient_id] + list(fields.values())
+            )
+
+    def add_pathology(self, patient_id, report_date, histology=None, stage=None, differentiation=None):
+        with self.connection() as conn, conn:
+            conn.execute(
+                'INSERT INTO pathology (patient_id, report_date, histology, stage, differentiation) VALUES (?, ?, ?, ?, ?)',
+                (patient_id, report_date, histology, stage, differentiation)
+            )
+
+    def add_treatments(self, patient_id, rows):
+        with self.connection() as conn, conn:
+            conn.executemany(
+                'INSERT INTO treatments (patient_id, treatment_date, procedure, notes, blood_status, dose_adjustment) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(patient_id, *row) for row in rows]
+            )
+
+    def begin_batch(self, fingerprint, source_name=None):
+        """
+        Yeni bir yükleme partisi açar. Aynı içerik daha önce yüklendiyse
+        None döndürür; böylece sayfa yeniden çalıştığında veri iki kez
+        eklenmez.
+        """
+        with self.connection() as conn, conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO ingest_batches (fingerprint, source_name) VALUES (?, ?)',
+                (fingerprint, source_name)
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def discard_batch(self, batch_id):
+        """Yarıda kalan bir partinin satırlarını ve kaydını siler"""
+        with self.connection() as conn, conn:
+            self._apply_cohort(conn, 'batch_id = ?', (batch_id,), sign=-1)
+            conn.execute('DELETE FROM lab_panels WHERE batch_id = ?', (batch_id,))
+            conn.execute('DELETE FROM cohort_batch_sketches WHERE batch_id = ?', (batch_id,))
+            conn.execute('DELETE FROM ingest_batches WHERE batch_id = ?', (batch_id,))
+
+    @instrument(nbytes=lambda self, raw_chunk, *args, **kwargs: int(raw_chunk.memory_usage(index=False).sum()))
+    def insert_lab_panels(self, raw_chunk, results_chunk, batch_id=None, abnormal_mask=None):
+        """
+        Bir CSV parçasındaki laboratuvar panellerini risk sonuçlarıyla
+        birlikte toplu olarak ekler. Yeni hasta kimlikleri hasta tablosuna
+        da eklenir; kohort özetleri aynı işlemde güncellenir. abnormal_mask,
+        sonuç satırlarıyla aynı sırada anormal parametre bit maskeleridir.
+        """
+        raw = raw_chunk.loc[results_chunk.index]
+        columns = {'patient_id': raw['hasta_id'].astype(str), 'report_date': raw['rapor_tarihi'].astype(str)}
+        for column in LAB_COLUMNS:
+            if column in raw.columns:
+                columns[column] = pd.to_numeric(raw[column], errors='coerce')
+            elif column.upper() in raw.columns:
+                columns[column] = pd.to_numeric(raw[column.upper()], errors='coerce')
+            else:
+                columns[column] = np.nan
+        columns['risk_score'] = results_chunk['risk_skoru']
+        columns['abnormal_count'] = results_chunk['anormal_parametreler']
+        columns['abnormal_mask'] = (
+            np.nan if abnormal_mask is None else pd.Series(abnormal_mask, index=results_chunk.index)
+        )
+        frame = pd.DataFrame(columns)
+
+        frame['batch_id'] = batch_id
+        sql = f'INSERT INTO lab_panels ({", ".join(frame.columns)}) VALUES ({", ".join("?" * len(frame.columns))})'
+
+        # Python tiplerine çevir; NaN değerler NULL olarak yazılır
+        frame = frame.astype(object).where(frame.notna(), None)
+
+        with self.connection() as conn, conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO patients (patient_id) VALUES (?)',
+                ((patient_id,) for patient_id in frame['patient_id'].unique())
+            )
+            for start in range(0, len(frame), INSERT_BATCH_SIZE):
+                part = frame.iloc[start:start + INSERT_BATCH_SIZE]
+                conn.executemany(sql, part.itertuples(index=False, name=None))
+
+            # Yazma kilidi işlem boyunca bizde olduğundan yeni satırlar ardışık kimlikler alır
+            if len(frame):
+                last_id = conn.execute('SELECT MAX(panel_id) FROM lab_panels').fetchone()[0]
+                self._apply_cohort(conn, 'panel_id > ? AND panel_id <= ?', (last_id - len(frame), last_id))
+            if batch_id is not None:
+                conn.execute(
+                    'UPDATE ingest_batches SET row_count = row_count + ? WHERE batch_id = ?',
+                    (len(frame), batch_id)
+                )
+
+    def save_batch_sketches(self, batch_id, sketches):
+        """Bir partinin kantil özetlerini kaydeder"""
+        with self.connection() as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cohort_batch_sketches (batch_id, sketches) VALUES (?, ?)',
+                (batch_id, json.dumps(sketches))
+            )
+
+    def seed_demo_data(self):
+        """Depo boşsa örnek hastayı ekler"""
+        if self.get_patient('P001') is not None:
+            return
+
+        self.upsert_patient(
+            'P001',
+            full_name='Ahmet Yılmaz',
+            birth_date='1969-05-15',
+            sex='Erkek',
+            diagnosis='Akciğer Kanseri - Evre 2',
+            treatment_start='2024-01-15'
+        )
+        demo_panel = pd.DataFrame([{
+            'hasta_id': 'P001', 'rapor_tarihi': '2024-02-15',
+            'wbc': 6.8, 'rbc': 4.9, 'hgb': 14.8, 'plt': 265, 'cea': 4.2,
+            'cyfra': 2.8, 'nse': 15.5, 'ldh': 250, 'alp': 130
+        }])
+        demo_results = pd.DataFrame({'risk_skoru': [0.0], 'anormal_parametreler': [0]})
+        self.insert_lab_panels(demo_panel, demo_results, abnormal_mask=[0])
+        self.add_pathology('P001', '2024-01-10', 'Adenokarsinom', 'Stage II', 'Orta derecede diferansiye')
+        self.add_treatments('P001', [
+            ('2024-01-15', 'Kemoterapi', 'İlk seans', 'Normal', 'Standart'),
+            ('2024-01-30', 'Kontrol', 'Yan etki yok', 'WBC düşük', 'Doz azaltma'),
+            ('2024-02-15', 'Kemoterapi', 'İkinci seans', 'Normal', 'Standart')
+        ])
+
+def age_from_birth_date(birth_date, today=None):
+    """YYYY-MM-DD doğum tarihinden yaşı hesaplar"""
+    if not birth_date:
+        return None
+    born = date.fromisoformat(birth_date)
+    today = today or date.today()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Süreç genelinde paylaşılan hasta deposunu döndürür. Veritabanı yolu
+    ONKONIX_DB ortam değişkeniyle değiştirilebilir.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PatientStore(os.environ.get('ONKONIX_DB', DEFAULT_DB_PATH))
+            _store.seed_demo_data()
+        return _store
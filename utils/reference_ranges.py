@@ -0,0 +1,155 @@
+import math
+import numpy as np
+import pandas as pd
+
+MAX_AGE = 120
+# Yaş ekseninin son dilimi yaşı bilinmeyen hastalar içindir
+UNKNOWN_AGE_SLOT = MAX_AGE + 1
+AGE_SLOTS = MAX_AGE + 2
+
+SEX_UNKNOWN = 0
+SEX_MALE = 1
+SEX_FEMALE = 2
+SEX_COUNT = 3
+SEX_CODES = {
+    'e': SEX_MALE, 'erkek': SEX_MALE, 'm': SEX_MALE, 'male': SEX_MALE,
+    'k': SEX_FEMALE, 'kadın': SEX_FEMALE, 'kadin': SEX_FEMALE, 'f': SEX_FEMALE, 'female': SEX_FEMALE
+}
+_TABLE_SEX_CODES = {'*': None, 'E': SEX_MALE, 'K': SEX_FEMALE}
+
+def sex_codes(values):
+    """Cinsiyet değerlerini (Erkek/Kadın, E/K, M/F ...) koda çevirir; bilinmeyenler 0 olur"""
+    # Sütunda yalnızca birkaç farklı değer olur; eşleme tekil değerler üzerinde yapılır
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    lookup = np.array(
+        [sex_code(value) for value in uniques] + [SEX_UNKNOWN],
+        dtype=np.int8
+    )
+    return lookup[codes]
+
+def sex_code(value):
+    """Tek bir cinsiyet değerinin kodu (sex_codes'un skaler karşılığı)"""
+    if value is None:
+        return SEX_UNKNOWN
+    return SEX_CODES.get(str(value).strip().lower(), SEX_UNKNOWN)
+
+def age_slot(value):
+    """Tek bir yaşın dilimi (age_slots'un skaler karşılığı)"""
+    try:
+        age = float(value)
+    except (TypeError, ValueError):
+        return UNKNOWN_AGE_SLOT
+    if math.isnan(age):
+        return UNKNOWN_AGE_SLOT
+    return int(min(max(math.floor(age), 0), MAX_AGE))
+
+def age_slots(values):
+    """Yaşları tam sayı yaş dilimine çevirir; boş ya da geçersiz yaşlar bilinmeyen dilime düşer"""
+    ages = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    slots = np.full(len(ages), UNKNOWN_AGE_SLOT, dtype=np.int16)
+    known = ~np.isnan(ages)
+    slots[known] = np.clip(np.floor(ages[known]), 0, MAX_AGE).astype(np.int16)
+    return slots
+
+class ReferenceRangeRegistry:
+    """
+    Cinsiyet ve yaş bandına göre referans aralıkları.
+
+    Tablodaki bantlar yüklenirken (cinsiyet × tam yaş) profillerine açılır;
+    her profil için tüm parametrelerin alt/üst sınırları önceden hesaplanmış
+    dizilerde tutulur. Böylece bir satırın aralıkları, tanımlı bant sayısı
+    ne olursa olsun tek bir dizi indekslemesiyle bulunur. Tabloda karşılığı
+    olmayan hücreler defaults aralıklarına düşer.
+    """
+
+    def __init__(self, table, params, defaults):
+        self.params = list(params)
+        n_profiles = SEX_COUNT * AGE_SLOTS
+        low = np.full((SEX_COUNT, AGE_SLOTS, len(self.params)), np.nan)
+        high = np.full_like(low, np.nan)
+        labels = np.empty(low.shape, dtype=object)
+
+        # Genel satırlar önce, cinsiyete özgü ve dar bantlar sonra yazılır (üzerine yazar)
+        table = table.assign(
+            _specific=table['cinsiyet'] != '*',
+            _width=table['yas_max'].fillna(np.inf) - table['yas_min']
+        ).sort_values(['_specific', '_width'], ascending=[True, False], kind='stable')
+
+        for row in table.itertuples(index=False):
+            if row.parametre not in self.params:
+                continue
+            j = self.params.index(row.parametre)
+            sex = _TABLE_SEX_CODES[row.cinsiyet]
+            sexes = slice(None) if sex is None else sex
+
+            age_min = float(row.yas_min)
+            age_max = math.inf if pd.isna(row.yas_max) else float(row.yas_max)
+            start = max(math.ceil(age_min), 0)
+            stop = MAX_AGE + 1 if age_max == math.inf else min(math.ceil(age_max), MAX_AGE + 1)
+
+            ages = [slice(start, stop)]
+            # Yaşı bilinmeyenler yalnızca tüm yaşları kapsayan satırlardan aralık alır
+            if age_min <= 0 and age_max == math.inf:
+                ages.append(UNKNOWN_AGE_SLOT)
+
+            for age in ages:
+                low[sexes, age, j] = float(row.alt)
+                high[sexes, age, j] = float(row.ust)
+                labels[sexes, age, j] = f'{row.alt}-{row.ust}'
+
+        for j, param in enumerate(self.params):
+            default_low, default_high = defaults[param]
+            missing = np.isnan(low[..., j])
+            low[..., j][missing] = default_low
+            high[..., j][missing] = default_high
+            labels[..., j][missing] = f'{default_low}-{default_high}'
+
+        self.low = low.reshape(n_profiles, -1)
+        self.high = high.reshape(n_profiles, -1)
+        self.labels = labels.reshape(n_profiles, -1)
+
+        # Tek hasta sorguları için her profilin aralık sözlüğü bir kez kurulur
+        self._profile_ranges = [
+            {
+                param: (float(self.low[profile, j]), float(self.high[profile, j]), self.labels[profile, j])
+                for j, param in enumerate(self.params)
+            }
+            for profile in range(n_profiles)
+        ]
+
+    @classmethod
+    def from_csv(cls, path, params, defaults):
+        """Tabloyu CSV'den yükler; etiketler için sınırlar yazıldığı gibi korunur"""
+        table = pd.read_csv(path, comment='#', dtype={'parametre': str, 'cinsiyet': str, 'alt': str, 'ust': str})
+        table['cinsiyet'] = table['cinsiyet'].str.strip().str.upper()
+        unknown = set(table['cinsiyet']) - set(_TABLE_SEX_CODES)
+        if unknown:
+            raise ValueError("Referans tablosunda geçersiz cinsiyet değeri: " + ', '.join(sorted(unknown)))
+        return cls(table, params, defaults)
+
+    @staticmethod
+    def profile_ids(sex=None, age=None, n_rows=None):
+        """Cinsiyet ve yaş dizilerinden profil indekslerini hesaplar"""
+        if n_rows is None:
+            n_rows = len(sex) if sex is not None else len(age)
+        sexes = sex_codes(sex) if sex is not None else np.zeros(n_rows, dtype=np.int8)
+        slots = age_slots(age) if age is not None else np.full(n_rows, UNKNOWN_AGE_SLOT, dtype=np.int16)
+        return sexes.astype(np.int16) * AGE_SLOTS + slots
+
+    @staticmethod
+    def profile_id(sex=None, age=None):
+        """Tek hastanın profil indeksi; factorize/to_numeric kullanmaz"""
+        return sex_code(sex) * AGE_SLOTS + age_slot(age)
+
+    @staticmethod
+    def default_profile():
+        """Cinsiyeti ve yaşı bilinmeyen hasta profili"""
+        return SEX_UNKNOWN * AGE_SLOTS + UNKNOWN_AGE_SLOT
+
+    def lookup(self, profiles):
+        """Profil indekslerine karşılık gelen (satır × parametre) alt ve üst sınırları döndürür"""
+        return self.low[profiles], self.high[profiles]
+
+    def ranges_for(self, sex=None, age=None):
+        """Tek hasta için {parametre: (alt, üst, etiket)} sözlüğü döndürür (paylaşılır, değiştirilmemeli)"""
+        return self._profile_ranges[self.profile_id(sex, age)]
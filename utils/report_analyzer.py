@@ -1,5 +1,74 @@
+import hashlib
 import re
+import zipfile
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import pandas as pd
+from utils.data_analysis import roman_to_int
+from utils.instrumentation import instrument
+from utils.parallel import ordered_pool_map
+from utils.result_cache import get_report_cache, normalize_report_text
+
+# Çıkarım mantığı sonucu değiştirecek şekilde güncellendiğinde artırılır
+ANALYZER_VERSION = 1
+
+# Ölçüm ve evre desenleri modül yüklenirken (her işçi süreçte bir kez) derlenir
+MEASUREMENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(mm|cm|m)')
+STAGE_PATTERN = re.compile(r'evre\s+([IVX]+)', re.IGNORECASE)
+# Sütun bazlı analizde küçük harfli metin üzerinde satır sınırını aşmayan evre deseni
+LINE_STAGE_PATTERN = re.compile(r'evre[^\S\n]+([ivx]+)')
+# Ölçüm desenine uyan her metinde geçen, gruplar içermeyen hızlı ön süzgeç
+MEASUREMENT_HINT_PATTERN = re.compile(r'\d\s*c?m')
+UNIT_TO_MM = {'mm': 1.0, 'cm': 10.0, 'm': 1000.0}
+
+def _terms_signature(important_terms):
+    """Terim tablosunu değişmez (hashlenebilir) bir imzaya çevirir"""
+    return tuple((category, tuple(terms)) for category, terms in important_terms.items())
+
+@lru_cache(maxsize=32)
+def _compile_term_matcher(signature):
+    """
+    Tüm terimleri tek bir düzenli ifadede birleştirir.
+
+    Desen her konumda o konumdan başlayan en uzun terimi yakalar (ileri
+    bakış sayesinde örtüşen eşleşmeler de bulunur). Her terim, kendi
+    içinde geçen diğer terimlerin kategorilerini de taşır; böylece tek
+    tarama `term in line` ile aynı sonucu verir.
+    """
+    term_categories = {}
+    for category, terms in signature:
+        for term in terms:
+            term_categories.setdefault(term, set()).add(category)
+
+    terms = sorted(term_categories, key=len, reverse=True)
+    if not terms:
+        return None, {}
+
+    closure = {}
+    for term in terms:
+        categories = set()
+        for other, other_categories in term_categories.items():
+            if other in term:
+                categories |= other_categories
+        closure[term] = frozenset(categories)
+
+    pattern = re.compile('(?=(' + '|'.join(re.escape(term) for term in terms) + '))')
+    return pattern, closure
+
+@lru_cache(maxsize=32)
+def _terms_version(signature):
+    """Terim tablosunun kısa içerik özeti"""
+    return hashlib.sha256(repr(signature).encode('utf-8')).hexdigest()[:16]
+
+@lru_cache(maxsize=32)
+def _compile_category_patterns(signature):
+    """Her kategori için terimlerinden birini arayan tek bir desen derler"""
+    return {
+        category: re.compile('|'.join(re.escape(term) for term in terms))
+        for category, terms in signature
+        if terms
+    }
 
 class ReportAnalyzer:
     def __init__(self):
@@ -14,37 +83,81 @@ class ReportAnalyzer:
 
     def extract_measurements(self, text):
         """Metinden ölçümleri çıkarır"""
-        measurement_pattern = r'(\d+(?:\.\d+)?)\s*(mm|cm|m)'
-        measurements = re.findall(measurement_pattern, text.lower())
+        measurements = MEASUREMENT_PATTERN.findall(text.lower())
         return [{'value': float(value), 'unit': unit} for value, unit in measurements]
 
     def extract_important_findings(self, text):
         """Önemli bulguları çıkarır"""
-        findings = {category: [] for category in self.important_terms}
+        # Sıralı küme olarak dict kullanılır (tekrarsız, ekleme sırasını korur)
+        findings = {category: {} for category in self.important_terms}
+
+        # Derlenmiş eşleyici terim tablosu değişirse otomatik yenilenir
+        pattern, closure = _compile_term_matcher(_terms_signature(self.important_terms))
+        if pattern is None:
+            return {category: [] for category in findings}
+        all_categories = len(findings)
 
         # Metni küçük harfe çevir ve satırlara böl
         lines = text.lower().split('\n')
 
-        # Her bir satır için önemli terimleri ara
+        # Her satırı tek geçişte tara ve eşleşen tüm kategorileri işaretle
         for line in lines:
-            for category, terms in self.important_terms.items():
-                for term in terms:
-                    if term in line:
-                        # Eğer terim bulunduysa ve daha önce eklenmemişse ekle
-                        if line.strip() not in findings[category]:
-                            findings[category].append(line.strip())
+            matched = set()
+            for match in pattern.finditer(line):
+                matched |= closure[match.group(1)]
+                if len(matched) == all_categories:
+                    break
+
+            if matched:
+                stripped = line.strip()
+                for category in matched:
+                    findings[category][stripped] = None
 
-        return findings
+        return {category: list(category_lines) for category, category_lines in findings.items()}
 
+    @instrument(nbytes=lambda self, report_text: len(report_text))
     def analyze_report(self, report_text):
         """Raporu analiz eder ve yapılandırılmış sonuçlar döndürür"""
+        return {
+            **self._analyze_content(report_text),
+            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    @instrument(nbytes=lambda self, report_text, cache=None: len(report_text))
+    def analyze_report_cached(self, report_text, cache=None):
+        """
+        analyze_report ile aynı sonucu, özet metniyle birlikte paylaşılan
+        önbellekten döndürür. Normalleştirilmiş metin yalnızca anahtar için
+        kullanılır; analiz özgün metin üzerinde yapılır. Önbellekte yalnızca
+        zaman damgası içermeyen içerik saklanır; 'analysis_date' her çağrıda
+        yeniden verilir, 'cached' sonucun önbellekten gelip gelmediğini
+        belirtir.
+        """
+        cache = cache or get_report_cache()
+        normalized = normalize_report_text(report_text)
+        signature = _terms_signature(self.important_terms)
+        key = cache.make_key(normalized, ANALYZER_VERSION, _terms_version(signature))
+
+        def compute():
+            content = self._analyze_content(report_text)
+            return {**content, 'summary': self.generate_summary(content)}
+
+        content, hit = cache.get_or_compute(key, compute)
+        return {
+            **content,
+            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'cached': hit
+        }
+
+    def _analyze_content(self, report_text):
+        """Rapor analizinin zamandan bağımsız (önbelleğe alınabilir) kısmı"""
         measurements = self.extract_measurements(report_text)
         findings = self.extract_important_findings(report_text)
 
         # Evreyi belirle
         stage = None
         for stage_text in findings['evre']:
-            stage_match = re.search(r'evre\s+([IVX]+)', stage_text, re.IGNORECASE)
+            stage_match = STAGE_PATTERN.search(stage_text)
             if stage_match:
                 stage = stage_match.group(1)
                 break
@@ -52,10 +165,63 @@ class ReportAnalyzer:
         return {
             'measurements': measurements,
             'findings': findings,
-            'stage': stage,
-            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'stage': stage
         }
 
+    @instrument(nbytes=lambda self, texts: int(texts.str.len().sum()))
+    def analyze_report_frame(self, texts):
+        """
+        Rapor metinlerinden oluşan bir Series'i hücre hücre döngü kurmadan
+        analiz eder. Aynı indeksle şu sütunları döndürür: ölçüm sayısı, en
+        büyük ölçüm (mm), evre (analyze_report gibi küçük harfli Roma
+        rakamı) ve sayısal karşılığı, her kategori için <kategori>_var
+        bayrakları. Boş hücreler bulgusuz sayılır.
+        """
+        lowered = texts.astype('string').str.lower().fillna('')
+        result = pd.DataFrame(index=texts.index)
+
+        # Ölçümler: yalnızca ölçüm içeren hücrelerde tüm eşleşmeler tek seferde
+        # çıkarılıp mm'ye çevrilir
+        has_measurement = lowered.str.contains(MEASUREMENT_HINT_PATTERN)
+        matches = lowered[has_measurement].str.extractall(MEASUREMENT_PATTERN)
+        sizes_mm = matches[0].astype(float) * matches[1].map(UNIT_TO_MM).astype(float)
+        per_report = sizes_mm.groupby(level=0)
+        result['olcum_sayisi'] = per_report.size().reindex(texts.index, fill_value=0).astype(int)
+        result['en_buyuk_olcum_mm'] = per_report.max().reindex(texts.index)
+
+        # Evre: analyze_report ile aynı şekilde satır içindeki ilk 'evre <roma>' ifadesi
+        stage = lowered.str.extract(LINE_STAGE_PATTERN, expand=False)
+        stage_numbers = {value: roman_to_int(value.upper()) for value in stage.dropna().unique()}
+        result['evre'] = stage
+        result['evre_no'] = stage.map(stage_numbers).astype('Int64')
+
+        # Kategori bayrakları: herhangi bir terim metinde geçiyorsa
+        patterns = _compile_category_patterns(_terms_signature(self.important_terms))
+        for category in self.important_terms:
+            pattern = patterns.get(category)
+            if pattern is None:
+                result[f'{category}_var'] = False
+            else:
+                result[f'{category}_var'] = lowered.str.contains(pattern).astype(bool)
+
+        return result
+
+    def analyze_reports(self, reports, workers=None, chunksize=32):
+        """
+        Çok sayıda raporu süreç havuzunda analiz eder.
+
+        reports öğeleri rapor metni (str) ya da .txt dosya yolu (Path)
+        olabilir. Sonuçlar giriş sırasıyla, hazır oldukça döndürülür.
+        """
+        return ordered_pool_map(
+            _analyze_report_item,
+            reports,
+            workers=workers,
+            chunksize=chunksize,
+            initializer=_init_report_worker,
+            initargs=(self.important_terms,)
+        )
+
     def generate_summary(self, analysis_results):
         """Analiz sonuçlarından özet oluşturur"""
         summary = []
@@ -73,4 +239,46 @@ class ReportAnalyzer:
                 for finding in findings:
                     summary.append(f"- {finding}")
 
-        return '\n'.join(summary)
\ No newline at end of file
+        return '\n'.join(summary)
+
+# İşçi süreç başına tek analiz aracı
+_worker_analyzer = None
+
+def _init_report_worker(important_terms):
+    """İşçi süreci hazırlar: analiz aracını kurar ve terim eşleyicisini derler"""
+    global _worker_analyzer
+    _worker_analyzer = ReportAnalyzer()
+    _worker_analyzer.important_terms = important_terms
+    _compile_term_matcher(_terms_signature(important_terms))
+
+def _analyze_report_item(item):
+    if isinstance(item, Path):
+        item = item.read_text(encoding='utf-8', errors='replace')
+    return _worker_analyzer.analyze_report(item)
+
+def iter_report_sources(source):
+    """
+    Bir klasördeki ya da ZIP arşivindeki .txt raporlarını (ad, öğe)
+    çiftleri olarak sırayla döndürür. Klasör için öğe dosya yoludur ve
+    işçi süreçte okunur; ZIP için öğe çözülmüş metindir. source bir yol
+    ya da dosya benzeri ZIP nesnesi olabilir.
+    """
+    if isinstance(source, (str, Path)) and Path(source).is_dir():
+        root = Path(source)
+        for path in sorted(root.rglob('*.txt')):
+            yield str(path.relative_to(root)), path
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        for name in sorted(archive.namelist()):
+            if name.lower().endswith('.txt') and not name.endswith('/'):
+                yield name, archive.read(name).decode('utf-8', errors='replace')
+
+def count_report_sources(source):
+    """Klasör ya da ZIP içindeki .txt rapor sayısını döndürür"""
+    if isinstance(source, (str, Path)) and Path(source).is_dir():
+        return sum(1 for _ in Path(source).rglob('*.txt'))
+
+    with zipfile.ZipFile(source) as archive:
+        return sum(1 for name in archive.namelist()
+                   if name.lower().endswith('.txt') and not name.endswith('/'))
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_REPORTS = 2048
+
+def _result_nbytes(result):
+    return sum(value.nbytes for value in result.values() if isinstance(value, np.ndarray)) + 256
+
+class ImageResultCache:
+    """
+    Görüntü analiz sonuçları için içerik adresli, iki katmanlı önbellek.
+
+    Anahtar, yüklenen baytların ve işlem parametrelerinin SHA-256 özetidir.
+    Birinci katman boyutu sınırlı bir bellek içi LRU'dur; disk_dir
+    verilirse sonuçlar ayrıca diskte saklanır ve süreç yeniden başlasa da
+    kullanılabilir. Önbellekteki diziler salt okunurdur.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    @staticmethod
+    def make_key(data, params):
+        """Bayt içeriği ve parametrelerden önbellek anahtarı üretir"""
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / f'{key}.npz'
+
+    def _remember(self, key, result):
+        nbytes = _result_nbytes(result)
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+
+    def _load_from_disk(self, key):
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                result = json.loads(str(stored['meta']))
+                for name in stored.files:
+                    if name != 'meta':
+                        result[name] = stored[name]
+        except (OSError, ValueError, KeyError):
+            return None
+        return result
+
+    def _store_on_disk(self, key, result):
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {name: value for name, value in result.items() if isinstance(value, np.ndarray)}
+        meta = {name: value for name, value in result.items() if not isinstance(value, np.ndarray)}
+
+        # Yarım kalmış dosya okunmasın diye önce geçici dosyaya yazılır
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=json.dumps(meta), **arrays)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _freeze(result):
+        for value in result.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        return result
+
+    def get(self, key):
+        """Sonucu önce bellekten, sonra diskten arar; yoksa None döndürür"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[0]
+
+        if self.disk_dir is not None:
+            result = self._load_from_disk(key)
+            if result is not None:
+                result = self._freeze(result)
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+                    self._remember(key, result)
+                return result
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key, result):
+        """Sonucu bellek ve (varsa) disk katmanına yazar"""
+        result = self._freeze(result)
+        with self._lock:
+            self._remember(key, result)
+        if self.disk_dir is not None:
+            self._store_on_disk(key, result)
+        return result
+
+    def get_or_compute(self, data, params, compute):
+        """Önbellekte varsa sonucu döndürür, yoksa compute() ile hesaplayıp saklar"""
+        key = self.make_key(data, params)
+        result = self.get(key)
+        if result is None:
+            result = self.put(key, compute())
+        return result
+
+    def stats(self):
+        """İsabet/ıska sayılarını ve bellek kullanımını döndürür"""
+        with self._lock:
+            hits = self._stats['memory_hits'] + self._stats['disk_hits']
+            lookups = hits + self._stats['misses']
+            return {
+                **self._stats,
+                'hits': hits,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+    def clear(self):
+        """Bellek katmanını boşaltır (disk katmanına dokunmaz)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+def get_image_cache():
+    """
+    Süreç genelinde (tüm oturumlarca) paylaşılan görüntü önbelleğini
+    döndürür. Disk katmanı ONKONIX_IMAGE_CACHE_DIR ortam değişkeniyle
+    etkinleştirilir.
+    """
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageResultCache(disk_dir=os.environ.get('ONKONIX_IMAGE_CACHE_DIR'))
+        return _image_cache
+
+def normalize_report_text(text):
+    """
+    Önbellek anahtarı için metni normalleştirir: '\n' ile ayrılan her
+    satırın baş/son boşlukları ve boş satırlar atılır. Analiz bulguları
+    zaten kırpılmış satırlardan oluştuğu için bu farklar sonucu
+    değiştirmez; satır içi boşluklara dokunulmaz.
+    """
+    lines = (line.strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+class ReportAnalysisCache:
+    """
+    Rapor analiz sonuçları için boyutu sınırlı, oturumlar arası paylaşılan
+    LRU önbellek. Anahtar, normalleştirilmiş metnin SHA-256 özeti ile
+    analiz aracı ve terim tablosu sürümlerinden oluşur; sürümlerden biri
+    değişince eski sonuçlar kendiliğinden kullanılmaz olur. Saklanan
+    sonuçlar zaman damgası içermez ve salt okunur kabul edilmelidir.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_REPORTS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(normalized_text, analyzer_version, terms_version):
+        digest = hashlib.sha256(normalized_text.encode('utf-8'))
+        digest.update(f'|{analyzer_version}|{terms_version}'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_or_compute(self, key, compute):
+        """Anahtar için sonuç varsa (sonuç, True), yoksa hesaplayıp (sonuç, False) döndürür"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return result, True
+            self._stats['misses'] += 1
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return result, False
+
+    def stats(self):
+        """İsabet/ıska sayılarını ve kayıt sayısını döndürür"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_report_cache = None
+_report_cache_lock = threading.Lock()
+
+def get_report_cache():
+    """Süreç genelinde (tüm oturumlarca) paylaşılan rapor analiz önbelleğini döndürür"""
+    global _report_cache
+    with _report_cache_lock:
+        if _report_cache is None:
+            _report_cache = ReportAnalysisCache()
+        return _report_cache
@@ -0,0 +1,179 @@
+import base64
+import math
+import numpy as np
+import pandas as pd
+
+# k=200 için sıra (rank) hatası pratikte ~%1'in altındadır
+DEFAULT_SKETCH_K = 200
+# Kompaktör kapasitelerinin üst seviyeden aşağı doğru azalma oranı
+CAPACITY_DECAY = 2 / 3
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+RISK_SKETCH_NAME = 'risk_skoru'
+
+def _encode(values):
+    return base64.b64encode(np.ascontiguousarray(values, dtype=np.float64).tobytes()).decode('ascii')
+
+def _decode(text):
+    return np.frombuffer(base64.b64decode(text), dtype=np.float64).copy()
+
+class KLLSketch:
+    """
+    Akış halinde gelen değerler için birleştirilebilir KLL kantil özeti.
+
+    Değerler seviyelere (kompaktörlere) yerleştirilir; h. seviyedeki her
+    öğe 2^h değeri temsil eder. Bir seviye kapasitesini aştığında
+    sıralanır ve öğelerin rastgele yarısı bir üst seviyeye taşınır. Bellek
+    kullanımı değer sayısından bağımsız olarak ~3k öğe ile sınırlıdır;
+    iki özet seviye seviye birleştirilerek (merge) süreçler ve günler
+    arasında toplanabilir.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=None):
+        self.k = int(k)
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * CAPACITY_DECAY ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            # Tek sayıda öğe varsa biri bu seviyede kalır
+            keep = items[:1] if len(items) % 2 else items[:0]
+            pairs = items[len(keep):]
+            promoted = pairs[int(self._rng.integers(2))::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # Seviye sayısı değişmiş olabilir; kapasiteler baştan kontrol edilir
+            level = 0
+
+    def update(self, values):
+        """Bir değer dizisini özete ekler; NaN değerler atlanır"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Başka bir özeti bu özete ekler"""
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @property
+    def retained(self):
+        return sum(len(items) for items in self.levels)
+
+    def quantiles(self, qs):
+        """0..1 arasındaki kantilleri döndürür; özet boşsa NaN"""
+        qs = np.asarray(qs, dtype=float)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[np.minimum(positions, len(items) - 1)]
+        # Uç kantiller gözlenen kesin en küçük/en büyük değerlerle sınırlanır
+        result = np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, result))
+        return np.clip(result, self.min, self.max)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self):
+        """JSON ile saklanabilecek sözlük biçimi"""
+        return {
+            'k': self.k,
+            'n': self.n,
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+            'levels': [_encode(items) for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.n = data['n']
+        if sketch.n:
+            sketch.min, sketch.max = data['min'], data['max']
+        sketch.levels = [_decode(items) for items in data['levels']] or [np.empty(0)]
+        return sketch
+
+class ParameterSketches:
+    """
+    Her kan parametresi ve risk skoru için birer KLL özeti. Toplu analizin
+    her parçasıyla güncellenir; partiler ve işçiler arasında birleştirilir.
+    """
+
+    def __init__(self, params, k=DEFAULT_SKETCH_K):
+        self.params = list(params)
+        self.sketches = {name: KLLSketch(k) for name in self.params + [RISK_SKETCH_NAME]}
+
+    def update(self, values, risk_score):
+        """values: (satır × parametre) matrisi, sütun sırası params ile aynı"""
+        for j, param in enumerate(self.params):
+            self.sketches[param].update(values[:, j])
+        self.sketches[RISK_SKETCH_NAME].update(risk_score)
+        return self
+
+    def merge(self, other):
+        for name, sketch in other.sketches.items():
+            if name in self.sketches:
+                self.sketches[name].merge(sketch)
+        return self
+
+    def __getitem__(self, name):
+        return self.sketches[name]
+
+    def percentile_frame(self, qs=DEFAULT_PERCENTILES):
+        """Her özet için sayı, en küçük/en büyük ve istenen yüzdelikleri tablo olarak döndürür"""
+        rows = []
+        for name, sketch in self.sketches.items():
+            row = {'parametre': name, 'n': sketch.n,
+                   'en_kucuk': sketch.min if sketch.n else np.nan,
+                   'en_buyuk': sketch.max if sketch.n else np.nan}
+            row.update({f'p{round(q * 100):g}': value for q, value in zip(qs, sketch.quantiles(qs))})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def to_dict(self):
+        return {'params': self.params, 'sketches': {name: s.to_dict() for name, s in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketches = cls(data['params'])
+        sketches.sketches = {name: KLLSketch.from_dict(s) for name, s in data['sketches'].items()}
+        return sketches
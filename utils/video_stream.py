@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+import pandas as pd
+from utils.image_processing import ImagePipeline
+
+_END_OF_STREAM = object()
+
+class _StreamError:
+    """Okuma iş parçacığındaki hatayı kuyruk üzerinden ana iş parçacığına taşır"""
+
+    def __init__(self, error):
+        self.error = error
+
+def iter_video_frames(path, frame_skip=0):
+    """
+    Video dosyasındaki kareleri (kare_no, zaman_sn, kare) olarak döndürür.
+    frame_skip > 0 ise her (frame_skip + 1) karenin yalnızca biri çözülür;
+    atlanan kareler çözülmeden geçilir.
+    """
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError("Video dosyası açılamadı")
+
+    fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+    step = frame_skip + 1
+    index = 0
+
+    try:
+        while True:
+            if index % step:
+                if not capture.grab():
+                    break
+            else:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield index, index / fps, frame
+            index += 1
+    finally:
+        capture.release()
+
+def video_fps(path):
+    """Videonun kare hızını döndürür (okunamazsa 25)"""
+    capture = cv2.VideoCapture(str(path))
+    try:
+        return capture.get(cv2.CAP_PROP_FPS) or 25.0
+    finally:
+        capture.release()
+
+class VideoStreamAnalyzer:
+    """
+    Video karelerini sınırlı bir kuyruk üzerinden analiz eder ve kayan
+    bir anormallik skoru zaman çizelgesi tutar.
+
+    Kareler ayrı bir iş parçacığında okunur. Kuyruk doluysa ya da kare
+    gecikme bütçesinden daha uzun süre beklemişse kare işlenmeden atılır;
+    böylece işlem hızı kaynak kare hızının gerisinde kalmaz. Sayaçlar her
+    iş parçacığının kendi sözlüğünde tutulur, stats bunları birleştirir.
+    Okuma sırasında oluşan hatalar run() içinde yeniden fırlatılır.
+
+    Bellek video uzunluğundan bağımsızdır: zaman çizelgesi son window
+    kareyi tutan bir halka tampondur; tüm akışın skor özeti (summary)
+    kareler geldikçe artımlı olarak güncellenir.
+    """
+
+    def __init__(self, frame_skip=0, queue_size=8, latency_budget_ms=None, window=300, downscale=None, realtime=False):
+        self.frame_skip = frame_skip
+        self.queue_size = queue_size
+        # None ise kaynak videonun bir kare süresi kullanılır
+        self.latency_budget_ms = latency_budget_ms
+        self.realtime = realtime
+        self.pipeline = ImagePipeline(downscale=downscale)
+        self.timeline = deque(maxlen=window)
+        # Yalnızca okuma iş parçacığının yazdığı sayaçlar
+        self._producer_stats = {'read': 0, 'dropped': 0}
+        # Yalnızca run()'ın (tüketicinin) yazdığı sayaçlar ve skor özeti
+        self._consumer_stats = {'processed': 0, 'dropped': 0}
+        self._score_sum = 0.0
+        self._score_max = None
+
+    @property
+    def stats(self):
+        return {
+            'read': self._producer_stats['read'],
+            'processed': self._consumer_stats['processed'],
+            'dropped': self._producer_stats['dropped'] + self._consumer_stats['dropped']
+        }
+
+    def summary(self):
+        """Tüm akış boyunca işlenen karelerin skor özeti (zaman çizelgesi penceresinden bağımsız)"""
+        processed = self._consumer_stats['processed']
+        return {
+            'processed': processed,
+            'mean_score': self._score_sum / processed if processed else None,
+            'max_score': self._score_max
+        }
+
+    def _produce(self, path, frames, stop):
+        start = time.perf_counter()
+        end = _END_OF_STREAM
+        try:
+            for index, timestamp, frame in iter_video_frames(path, self.frame_skip):
+                if stop.is_set():
+                    return
+                if self.realtime:
+                    # Canlı kaynağı taklit etmek için kaynak zamanlamasını bekle
+                    delay = timestamp - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                self._producer_stats['read'] += 1
+                try:
+                    frames.put_nowait((index, timestamp, time.perf_counter(), frame))
+                except queue.Full:
+                    self._producer_stats['dropped'] += 1
+        except Exception as e:
+            end = _StreamError(e)
+        finally:
+            while not stop.is_set():
+                try:
+                    frames.put(end, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def run(self, path):
+        """
+        Videoyu analiz eder ve işlenen her kare için sonuç sözlüğü döndürür.
+        Üreteç erken kapatılırsa okuma iş parçacığı da durdurulur; okuma
+        hatası (ör. video açılamadı) burada fırlatılır.
+        """
+        budget_ms = self.latency_budget_ms
+        if budget_ms is None:
+            budget_ms = 1000.0 / video_fps(path)
+
+        frames = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(path, frames, stop), daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                item = frames.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, _StreamError):
+                    raise item.error
+
+                index, timestamp, captured_at, frame = item
+                waited_ms = (time.perf_counter() - captured_at) * 1000
+                if waited_ms > budget_ms:
+                    self._consumer_stats['dropped'] += 1
+                    continue
+
+                started = time.perf_counter()
+                _, anomaly_score = self.pipeline.process(frame)
+                result = {
+                    'frame_index': index,
+                    'time_sec': timestamp,
+                    'anomaly_score': anomaly_score,
+                    'latency_ms': (time.perf_counter() - captured_at) * 1000,
+                    'process_ms': (time.perf_counter() - started) * 1000
+                }
+                self.timeline.append(result)
+                self._consumer_stats['processed'] += 1
+                self._score_sum += anomaly_score
+                self._score_max = anomaly_score if self._score_max is None else max(self._score_max, anomaly_score)
+                yield result
+        finally:
+            stop.set()
+            producer.join(timeout=1.0)
+
+    def timeline_frame(self):
+        """Kayan zaman çizelgesini DataFrame olarak döndürür"""
+        return pd.DataFrame(list(self.timeline), columns=['frame_index', 'time_sec', 'anomaly_score', 'latency_ms', 'process_ms'])